@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+片段对齐回归检查
+
+使用 samples 中的真实 ASR 输出，以对应 SRT 的每条字幕文本作为"伪 LLM 分割结果"，
+按若干固定随机种子各加入一轮扰动 (替换 / 删除 / 插入字符、合并相邻片段)，逐片段比较：
+- 旧版 SrtProcessor.get_segment_words_fuzzy：对搜索窗口内每个 (起点, 终点) 组合执行 difflib 比较的二次扫描；
+- core.alignment_engine.AlignmentEngine.align_segment：n-gram 对角线投票 + 局部边界优化
+  (最佳相似度低于接受阈值时在旧版的搜索范围内从最佳区间附近向外做有界穷举)。
+
+两者从同一个搜索起点开始 (按旧版的推进规则推进)，统计相似度更低 / 更高、区间 (起点, 终点) 不同的片段数与耗时。
+旧版在相似度超过 0.98 时提前结束扫描，新引擎可能找到相似度更高 (如 1.0) 的区间，此时区间也会不同；
+相似度比旧版低超过 --tolerance 的片段视为回退，存在回退时以非零状态退出。
+旧版实现在本文件中按原实现复刻，仅用于对比。
+
+使用示例:
+    python benchmarks/bench_alignment.py
+    python benchmarks/bench_alignment.py --cases ja_elevenlabs --seeds 7 --verbose
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import sys
+import os
+import argparse
+import difflib
+import json
+import random
+import time
+from typing import List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import config as app_config
+from core.transcription_parser import TranscriptionParser
+from core.alignment_engine import AlignmentEngine
+from bench_srt_processor import BENCH_CASES, SAMPLES_DIR, SilentSignals, load_srt_texts
+
+
+def legacy_align(word_texts: List[str], text_segment: str, start_search_index: int) -> Tuple[int, int, float]:
+    """旧版 get_segment_words_fuzzy 的搜索部分，返回 (区间起点, 区间终点(不含), 相似度)；未找到时返回 (起点, 起点, 0.0)。"""
+    segment_clean = text_segment.strip().replace(" ", "")
+    if not segment_clean:
+        return start_search_index, start_search_index, 0.0
+
+    best_match_count = 0
+    best_match_ratio = 0.0
+    best_match_end_index = start_search_index
+    best_match_text = ""
+
+    base_len_factor = 3
+    min_additional_words = 20
+    max_additional_words = 60
+    estimated_words_in_segment = len(text_segment.split())
+    search_window_size = len(segment_clean) * base_len_factor + min(max(estimated_words_in_segment * 2, min_additional_words), max_additional_words)
+    max_lookahead_outer = min(start_search_index + search_window_size, len(word_texts))
+
+    for i in range(start_search_index, max_lookahead_outer):
+        current_words_text_list = []
+        max_j_lookahead = min(i + len(segment_clean) + 30, len(word_texts))
+        for j in range(i, max_j_lookahead):
+            current_words_text_list.append(word_texts[j].replace(" ", ""))
+            built_text = "".join(current_words_text_list)
+            if not built_text.strip():
+                continue
+
+            ratio = difflib.SequenceMatcher(None, segment_clean, built_text, autojunk=False).ratio()
+            update_best = False
+            if ratio > best_match_ratio:
+                update_best = True
+            elif abs(ratio - best_match_ratio) < 1e-9:
+                if best_match_count:
+                    if abs(len(built_text) - len(segment_clean)) < abs(len(best_match_text) - len(segment_clean)):
+                        update_best = True
+                else:
+                    update_best = True
+
+            if update_best and ratio > 0.01:
+                best_match_ratio = ratio
+                best_match_count = j - i + 1
+                best_match_end_index = j + 1
+                best_match_text = built_text
+
+            if ratio > 0.95 and len(built_text) > len(segment_clean) * 1.8:
+                break
+
+        if best_match_ratio > 0.98:
+            break
+
+    if not best_match_count:
+        return start_search_index, start_search_index, 0.0
+    return best_match_end_index - best_match_count, best_match_end_index, best_match_ratio
+
+
+def perturb_segments(segments: List[str], rng: random.Random) -> List[str]:
+    """模拟 LLM 输出与 ASR 文本的差异：随机替换 / 删除 / 插入字符，偶尔合并相邻片段。"""
+    alphabet = "".join(sorted(set("".join(segments)) - {" "})) or "a"
+    perturbed = []
+    index = 0
+    while index < len(segments):
+        text = segments[index]
+        if index + 1 < len(segments) and rng.random() < 0.08:
+            index += 1
+            text = text + " " + segments[index]
+        chars = list(text)
+        for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+            if not chars:
+                break
+            position = rng.randrange(len(chars))
+            operation = rng.random()
+            if operation < 0.4:
+                chars[position] = rng.choice(alphabet)
+            elif operation < 0.7:
+                del chars[position]
+            else:
+                chars.insert(position, rng.choice(alphabet))
+        perturbed.append("".join(chars))
+        index += 1
+    return perturbed
+
+
+def compare_case(words, segments: List[str], tolerance: float, verbose: bool) -> dict:
+    texts = [w.text for w in words]
+    engine = AlignmentEngine(words)
+    accept_ratio = app_config.ALIGNMENT_SIMILARITY_THRESHOLD * 0.7
+    stats = {"segments": 0, "lower": 0, "higher": 0, "span_diff": 0, "regressions": 0, "legacy_s": 0.0, "engine_s": 0.0}
+    search_start = 0
+    for text_segment in segments:
+        started = time.perf_counter()
+        legacy = legacy_align(texts, text_segment, search_start)
+        stats["legacy_s"] += time.perf_counter() - started
+        started = time.perf_counter()
+        current = engine.align_segment(text_segment, search_start)
+        stats["engine_s"] += time.perf_counter() - started
+
+        stats["segments"] += 1
+        if current[2] < legacy[2] - 1e-9:
+            stats["lower"] += 1
+            if current[2] < legacy[2] - tolerance:
+                stats["regressions"] += 1
+        elif current[2] > legacy[2] + 1e-9:
+            stats["higher"] += 1
+        if current[:2] != legacy[:2]:
+            stats["span_diff"] += 1
+            if verbose:
+                print(f"    起点 {search_start}: {text_segment!r} 旧版 {legacy[0]}-{legacy[1]} ({legacy[2]:.3f}) "
+                      f"新引擎 {current[0]}-{current[1]} ({current[2]:.3f})")
+        if legacy[1] > legacy[0] and legacy[2] >= accept_ratio:
+            search_start = legacy[1]
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="片段对齐回归检查 (新对齐引擎 vs 旧版二次扫描)")
+    arg_parser.add_argument("--cases", default="", help="逗号分隔的用例名（默认: 全部）")
+    arg_parser.add_argument("--seeds", default="42,7,3", help="逗号分隔的扰动随机种子，每个种子一轮（默认: 42,7,3）")
+    arg_parser.add_argument("--tolerance", type=float, default=0.02, help="相似度低于旧版超过该值视为回退（默认: 0.02）")
+    arg_parser.add_argument("--verbose", action="store_true", help="输出每个区间不同的片段")
+    args = arg_parser.parse_args()
+    case_names = {name.strip() for name in args.cases.split(",") if name.strip()}
+    seeds = [int(seed) for seed in args.seeds.split(",") if seed.strip()]
+
+    parser = TranscriptionParser(signals_forwarder=SilentSignals())
+    totals = {"segments": 0, "lower": 0, "higher": 0, "span_diff": 0, "regressions": 0}
+    print(f"  {'用例':<18}{'种子':>6}{'片段':>6}{'更低':>6}{'更高':>6}{'区间不同':>10}{'回退':>6}{'旧版(s)':>10}{'新引擎(s)':>11}")
+    for case_name, json_rel, parse_format, srt_rel, _ in BENCH_CASES:
+        if (case_names and case_name not in case_names) or case_name.endswith("_mode_c"):
+            continue
+        with open(os.path.join(SAMPLES_DIR, json_rel), "r", encoding="utf-8") as f:
+            parsed = parser.parse(json.load(f), parse_format)
+        if parsed is None or not parsed.words:
+            print(f"  {case_name:<18}解析失败，跳过")
+            continue
+        srt_texts = load_srt_texts(os.path.join(SAMPLES_DIR, srt_rel))
+        for seed in seeds:
+            segments = perturb_segments(srt_texts, random.Random(seed))
+            stats = compare_case(list(parsed.words), segments, args.tolerance, args.verbose)
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"  {case_name:<18}{seed:>6}{stats['segments']:>6}{stats['lower']:>6}{stats['higher']:>6}{stats['span_diff']:>10}"
+                  f"{stats['regressions']:>6}{stats['legacy_s']:>10.3f}{stats['engine_s']:>11.3f}")
+    print(f"\n合计 {totals['segments']} 个片段: 相似度更低 {totals['lower']}，更高 {totals['higher']}，"
+          f"区间不同 {totals['span_diff']}，回退 (低于旧版超过 {args.tolerance}) {totals['regressions']}")
+    return 1 if totals["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+数据模型内存 / 时间微基准测试
+
+在大规模合成转录 (默认 30 万个词，约相当于 10 小时以上的日语音频) 上比较：
+- 词对象：旧版普通 dataclass 的 TimestampedWord、当前带 __slots__ 的 TimestampedWord、列式 WordStore；
+- 字幕条目：旧版构造时即执行 re.sub 的 SubtitleEntry 与当前带 __slots__、延迟规范化文本的 SubtitleEntry。
+
+旧版类型在本文件中按原实现复刻，仅用于对比。
+
+使用示例:
+    python benchmarks/bench_data_models.py
+    python benchmarks/bench_data_models.py --words 1000000 --entries 200000
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import sys
+import os
+import argparse
+import gc
+import random
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.data_models import TimestampedWord, SubtitleEntry, WordStore
+
+
+@dataclass
+class LegacyTimestampedWord:
+    """旧版 TimestampedWord (普通 dataclass，每个实例带 __dict__)。"""
+    text: str
+    start_time: float
+    end_time: float
+    speaker_id: Optional[str] = None
+    confidence: float = 1.0
+
+
+class LegacySubtitleEntry:
+    """旧版 SubtitleEntry (无 __slots__，构造时立即规范化文本)。"""
+    def __init__(self, index, start_time, end_time, text, words_used=None, alignment_ratio=1.0):
+        self.index = index
+        self.start_time = start_time
+        self.end_time = end_time
+        self.text = re.sub(r'\s+', ' ', text).strip()
+        self.words_used = words_used if words_used else []
+        self.alignment_ratio = alignment_ratio
+        self.is_intentionally_oversized = False
+
+
+# 合成词表：日语常见假名/汉字片段与标点，模拟 ASR 的字符级输出
+SYNTHETIC_VOCAB = list("あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん") + \
+    ["今日", "天気", "私", "会社", "先生", "、", "。", "？", " "]
+
+
+def synthetic_words(word_count: int, seed: int = 42):
+    """生成 (text, start, end, speaker, confidence) 元组序列。"""
+    rng = random.Random(seed)
+    current_time = 0.0
+    rows = []
+    for _ in range(word_count):
+        duration = rng.uniform(0.05, 0.4)
+        rows.append((rng.choice(SYNTHETIC_VOCAB), current_time, current_time + duration,
+                     "speaker_0" if rng.random() < 0.7 else "speaker_1", rng.uniform(0.3, 1.0)))
+        current_time += duration + rng.uniform(0.0, 0.2)
+    return rows
+
+
+def time_only(label: str, run, repeat: int = 3):
+    """多次执行 run()，返回最快一次的耗时。"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        del result
+        best = elapsed if best is None else min(best, elapsed)
+    return {"label": label, "time_s": best, "mem_mb": None}
+
+
+def measure(label: str, build, repeat: int = 3):
+    """计时 (不开启 tracemalloc) 后再单独测一次构建结果的常驻内存 (MB)。"""
+    row = time_only(label, build, repeat)
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    row["mem_mb"] = current_bytes / (1024 * 1024)
+    return row
+
+
+def bench_words(rows) -> List[dict]:
+    def build_legacy():
+        return [LegacyTimestampedWord(*row) for row in rows]
+
+    def build_slotted():
+        return [TimestampedWord(*row) for row in rows]
+
+    def build_store():
+        store = WordStore()
+        for row in rows:
+            store.append(*row)
+        return store
+
+    return [
+        measure("TimestampedWord (旧 dataclass)", build_legacy),
+        measure("TimestampedWord (__slots__)", build_slotted),
+        measure("WordStore (列式)", build_store),
+    ]
+
+
+def bench_entries(rows, entry_count: int) -> List[dict]:
+    rng = random.Random(7)
+    texts = []
+    for _ in range(entry_count):
+        start = rng.randrange(0, max(1, len(rows) - 20))
+        # 模拟 LLM 片段 / 合并分割产生的文本 (含少量多余空白)
+        texts.append(" ".join(row[0] for row in rows[start:start + rng.randint(5, 20)]) + "  ")
+
+    def build(entry_cls):
+        return lambda: [entry_cls(i, float(i), float(i) + 1.0, text) for i, text in enumerate(texts)]
+
+    def build_and_read(entry_cls):
+        def run():
+            entries = [entry_cls(i, float(i), float(i) + 1.0, text) for i, text in enumerate(texts)]
+            return sum(len(entry.text) for entry in entries)
+        return run
+
+    return [
+        measure("SubtitleEntry (旧版) 构造", build(LegacySubtitleEntry)),
+        measure("SubtitleEntry (__slots__/延迟规范化) 构造", build(SubtitleEntry)),
+        time_only("SubtitleEntry (旧版) 构造+读取文本", build_and_read(LegacySubtitleEntry)),
+        time_only("SubtitleEntry (__slots__/延迟规范化) 构造+读取文本", build_and_read(SubtitleEntry)),
+    ]
+
+
+def print_results(title: str, results: List[dict]):
+    print(f"\n{title}")
+    print(f"  {'类型':<44}{'耗时(s)':>10}{'内存(MB)':>12}")
+    for row in results:
+        mem = f"{row['mem_mb']:.1f}" if row["mem_mb"] is not None else "-"
+        print(f"  {row['label']:<44}{row['time_s']:>10.3f}{mem:>12}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="TimestampedWord / SubtitleEntry 内存与时间微基准测试")
+    arg_parser.add_argument("--words", type=int, default=300000, help="合成词数量（默认: 300000）")
+    arg_parser.add_argument("--entries", type=int, default=100000, help="合成字幕条目数量（默认: 100000）")
+    args = arg_parser.parse_args()
+
+    rows = synthetic_words(args.words)
+    print(f"合成转录: {len(rows)} 个词, {args.entries} 个字幕条目")
+    print_results("词对象", bench_words(rows))
+    print_results("字幕条目", bench_entries(rows, args.entries))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
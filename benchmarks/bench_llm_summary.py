@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+LLM 摘要流程基准测试 (全文摘要 vs 分段摘要 vs 流水线摘要)
+
+用模拟的 LLM 服务端替换共享传输层 (完全离线，不发送任何网络请求)，
+对平铺扩展到 1 / 3 / 10 小时的日语转录文本运行 call_llm_api_for_segmentation，比较三种摘要方式：
+- full:       原有的两阶段流程，先对全文请求一次摘要，完成后再开始分块分割 (本测试中关闭超长自动改用分段摘要的保护)；
+- map_reduce: 各段并行摘要后合并，再开始分块分割；
+- pipelined:  段摘要与分块分割交错进行，每块只等待所在段与前一段的摘要。
+
+模拟服务端按 "固定延迟 + 输入 tokens × 预填充耗时 + 输出 tokens × 生成耗时" 计算每个请求的耗时，
+输入超过 --context-tokens 的请求返回 HTTP 400 (模拟超出上下文长度)。
+所有耗时都按 --time-scale 缩放执行，报告中换算回模拟时间 (秒)。
+
+使用示例:
+    python benchmarks/bench_llm_summary.py
+    python benchmarks/bench_llm_summary.py --durations 3h --concurrency 5 --context-tokens 32000
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import sys
+import os
+import argparse
+import json
+import re
+import threading
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import config as app_config
+from core import llm_api
+
+SAMPLE_SRT = os.path.join(REPO_ROOT, "samples", "ja", "elevenlabs格式实例.srt")
+
+DURATION_PRESETS = {"1h": 3600.0, "3h": 3 * 3600.0, "10h": 10 * 3600.0}
+
+SUMMARY_MODES = [app_config.LLM_SUMMARY_MODE_FULL, app_config.LLM_SUMMARY_MODE_MAP_REDUCE, app_config.LLM_SUMMARY_MODE_PIPELINED]
+
+# 模拟摘要响应的长度 (字符)，与摘要提示词要求的 200 字左右相当
+SIMULATED_SUMMARY_CHARS = 200
+
+
+class _Emitter:
+    """模拟 Qt 信号的 emit 接口。"""
+    def __init__(self, callback):
+        self._callback = callback
+
+    def emit(self, *args):
+        self._callback(*args)
+
+
+class SilentSignals:
+    """作为 call_llm_api_for_segmentation 的信号转发器，丢弃日志与进度。"""
+    def __init__(self):
+        self.log_message = _Emitter(lambda message: None)
+        self.llm_progress_signal = _Emitter(lambda value: None)
+
+
+class SimulatedResponse:
+    """模拟 OpenAI 兼容格式的非流式响应。"""
+
+    def __init__(self, status_code: int, data):
+        self.status_code = status_code
+        self._data = data
+        self.text = json.dumps(data, ensure_ascii=False)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Simulated Error", response=self)
+
+    def json(self):
+        return self._data
+
+    def close(self):
+        pass
+
+
+class SimulatedLLMTransport:
+    """
+    代替 LLMTransport 的模拟服务端：摘要请求返回固定长度的摘要，分割请求把当前文本块按句末标点断行后原样返回。
+    同时统计请求数、输入 / 输出 tokens 与单次最大输入。
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.read_timeout = app_config.DEFAULT_LLM_READ_TIMEOUT
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.max_prompt_tokens = 0
+        self.rejected = 0
+        self.first_chunk_done_at = None
+
+    def _tokens(self, text: str) -> int:
+        return max(1, int(len(text) / self.args.chars_per_token))
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False, **kwargs):
+        prompt = "".join(message["content"] for message in json["messages"])
+        user = json["messages"][-1]["content"]
+        prompt_tokens = self._tokens(prompt)
+        is_chunk = "【当前文本块】:\n" in user
+        if prompt_tokens > self.args.context_tokens:
+            output = None
+        elif is_chunk:
+            chunk = user.split("【当前文本块】:\n", 1)[1]
+            output = "\n".join(line for line in re.split(r"(?<=[。！？])", chunk.replace("\n", "")) if line)
+        else:
+            output = "要" * SIMULATED_SUMMARY_CHARS
+        completion_tokens = self._tokens(output) if output else 0
+        latency = self.args.base_latency + prompt_tokens * self.args.prefill_s + completion_tokens * self.args.decode_s
+        time.sleep(latency * self.args.time_scale)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+            if output is None:
+                self.rejected += 1
+            elif is_chunk and self.first_chunk_done_at is None:
+                self.first_chunk_done_at = time.perf_counter()
+        if output is None:
+            return SimulatedResponse(400, {"error": {"message": "maximum context length exceeded", "type": "invalid_request_error"}})
+        return SimulatedResponse(200, {
+            "choices": [{"message": {"content": output}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        })
+
+    def close(self):
+        pass
+
+
+def load_sample_text():
+    """读取样例 SRT，返回 (按行拼接的字幕文本, 字幕覆盖的时长秒数)。"""
+    with open(SAMPLE_SRT, "r", encoding="utf-8-sig") as f:
+        blocks = f.read().strip().split("\n\n")
+    texts = []; last_end = 0.0
+    for block in blocks:
+        lines = block.strip().split("\n")
+        if len(lines) < 3:
+            continue
+        match = re.search(r"--> (\d+):(\d+):(\d+),(\d+)", lines[1])
+        if match:
+            hours, minutes, seconds, millis = (int(g) for g in match.groups())
+            last_end = hours * 3600 + minutes * 60 + seconds + millis / 1000
+        texts.append("".join(line.strip() for line in lines[2:]))
+    return "\n".join(texts), last_end
+
+
+def run_mode(text: str, mode: str, args):
+    transport = SimulatedLLMTransport(args)
+    llm_api.get_llm_transport = lambda *a, **kw: transport
+    original_full_max = app_config.LLM_SUMMARY_FULL_MAX_CHARS
+    if mode == app_config.LLM_SUMMARY_MODE_FULL:
+        app_config.LLM_SUMMARY_FULL_MAX_CHARS = float("inf")  # 测量原有流程本身，不自动改用分段摘要
+    try:
+        started_at = time.perf_counter()
+        segments = llm_api.call_llm_api_for_segmentation(
+            "sk-simulated", text, None, None, None, signals_forwarder=SilentSignals(), target_language="ja",
+            max_concurrent_requests=args.concurrency, summary_mode=mode
+        )
+        elapsed = time.perf_counter() - started_at
+    finally:
+        app_config.LLM_SUMMARY_FULL_MAX_CHARS = original_full_max
+    first_chunk = (transport.first_chunk_done_at - started_at) if transport.first_chunk_done_at else None
+    return {
+        "mode": mode,
+        "segments": len(segments or []),
+        "total_s": elapsed / args.time_scale,
+        "first_chunk_s": first_chunk / args.time_scale if first_chunk is not None else None,
+        "requests": transport.requests,
+        "prompt_tokens": transport.prompt_tokens,
+        "completion_tokens": transport.completion_tokens,
+        "max_prompt_tokens": transport.max_prompt_tokens,
+        "rejected": transport.rejected,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="LLM 摘要流程基准测试（离线，模拟 LLM 服务端）")
+    arg_parser.add_argument("--durations", default="1h,3h,10h", help="逗号分隔的目标时长，可选: " + ",".join(DURATION_PRESETS))
+    arg_parser.add_argument("--modes", default=",".join(SUMMARY_MODES), help="逗号分隔的摘要方式")
+    arg_parser.add_argument("--concurrency", type=int, default=app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS,
+                            help="同时在途请求数 (至少为 2；为 1 时分块间的固定延时不受 --time-scale 缩放)")
+    arg_parser.add_argument("--context-tokens", type=int, default=64000, help="模拟的上下文长度上限 (tokens)")
+    arg_parser.add_argument("--chars-per-token", type=float, default=1.2, help="估算 tokens 时每 token 的字符数 (日语约 1~1.5)")
+    arg_parser.add_argument("--base-latency", type=float, default=0.8, help="每个请求的固定延迟 (模拟秒)")
+    arg_parser.add_argument("--prefill-s", type=float, default=0.00005, help="每个输入 token 的处理耗时 (模拟秒)")
+    arg_parser.add_argument("--decode-s", type=float, default=0.02, help="每个输出 token 的生成耗时 (模拟秒)")
+    arg_parser.add_argument("--time-scale", type=float, default=0.01, help="实际等待时间 = 模拟时间 × 该系数")
+    arg_parser.add_argument("--output", help="把本次结果写入指定 JSON 文件")
+    args = arg_parser.parse_args()
+    if args.concurrency < 2:
+        arg_parser.error("--concurrency 至少为 2")
+
+    app_config.DEFAULT_LLM_CACHE_ENABLED = False
+    base_text, base_seconds = load_sample_text()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    results = []
+    print(f"{'dur':>4}{'chars':>9}  {'mode':<12}{'segs':>7}{'first':>9}{'total':>9}{'reqs':>6}{'in_tok':>10}{'out_tok':>9}{'max_in':>9}{'400s':>6}")
+    for label in [d.strip() for d in args.durations.split(",") if d.strip()]:
+        repeat = max(1, int(DURATION_PRESETS[label] // base_seconds))
+        text = "\n".join([base_text] * repeat)
+        for mode in modes:
+            row = run_mode(text, mode, args)
+            row.update({"duration": label, "chars": len(text)})
+            results.append(row)
+            first = f"{row['first_chunk_s']:.1f}" if row["first_chunk_s"] is not None else "-"
+            print(f"{label:>4}{len(text):>9}  {mode:<12}{row['segments']:>7}{first:>9}{row['total_s']:>9.1f}{row['requests']:>6}"
+                  f"{row['prompt_tokens']:>10}{row['completion_tokens']:>9}{row['max_prompt_tokens']:>9}{row['rejected']:>6}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
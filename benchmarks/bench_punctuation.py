@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+标点判断微基准测试
+
+在合成的 ASR 词序列 (默认 30 万个词) 上比较：
+- 旧版 SrtProcessor.check_word_has_punctuation：每次调用导入 re / unicodedata、逐个 endswith 遍历标点集合、
+  重新拼接省略号正则；
+- core.punctuation.PunctuationClassifier：预编译的结尾交替正则 + 按字符的类别表 + 按词文本的 LRU 缓存
+  (分别测量不经过 LRU 缓存、缓存为空的首轮与缓存已填充的后续轮次)。
+
+对 config 中的四个标点集合各测一轮 (与分割点查找、AI 校对目标筛选的调用方式相同)，
+并先逐词核对两者的判断结果完全一致。旧版实现在本文件中按原实现复刻，仅用于对比。
+
+使用示例:
+    python benchmarks/bench_punctuation.py
+    python benchmarks/bench_punctuation.py --words 1000000
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import sys
+import os
+import argparse
+import gc
+import random
+import time
+from typing import List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import config as app_config
+from core.punctuation import PunctuationClassifier
+
+
+def legacy_check_word_has_punctuation(word_text: str, punctuation_set: set) -> bool:
+    """旧版 SrtProcessor.check_word_has_punctuation (去掉 self)。"""
+    import re
+    import unicodedata
+
+    cleaned_text = word_text.strip()
+    if not cleaned_text:
+        return False
+
+    if len(cleaned_text) == 1:
+        if cleaned_text == ' ' or cleaned_text in punctuation_set:
+            return True
+
+    if cleaned_text in punctuation_set:
+        return True
+
+    for punct in punctuation_set:
+        if cleaned_text.endswith(punct):
+            return True
+
+    ellipsis_chars_in_set = any(p in punctuation_set for p in ['...', '......', '‥', '…'])
+    if ellipsis_chars_in_set:
+        ellipsis_patterns = [r'…+', r'‥+', r'\.{3,}']
+        for pattern in ellipsis_patterns:
+            if re.search(pattern + '$', cleaned_text):
+                return True
+
+    last_char = cleaned_text[-1] if len(cleaned_text) > 0 else ''
+    excluded_chars = {'.', '。', '?', '？', '!', '！', ',', '、', '，', '…', '‥'}
+    if last_char and last_char not in excluded_chars:
+        if unicodedata.category(last_char) in ['Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps']:
+            return True
+
+    return False
+
+
+PUNCTUATION_SETS = [
+    ("FINAL", app_config.FINAL_PUNCTUATION),
+    ("ELLIPSIS", app_config.ELLIPSIS_PUNCTUATION),
+    ("COMMA", app_config.COMMA_PUNCTUATION),
+    ("ALL_SPLIT", app_config.ALL_SPLIT_PUNCTUATION),
+]
+
+# 合成词表：日语 / 英语词、带标点结尾的词、单独的标点与各种省略号
+SYNTHETIC_VOCAB = list("あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん") + \
+    ["今日", "天気", "私", "会社", "先生", "hello", "world", "OK", "1", "x",
+     "、", "。", "？", "！", ",", ".", "?", "!", ";", "；", "…", "……", "...", "‥", "···", "「", "」", "-", "～",
+     "です。", "ね、", "はい！", "でも…", "so...", "what?", "(笑)", "“yes”", " ", ""]
+
+
+def synthetic_texts(word_count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(SYNTHETIC_VOCAB) for _ in range(word_count)]
+
+
+def best_time(run, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def verify(texts: List[str]):
+    """逐词核对新旧实现的判断结果一致 (另加全部 BMP 单字符)。"""
+    samples = list(dict.fromkeys(texts)) + [chr(c) for c in range(0x10000) if not 0xD800 <= c <= 0xDFFF]
+    for name, punctuation_set in PUNCTUATION_SETS:
+        classifier = PunctuationClassifier(punctuation_set)
+        for text in samples:
+            expected = legacy_check_word_has_punctuation(text, punctuation_set)
+            if classifier.has_punctuation(text) != expected:
+                raise AssertionError(f"{name}: {text!r} 判断不一致 (旧版: {expected})")
+
+
+def bench(texts: List[str]) -> List[dict]:
+    results = []
+    for name, punctuation_set in PUNCTUATION_SETS:
+        legacy_s = best_time(lambda: [legacy_check_word_has_punctuation(t, punctuation_set) for t in texts])
+
+        uncached_classifier = PunctuationClassifier(punctuation_set)
+        uncached_s = best_time(lambda: [uncached_classifier._classify(t) for t in texts])
+
+        def cold_run():
+            classifier = PunctuationClassifier(punctuation_set)
+            return [classifier.has_punctuation(t) for t in texts]
+        cold_s = best_time(cold_run)
+
+        warm_classifier = PunctuationClassifier(punctuation_set)
+        warm_s = best_time(lambda: [warm_classifier.has_punctuation(t) for t in texts])
+        results.append({"set": name, "legacy_s": legacy_s, "uncached_s": uncached_s, "cold_s": cold_s, "warm_s": warm_s})
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="标点判断 (check_word_has_punctuation) 微基准测试")
+    arg_parser.add_argument("--words", type=int, default=300000, help="合成词数量（默认: 300000）")
+    args = arg_parser.parse_args()
+
+    texts = synthetic_texts(args.words)
+    verify(texts)
+    print(f"合成词序列: {len(texts)} 个词 (新旧实现判断结果一致)")
+    print(f"\n  {'标点集合':<12}{'旧版(s)':>10}{'无缓存(s)':>12}{'首轮(s)':>10}{'缓存(s)':>10}{'加速(无缓存)':>14}{'加速(缓存)':>12}")
+    for row in bench(texts):
+        print(f"  {row['set']:<12}{row['legacy_s']:>10.3f}{row['uncached_s']:>12.3f}{row['cold_s']:>10.3f}{row['warm_s']:>10.3f}"
+              f"{row['legacy_s'] / row['uncached_s']:>13.1f}x{row['legacy_s'] / row['warm_s']:>11.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
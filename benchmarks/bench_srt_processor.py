@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+SrtProcessor 性能基准测试
+
+使用仓库自带的 samples 中的真实 ASR 输出，以对应 SRT 的每条字幕文本作为固定的
+"伪 LLM 分割结果"（完全离线，不调用任何 LLM），把转录结果平铺扩展到 1 小时 / 3 小时 / 10 小时，
+借助 SrtProcessor 的性能剖析 (get_last_profile) 测量各阶段（对齐、合并、格式化）的耗时、峰值内存与每秒处理片段数，
+并与基线文件对比以发现性能回退。
+
+使用示例:
+    python benchmarks/bench_srt_processor.py
+    python benchmarks/bench_srt_processor.py --durations 1h --cases ja_elevenlabs,zh_elevenlabs
+    python benchmarks/bench_srt_processor.py --save-baseline
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.data_models import ParsedTranscription, WordStore
+from core.transcription_parser import TranscriptionParser
+from core.srt_processor import SrtProcessor
+
+SAMPLES_DIR = os.path.join(REPO_ROOT, "samples")
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# (用例名, 转录 JSON, 解析格式, 伪 LLM 分割来源 SRT, process_to_srt 的 source_format)
+BENCH_CASES = [
+    ("ja_elevenlabs", "ja/elevenlabs格式实例.json", "elevenlabs", "ja/elevenlabs格式实例.srt", "elevenlabs"),
+    ("ja_whisper", "ja/whisper格式实例.json", "whisper", "ja/whisper格式实例.srt", "whisper"),
+    ("ja_deepgram", "ja/Deepgram-nova2格式实例.json", "deepgram", "ja/Deepgram-nova2格式实例.srt", "deepgram"),
+    ("ja_assemblyai", "ja/assemblyai格式实例.json", "assemblyai", "ja/assemblyai格式实例.srt", "assemblyai"),
+    # 没有 Soniox 样例，借用 ElevenLabs 词数据走 Mode C 流程
+    ("ja_soniox_mode_c", "ja/elevenlabs格式实例.json", "elevenlabs", "ja/elevenlabs格式实例.srt", "soniox"),
+    ("zh_elevenlabs", "zh/中文测试用音声_elevenlabs_transcript.json", "elevenlabs", "zh/中文测试用音声.srt", "elevenlabs"),
+    ("en_elevenlabs", "en/英语测试用音声_elevenlabs_transcript.json", "elevenlabs", "en/英语测试用音声.srt", "elevenlabs"),
+]
+
+DURATION_PRESETS = {"1h": 3600.0, "3h": 3 * 3600.0, "10h": 10 * 3600.0}
+
+# 表格中显示的阶段列；其余阶段 (模式优化、间距验证、终极优化等) 计入 format 列
+REPORT_PHASES = ["prepare", "align", "merge"]
+
+# 绝对差值低于此值(秒)的波动不计为回退，避免短用例的计时噪声
+MIN_REGRESSION_DELTA_S = 0.05
+
+
+class _Emitter:
+    """模拟 Qt 信号的 emit 接口。"""
+    def __init__(self, callback):
+        self._callback = callback
+
+    def emit(self, *args):
+        self._callback(*args)
+
+
+class SilentSignals:
+    """作为 SrtProcessor / TranscriptionParser 的信号转发器，丢弃日志与进度。"""
+    def __init__(self):
+        self.log_message = _Emitter(lambda message: None)
+        self.progress = _Emitter(lambda value: None)
+
+
+def load_srt_texts(srt_path: str):
+    """读取 SRT 文件，返回每条字幕的文本（多行合并为一行）。"""
+    with open(srt_path, "r", encoding="utf-8-sig") as f:
+        blocks = f.read().strip().split("\n\n")
+    texts = []
+    for block in blocks:
+        lines = block.strip().split("\n")
+        if len(lines) >= 3:
+            texts.append(" ".join(line.strip() for line in lines[2:]))
+    return texts
+
+
+def tile_transcription(parsed: ParsedTranscription, segments, target_seconds: float, gap_seconds: float = 2.0):
+    """把转录结果与伪分割结果首尾相接重复，直到总时长达到 target_seconds (与解析器一样使用列式词存储)。"""
+    words = parsed.words
+    if not words:
+        return parsed, list(segments)
+    period = words[-1].end_time + gap_seconds
+    repeat_count = max(1, int(target_seconds // period) + (1 if target_seconds % period else 0))
+
+    store = WordStore()
+    tiled_segments = []
+    for repeat_index in range(repeat_count):
+        offset = repeat_index * period
+        for w in words:
+            store.append(w.text, w.start_time + offset, w.end_time + offset, w.speaker_id, w.confidence)
+        tiled_segments.extend(segments)
+    tiled = ParsedTranscription(words=store.span(), full_text=None, language_code=parsed.language_code)
+    return tiled, tiled_segments
+
+
+def run_once(parsed: ParsedTranscription, segments, source_format: str, alignment_mode: str, trace_memory: bool):
+    """执行一次 process_to_srt，返回计时 / 内存结果。"""
+    processor = SrtProcessor()
+    processor.alignment_mode = alignment_mode
+    processor.set_signals_forwarder(SilentSignals())
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    srt_content, _ = processor.process_to_srt(parsed, segments, source_format=source_format)
+    end = time.perf_counter()
+    peak_bytes = 0
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    profile = processor.get_last_profile()
+    phase_times = {name: data["wall_time_s"] for name, data in profile["phases"].items()}
+
+    entry_count = srt_content.count(" --> ") if srt_content else 0
+    return {
+        "total_s": end - start,
+        "phases_s": phase_times,
+        "call_counts": profile["call_counts"],
+        "entries": entry_count,
+        "peak_mem_mb": peak_bytes / (1024 * 1024) if trace_memory else None,
+    }
+
+
+def run_benchmarks(case_names, duration_labels, alignment_mode: str, repeat: int, trace_memory: bool):
+    parser = TranscriptionParser(signals_forwarder=SilentSignals())
+    results = []
+    for case_name, json_rel, parse_format, srt_rel, source_format in BENCH_CASES:
+        if case_names and case_name not in case_names:
+            continue
+        with open(os.path.join(SAMPLES_DIR, json_rel), "r", encoding="utf-8") as f:
+            parsed = parser.parse(json.load(f), parse_format)
+        segments = load_srt_texts(os.path.join(SAMPLES_DIR, srt_rel))
+
+        for label in duration_labels:
+            tiled, tiled_segments = tile_transcription(parsed, segments, DURATION_PRESETS[label])
+            # 取多次运行中最快的一次作为计时结果，内存单独测量一次 (tracemalloc 会拖慢执行)
+            best = None
+            for _ in range(repeat):
+                current = run_once(tiled, tiled_segments, source_format, alignment_mode, trace_memory=False)
+                if best is None or current["total_s"] < best["total_s"]:
+                    best = current
+            if trace_memory:
+                best["peak_mem_mb"] = run_once(tiled, tiled_segments, source_format, alignment_mode, trace_memory=True)["peak_mem_mb"]
+
+            row = {
+                "case": case_name,
+                "duration": label,
+                "words": len(tiled.words),
+                "segments": len(tiled_segments),
+                "segments_per_s": len(tiled_segments) / best["total_s"] if best["total_s"] > 0 else 0.0,
+            }
+            row.update(best)
+            results.append(row)
+            print_row(row)
+    return results
+
+
+def print_header():
+    print(f"{'case':<18}{'dur':>5}{'words':>9}{'segs':>7}{'prep':>8}{'align':>8}{'merge':>8}{'format':>8}{'total':>8}{'segs/s':>9}{'peakMB':>9}")
+
+
+def print_row(row):
+    phases = row["phases_s"]
+    format_time = sum(t for name, t in phases.items() if name not in REPORT_PHASES)
+    peak = f"{row['peak_mem_mb']:.1f}" if row.get("peak_mem_mb") is not None else "-"
+    print(f"{row['case']:<18}{row['duration']:>5}{row['words']:>9}{row['segments']:>7}"
+          f"{phases.get('prepare', 0):>8.2f}{phases.get('align', 0):>8.2f}{phases.get('merge', 0):>8.2f}"
+          f"{format_time:>8.2f}{row['total_s']:>8.2f}{row['segments_per_s']:>9.0f}{peak:>9}")
+
+
+def compare_with_baseline(results, baseline_path: str, tolerance: float) -> int:
+    """与基线对比总耗时，超过容差的视为回退。返回回退条数。"""
+    if not os.path.exists(baseline_path):
+        print(f"\n未找到基线文件: {baseline_path}（可使用 --save-baseline 生成）")
+        return 0
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_rows = {(row["case"], row["duration"]): row for row in baseline.get("results", [])}
+
+    regressions = 0
+    print(f"\n与基线对比 (容差 {tolerance:.0%}):")
+    for row in results:
+        base_row = baseline_rows.get((row["case"], row["duration"]))
+        if not base_row:
+            continue
+        ratio = row["total_s"] / base_row["total_s"] if base_row["total_s"] > 0 else 1.0
+        status = "OK"
+        if ratio > 1.0 + tolerance and row["total_s"] - base_row["total_s"] > MIN_REGRESSION_DELTA_S:
+            status = "回退"
+            regressions += 1
+        elif ratio < 1.0 - tolerance:
+            status = "提升"
+        print(f"  {row['case']:<18}{row['duration']:>5}  基线 {base_row['total_s']:.2f}s -> 当前 {row['total_s']:.2f}s  ({ratio:.2f}x)  {status}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="SrtProcessor 性能基准测试（离线，使用 samples 中的数据）")
+    arg_parser.add_argument("--cases", default="", help="逗号分隔的用例名，默认全部: " + ",".join(c[0] for c in BENCH_CASES))
+    arg_parser.add_argument("--durations", default="1h,3h,10h", help="逗号分隔的目标时长，可选: " + ",".join(DURATION_PRESETS))
+    arg_parser.add_argument("--alignment-mode", default="sequential", choices=["sequential", "global", "parallel"], help="对齐模式")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数，取最快一次（默认: 1）")
+    arg_parser.add_argument("--no-memory", action="store_true", help="跳过峰值内存测量")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="基线文件路径")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    arg_parser.add_argument("--tolerance", type=float, default=0.25, help="判定回退的相对容差（默认: 0.25）")
+    arg_parser.add_argument("--output", help="把本次结果写入指定 JSON 文件")
+    args = arg_parser.parse_args()
+
+    case_names = [c for c in args.cases.split(",") if c]
+    duration_labels = [d for d in args.durations.split(",") if d]
+    for label in duration_labels:
+        if label not in DURATION_PRESETS:
+            arg_parser.error(f"不支持的时长: {label}")
+
+    print_header()
+    results = run_benchmarks(case_names, duration_labels, args.alignment_mode, max(1, args.repeat), not args.no_memory)
+
+    payload = {
+        "python": sys.version.split()[0],
+        "alignment_mode": args.alignment_mode,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+
+    regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
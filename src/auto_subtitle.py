@@ -20,6 +20,7 @@ import sys
 import os
 import argparse
 import json
+import multiprocessing
 
 # 确保能找到项目模块
 if os.path.dirname(__file__) not in sys.path:
@@ -207,4 +208,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序使用多进程（如并行对齐）时需要此调用
+    multiprocessing.freeze_support()
     main()
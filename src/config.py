@@ -29,6 +29,15 @@ MIN_DURATION_ABSOLUTE = DEFAULT_MIN_DURATION_ABSOLUTE
 
 ALIGNMENT_SIMILARITY_THRESHOLD = 0.5 # 对齐相似度阈值（从0.7降低到0.5以提高对齐成功率，避免过度宽松）
 
+# 对齐模式
+ALIGNMENT_MODE_SEQUENTIAL = "sequential" # 逐片段贪心对齐（默认）
+ALIGNMENT_MODE_GLOBAL = "global" # 全局单调对齐：整体对齐一次后按片段边界切分
+ALIGNMENT_MODE_PARALLEL = "parallel" # 以精确锚点切分区域后多进程并行对齐（结果与逐片段对齐一致）
+DEFAULT_ALIGNMENT_MODE = ALIGNMENT_MODE_SEQUENTIAL
+DEFAULT_ALIGNMENT_MAX_WORKERS = 0 # 并行对齐的最大进程数，0 表示使用全部CPU核心
+GLOBAL_ALIGNMENT_BAND_WIDTH = 64 # 全局对齐带宽（字符，单侧），决定每行动态规划的计算量与可容忍的偏移
+DEFAULT_SAVE_PROCESSING_PROFILE = False # 是否在SRT旁边保存性能剖析JSON (<文件名>.profile.json)
+
 # 标点集合 - 完整的句子结束符号集合
 FINAL_PUNCTUATION = {'.', '。', '?', '？', '!', '！', ';', '；'}  # 基础句末标点（添加分号）
 ELLIPSIS_PUNCTUATION = {'...', '......', '‥', '…', '···', '……'}  # 完整的省略号变体
@@ -52,6 +61,9 @@ USER_MIN_DURATION_TARGET_KEY = "user_min_duration_target"
 USER_MAX_DURATION_KEY = "user_max_duration"
 USER_MAX_CHARS_PER_LINE_KEY = "user_max_chars_per_line"
 USER_DEFAULT_GAP_MS_KEY = "user_default_gap_ms"
+USER_ALIGNMENT_MODE_KEY = "user_alignment_mode"
+USER_ALIGNMENT_MAX_WORKERS_KEY = "user_alignment_max_workers"
+USER_SAVE_PROCESSING_PROFILE_KEY = "user_save_processing_profile"
 
 # Soniox AI 校正配置键名
 USER_SONIOX_ENABLE_AI_CORRECTION_KEY = "user_soniox_enable_ai_correction"
@@ -80,6 +92,15 @@ PROFILE_TEMPERATURE_KEY = "temperature"
 PROFILE_IS_DEFAULT_KEY = "is_default"
 PROFILE_CUSTOM_HEADERS_KEY = "custom_headers"
 PROFILE_API_FORMAT_KEY = "api_format"
+PROFILE_MAX_CONCURRENT_REQUESTS_KEY = "max_concurrent_requests"
+PROFILE_STREAM_RESPONSES_KEY = "stream_responses"
+PROFILE_SUMMARY_MODE_KEY = "summary_mode"
+PROFILE_CONTEXT_TOKENS_KEY = "context_tokens"
+PROFILE_MAX_OUTPUT_TOKENS_KEY = "max_output_tokens"
+PROFILE_REQUESTS_PER_MINUTE_KEY = "requests_per_minute"
+PROFILE_POOL_MEMBER_KEY = "pool_member"
+USER_LLM_POOL_ENABLED_KEY = "user_llm_pool_enabled"
+USER_LLM_CHECKPOINT_ENABLED_KEY = "user_llm_checkpoint_enabled"
 
 # API格式枚举
 API_FORMAT_OPENAI = "openai"
@@ -214,6 +235,41 @@ DEFAULT_REMEMBERED_CUSTOM_IMAGE = ""
 
 # --- LLM 相关新增配置 ---
 DEFAULT_LLM_TEMPERATURE = 0.2 # LLM默认温度
+DEFAULT_LLM_MAX_CONCURRENT_REQUESTS = 3 # 分块分割时同一模型配置同时在途的最大请求数，1 表示逐块顺序请求
+DEFAULT_LLM_STREAM_RESPONSES = False # 是否以流式方式请求分割结果，并在片段到达时立即开始对齐
+DEFAULT_LLM_CONNECT_TIMEOUT = 10 # LLM请求建立连接的超时（秒）
+DEFAULT_LLM_READ_TIMEOUT = 180 # LLM请求等待响应的超时（秒）
+LLM_HTTP_POOL_CONNECTIONS = 4 # 每个LLM传输对象缓存的主机连接池数量
+LLM_HTTP_POOL_MAXSIZE = 8 # 每个主机连接池保持的最大keep-alive连接数
+DEFAULT_LLM_MAX_RETRIES = 2 # LLM请求遇到连接错误或429/5xx时的重试次数
+LLM_RETRY_DELAY_S = 2.0 # LLM请求重试的基础等待时间（秒），每次重试翻倍并加随机抖动
+LLM_RETRY_MAX_DELAY_S = 60.0 # 指数退避的最长等待时间（秒）
+LLM_RETRY_AFTER_MAX_S = 300.0 # 服务端 Retry-After 最多遵从的等待时间（秒）
+LLM_CHUNK_MAX_REQUEUES = 2 # 分块请求失败（超时、429/5xx重试用尽等）后重新排队的次数，用尽后按原文保留该块剩余文本
+DEFAULT_LLM_REQUESTS_PER_MINUTE = 0 # 每个模型配置每分钟最多发送的LLM请求数，0 表示不限速
+DEFAULT_LLM_CACHE_ENABLED = True # 是否把LLM响应缓存到磁盘（相同模型、提示词、温度和文本直接复用结果）
+LLM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".heal_jimaku", "cache") # LLM响应缓存目录
+LLM_CACHE_MAX_MB = 200 # LLM响应缓存的总大小上限（MB），超出后按最久未使用淘汰
+LLM_SUMMARY_MODE_FULL = "full" # 先对全文请求一次摘要，完成后再开始分块分割
+LLM_SUMMARY_MODE_MAP_REDUCE = "map_reduce" # 按段并行摘要后合并为全文摘要，完成后再开始分块分割
+LLM_SUMMARY_MODE_PIPELINED = "pipelined" # 按段并行摘要，每块只需等到所在段与前一段的摘要完成即开始分割
+DEFAULT_LLM_SUMMARY_MODE = LLM_SUMMARY_MODE_FULL # 摘要生成方式
+LLM_SUMMARY_SECTION_MAX_CHARS = 20000 # 分段摘要时每段的最大字符数（由相邻的分割块合并而成）
+LLM_SUMMARY_FULL_MAX_CHARS = 60000 # full 模式下全文超过该字符数时自动改用 map_reduce，避免单个摘要请求超出上下文长度
+DEFAULT_LLM_CONTEXT_TOKENS = 64000 # 模型上下文长度（tokens），用于规划分割块大小
+DEFAULT_LLM_OUTPUT_TOKEN_BUDGET = 4096 # 模型配置未指定最大输出tokens时，规划分块假定的输出上限（多数OpenAI兼容服务的默认值）
+LLM_CHUNK_TARGET_TOKENS = 3000 # 单个分割块的目标tokens上限
+LLM_CHUNK_MIN_TOKENS = 200 # 分割块的最小tokens，预算过小时仍保证每块有可用的长度
+LLM_SUMMARY_TOKEN_ALLOWANCE = 1024 # 规划分块时为摘要预留的tokens
+DEFAULT_LLM_POOL_ENABLED = False # 是否把分块分割与AI校正批次分散到多个模型配置（负载均衡池）；当前配置之外，标记了 pool_member 的配置加入池中
+LLM_POOL_EWMA_ALPHA = 0.3 # 负载均衡池统计各配置的延迟与错误率时，最近一次请求所占的权重
+LLM_POOL_FAILURE_THRESHOLD = 3 # 同一配置连续失败该次数后暂停向其分配请求
+LLM_POOL_COOLDOWN_S = 60.0 # 暂停分配请求的时长（秒），到期后按较低的权重重新试探
+DEFAULT_LLM_CHECKPOINT_ENABLED = True # 是否把已完成的分割块与AI校正批次写入输出目录中的检查点文件，中断后重新处理同一输入时从缺失的部分继续
+LLM_CHECKPOINT_SUFFIX = ".checkpoint.jsonl" # 检查点文件名后缀（输出文件名 + 后缀），任务成功完成后删除
+LLM_CHUNK_MAX_CONTINUATIONS = 3 # 分割输出被截断（finish_reason 为 length）时，对块内剩余文本重新请求的最大次数
+LLM_CORRECTION_MAX_TARGETS_PER_BATCH = 60 # 每个AI校对批次最多包含的目标片段数（token预算允许时），批次过大时模型容易遗漏目标
+LLM_CORRECTION_CONTEXT_TOKENS = 3000 # AI校对提示中"完整转录上下文"的tokens上限，上下文长度较小的模型按比例缩减
 
 # LLM高级设置的默认值
 DEFAULT_LLM_API_BASE_URL = "https://api.deepseek.com"
@@ -860,6 +916,17 @@ def get_all_llm_profiles(config: dict) -> list:
 
     return config.get(LLM_PROFILES_KEY, {}).get("profiles", [])
 
+def get_llm_pool_profiles(config: dict) -> list:
+    """获取负载均衡池中的LLM配置：当前配置在前，其后是标记为池成员且填写了API Key的其他配置"""
+    current_profile = get_current_llm_profile(config)
+    pool_profiles = [current_profile]
+    for profile in get_all_llm_profiles(config):
+        if profile.get("id") == current_profile.get("id"):
+            continue
+        if profile.get(PROFILE_POOL_MEMBER_KEY, False) and profile.get("api_key"):
+            pool_profiles.append(profile.copy())
+    return pool_profiles
+
 def add_llm_profile(config: dict, profile: dict) -> dict:
     """添加新的LLM配置"""
     # 确保配置已迁移
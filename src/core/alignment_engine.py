@@ -0,0 +1,824 @@
+"""
+对齐引擎模块
+
+负责将 LLM 分割出的文本片段与 ASR 词列表进行快速对齐。
+预先构建去空格后的字符流、前缀和与滚动哈希以及 字符→词 的偏移索引，
+通过 n-gram 锚点投票定位候选对角线，再在候选附近做局部边界优化，
+避免对每个 (起点, 终点) 组合都执行 difflib 比较。
+最佳相似度低于接受阈值时，再在旧版的搜索范围内做一次有界的剪枝穷举，
+与旧版逐一扫描的结果对比见 benchmarks/bench_alignment.py。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import bisect
+import difflib
+from typing import List, Tuple, Dict, Optional, Callable
+
+from .data_models import TimestampedWord, WordView, WordSpan, word_texts
+import config as app_config
+
+
+class WordTextIndex:
+    """
+    词列表的文本前缀索引
+
+    对一份词列表构建一次：
+    - 原始文本与去空格文本的拼接流及每个词的起始偏移 (前缀和)，任意词区间的文本/长度都可直接切片得到；
+    - 去空格文本的多项式滚动哈希前缀表，任意词区间的哈希 O(1) 得到，用于快速判等；
+    - 字符→词 的反向索引。
+    """
+
+    HASH_BASE = 911382323
+    HASH_MOD = (1 << 61) - 1
+
+    def __init__(self, words: List[TimestampedWord]):
+        self.words = words
+        self.word_count = len(words)
+
+        raw_texts: List[str] = []
+        clean_texts: List[str] = []
+        raw_offsets: List[int] = [0]
+        clean_offsets: List[int] = [0]
+        char_to_word: List[int] = []
+        raw_position = 0
+        clean_position = 0
+        for word_index, word_text in enumerate(word_texts(words)):
+            raw_texts.append(word_text)
+            raw_position += len(word_text)
+            raw_offsets.append(raw_position)
+
+            cleaned = word_text.replace(" ", "")
+            clean_texts.append(cleaned)
+            clean_position += len(cleaned)
+            clean_offsets.append(clean_position)
+            char_to_word.extend([word_index] * len(cleaned))
+
+        self.raw_stream = "".join(raw_texts)
+        self.raw_offsets = raw_offsets
+        self.clean_stream = "".join(clean_texts)
+        self.clean_offsets = clean_offsets
+        self.char_to_word = char_to_word
+
+        # 滚动哈希前缀表：prefix_hashes[k] 为 clean_stream[:k] 的哈希
+        base, mod = self.HASH_BASE, self.HASH_MOD
+        prefix_hashes = [0] * (len(self.clean_stream) + 1)
+        powers = [1] * (len(self.clean_stream) + 1)
+        current_hash = 0
+        current_power = 1
+        for k, char in enumerate(self.clean_stream, 1):
+            current_hash = (current_hash * base + ord(char)) % mod
+            current_power = (current_power * base) % mod
+            prefix_hashes[k] = current_hash
+            powers[k] = current_power
+        self._prefix_hashes = prefix_hashes
+        self._powers = powers
+        self._word_positions: Optional[Dict[int, int]] = None
+
+    def position_of(self, word_obj: TimestampedWord) -> Optional[int]:
+        """返回词对象在词列表中的下标 (按对象身份查找)，不属于该列表时返回 None。"""
+        if isinstance(word_obj, WordView):
+            # 列式存储的视图每次访问都是新对象，按 (存储, 下标) 定位
+            if isinstance(self.words, WordSpan) and word_obj.store is self.words.store:
+                position = word_obj.index - self.words.start
+                if 0 <= position < self.word_count:
+                    return position
+            return None
+        if self._word_positions is None:
+            self._word_positions = {id(w): i for i, w in enumerate(self.words)}
+        position = self._word_positions.get(id(word_obj))
+        if position is not None and self.words[position] is word_obj:
+            return position
+        return None
+
+    def joined_text(self, words: List[TimestampedWord]) -> str:
+        """
+        返回词列表拼接后的原始文本。
+
+        若 words 是索引词列表中的一段连续切片，则直接从前缀表切片得到；否则退回逐词拼接。
+        """
+        if not words:
+            return ""
+        if isinstance(words, WordSpan) and isinstance(self.words, WordSpan) and words.store is self.words.store:
+            start = words.start - self.words.start
+            end = words.end - self.words.start
+            if 0 <= start and end <= self.word_count:
+                return self.raw_span_text(start, end)
+        start = self.position_of(words[0])
+        if start is not None:
+            end = start + len(words)
+            if end <= self.word_count and (self.words[end - 1] is words[-1] or self.words[end - 1] == words[-1]):
+                return self.raw_span_text(start, end)
+        return "".join([w.text for w in words])
+
+    def raw_span_text(self, start_word: int, end_word: int) -> str:
+        """返回词区间 [start_word, end_word) 的原始拼接文本，等价于 "".join(w.text for w in words[start:end])。"""
+        return self.raw_stream[self.raw_offsets[start_word]:self.raw_offsets[end_word]]
+
+    def clean_span_text(self, start_word: int, end_word: int) -> str:
+        """返回词区间 [start_word, end_word) 的去空格拼接文本。"""
+        return self.clean_stream[self.clean_offsets[start_word]:self.clean_offsets[end_word]]
+
+    def clean_span_length(self, start_word: int, end_word: int) -> int:
+        """返回词区间 [start_word, end_word) 的去空格文本长度 (O(1))。"""
+        return self.clean_offsets[end_word] - self.clean_offsets[start_word]
+
+    def clean_span_hash(self, start_word: int, end_word: int) -> int:
+        """返回词区间 [start_word, end_word) 去空格文本的滚动哈希 (O(1))。"""
+        char_start = self.clean_offsets[start_word]
+        char_end = self.clean_offsets[end_word]
+        return (self._prefix_hashes[char_end] - self._prefix_hashes[char_start] * self._powers[char_end - char_start]) % self.HASH_MOD
+
+    def text_hash(self, text: str) -> int:
+        """按与前缀表相同的方式计算任意文本的哈希，用于和 clean_span_hash 比较。"""
+        base, mod = self.HASH_BASE, self.HASH_MOD
+        current_hash = 0
+        for char in text:
+            current_hash = (current_hash * base + ord(char)) % mod
+        return current_hash
+
+
+class WordTimeIndex:
+    """
+    词列表的时间索引
+
+    按开始时间排序的并行数组 (starts / ends / order)，配合 bisect 实现 O(log n + k) 的时间范围查询。
+    order 保存词在原列表中的下标，只有命中的词才会被取出 (列式存储时不必为每个词创建视图)。
+    同时记录最长的词时长，查询"中点落在范围内"的词时只需把左边界放宽半个最长时长。
+    """
+
+    def __init__(self, words: List[TimestampedWord]):
+        self.words = words
+        if isinstance(words, WordSpan):
+            all_starts, all_ends = words.start_times(), words.end_times()
+        else:
+            all_starts = [w.start_time for w in words]
+            all_ends = [w.end_time for w in words]
+        valid = [i for i in range(len(all_starts)) if all_starts[i] is not None and all_ends[i] is not None]
+        self.order: List[int] = sorted(valid, key=all_starts.__getitem__)
+        self.starts: List[float] = [all_starts[i] for i in self.order]
+        self.ends: List[float] = [all_ends[i] for i in self.order]
+        self.max_duration: float = max((end - start for start, end in zip(self.starts, self.ends)), default=0.0)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def words_in_range(self, start_time: float, end_time: float, tolerance: float = 0.0) -> List[TimestampedWord]:
+        """
+        返回中点落在 [start_time - tolerance, end_time + tolerance] 内的词 (按开始时间排序)。
+
+        以中点判定可以容忍字幕起止时间被优化阶段前移/延长后与词边界的细微偏差。
+        """
+        range_start = start_time - tolerance
+        range_end = end_time + tolerance
+        if range_start > range_end or not self.order:
+            return []
+        lo = bisect.bisect_left(self.starts, range_start - self.max_duration / 2.0)
+        hi = bisect.bisect_right(self.starts, range_end)
+        result = []
+        for k in range(lo, hi):
+            word_mid = (self.starts[k] + self.ends[k]) / 2.0
+            if range_start <= word_mid <= range_end:
+                result.append(self.words[self.order[k]])
+        return result
+
+    def has_word_in_range(self, start_time: float, end_time: float, tolerance: float = 0.0) -> bool:
+        """判断是否有任何词的中点落在给定时间范围内。"""
+        return bool(self.words_in_range(start_time, end_time, tolerance))
+
+
+class AlignmentEngine:
+    """
+    基于字符流索引的片段对齐引擎
+
+    对一份词列表只需构建一次，之后每个片段的对齐代价与搜索窗口的字符长度近似线性。
+    """
+
+    MAX_SEED_DIAGONALS = 4  # 每个片段最多评估的候选对角线数量
+    MAX_REFINE_STEPS = 64   # 局部边界优化的最大迭代次数
+    MAX_EXHAUSTIVE_SCORES = 256  # 低于接受阈值时的穷举回退中最多计算的 difflib 相似度次数
+    MAX_SEEDS_PER_SEGMENT = 96  # 单个片段参与投票的 n-gram 数量上限 (长片段按步长采样)
+    DIAGONAL_MERGE_RADIUS = 2   # 合并票数时相邻对角线的半径 (字符)
+    MIN_GLOBAL_ANCHOR_CHARS = 8  # 全局对齐中可作为锚点的片段最小长度 (字符)
+    MAX_GLOBAL_REGION_CELLS = 8_000_000  # 全局对齐单个区域允许的最大动态规划单元数
+    CANCEL_POLL_INTERVAL_S = 0.2  # 并行对齐等待区域结果时检查取消请求的间隔 (秒)
+
+    def __init__(self, words: List[TimestampedWord], text_index: Optional["WordTextIndex"] = None):
+        self.words = words
+        self.word_count = len(words)
+
+        # 字符流、前缀和与滚动哈希由 WordTextIndex 统一维护，可与 SrtProcessor 共享同一份索引
+        if text_index is None or text_index.words is not words or text_index.word_count != len(words):
+            text_index = WordTextIndex(words)
+        self.text_index = text_index
+        self.word_char_offsets = text_index.clean_offsets
+        self.char_to_word = text_index.char_to_word
+        self.char_stream = text_index.clean_stream
+
+    def span_text(self, start_word: int, end_word: int) -> str:
+        """返回词区间 [start_word, end_word) 对应的去空格文本。"""
+        return self.text_index.clean_span_text(start_word, end_word)
+
+    def span_length(self, start_word: int, end_word: int) -> int:
+        """返回词区间 [start_word, end_word) 对应的去空格文本长度。"""
+        return self.text_index.clean_span_length(start_word, end_word)
+
+    @staticmethod
+    def search_window_size(text_segment: str, segment_clean: str) -> int:
+        """片段起点的搜索窗口大小 (词数)：与片段长度成正比，并按估计词数额外放宽。"""
+        base_len_factor = 3
+        min_additional_words = 20
+        max_additional_words = 60
+        estimated_words_in_segment = len(text_segment.split())
+        return len(segment_clean) * base_len_factor + min(max(estimated_words_in_segment * 2, min_additional_words), max_additional_words)
+
+    def align_segment(self, text_segment: str, start_word: int) -> Tuple[int, int, float]:
+        """
+        从 start_word 开始对齐单个 LLM 片段 (自动去空格并计算搜索窗口)。
+
+        Returns:
+            (区间起点, 区间终点(不含), 相似度)；片段为空或未找到时返回 (start_word, start_word, 0.0)
+        """
+        segment_clean = text_segment.strip().replace(" ", "")
+        if not segment_clean:
+            return start_word, start_word, 0.0
+        max_start_word = min(start_word + self.search_window_size(text_segment, segment_clean), self.word_count)
+        return self.align(segment_clean, start_word, max_start_word)
+
+    def align_sequence(self, segments: List[str], start_word: int, accept_ratio: float) -> Tuple[List[Tuple[int, int, float]], int]:
+        """
+        按顺序逐片段对齐 (与 SrtProcessor 阶段1的推进规则一致)：
+        片段被接受 (区间非空且相似度不低于 accept_ratio) 时，下一片段从该区间终点开始搜索。
+
+        Returns:
+            (每个片段的原始对齐结果列表, 最后的搜索起点)
+        """
+        results: List[Tuple[int, int, float]] = []
+        search_start = start_word
+        for text_segment in segments:
+            span_start, span_end, ratio = self.align_segment(text_segment, search_start)
+            results.append((span_start, span_end, ratio))
+            if span_end > span_start and ratio >= accept_ratio:
+                search_start = span_end
+        return results, search_start
+
+    def align_sequence_parallel(self, segments: List[str], accept_ratio: float, max_workers: int,
+                                min_segments_per_region: int = 50,
+                                is_running: Optional[Callable[[], bool]] = None) -> Optional[List[Tuple[int, int, float]]]:
+        """
+        多进程并行版 align_sequence(segments, 0, accept_ratio)，结果与顺序执行逐字节一致。
+
+        1. 以在字符流中唯一精确出现的片段为锚点，把片段列表切分成若干区域；
+        2. 每个区域假定从其锚点处开始搜索，在 ProcessPoolExecutor 中独立对齐；
+        3. 主进程按顺序校验：用前一区域真实的搜索终点重新对齐锚点片段，
+           只要锚点的接受结果与区间终点一致，区域内后续结果必然与顺序执行相同；否则就地顺序重算该区域。
+
+        Returns:
+            每个片段的原始对齐结果列表；被取消时返回 None
+        """
+        region_starts = self._plan_parallel_regions(segments, max_workers, min_segments_per_region)
+        if len(region_starts) <= 1 or max_workers <= 1:
+            return self.align_sequence(segments, 0, accept_ratio)[0]
+
+        region_bounds = list(zip(region_starts, region_starts[1:] + [len(segments)]))
+        # 每个区域的假定起点：首区域从 0 开始，其余区域从锚点精确命中的首个词开始
+        guessed_starts = [0]
+        for region_start, _ in region_bounds[1:]:
+            guessed_starts.append(self._anchor_first_word(segments[region_start]))
+
+        from concurrent.futures import ProcessPoolExecutor, wait
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_region_worker,
+                                       initargs=(word_texts(self.words),))
+        cancelled = False
+        try:
+            futures = [executor.submit(_align_region_in_worker, segments[region_start:region_end], guessed_start, accept_ratio)
+                       for (region_start, region_end), guessed_start in zip(region_bounds, guessed_starts)]
+
+            results: List[Tuple[int, int, float]] = []
+            search_start = 0
+            for (region_start, region_end), guessed_start, future in zip(region_bounds, guessed_starts, futures):
+                # 等待区域结果时定时检查取消请求，不必等到整个区域对齐完成才响应
+                while True:
+                    if is_running is not None and not is_running():
+                        cancelled = True
+                        return None
+                    if wait([future], timeout=self.CANCEL_POLL_INTERVAL_S).done:
+                        break
+                region_results, region_next_start = future.result()
+                if search_start != guessed_start:
+                    # 校验锚点：用真实起点重新对齐，只要推进结果一致，区域内其余结果不受影响
+                    anchor_result = self.align_segment(segments[region_start], search_start)
+                    if self._advance_of(anchor_result, search_start, accept_ratio) == self._advance_of(region_results[0], guessed_start, accept_ratio):
+                        region_results = [anchor_result] + region_results[1:]
+                        if len(region_results) == 1:
+                            region_next_start = self._advance_of(anchor_result, search_start, accept_ratio)
+                    else:
+                        region_results, region_next_start = self.align_sequence(segments[region_start:region_end], search_start, accept_ratio)
+                results.extend(region_results)
+                search_start = region_next_start
+            return results
+        finally:
+            # 取消时丢弃尚未开始的区域，也不等待正在运行的区域结束 (其结果不再需要)
+            executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+    @staticmethod
+    def _advance_of(result: Tuple[int, int, float], search_start: int, accept_ratio: float) -> int:
+        """对齐结果被接受时返回新的搜索起点，否则返回原起点。"""
+        span_start, span_end, ratio = result
+        if span_end > span_start and ratio >= accept_ratio:
+            return span_end
+        return search_start
+
+    def _anchor_first_word(self, text_segment: str) -> int:
+        """返回锚点片段在字符流中精确命中位置所在的词下标。"""
+        segment_clean = text_segment.strip().replace(" ", "")
+        return self.char_to_word[self.char_stream.find(segment_clean)]
+
+    def _plan_parallel_regions(self, segments: List[str], max_workers: int, min_segments_per_region: int) -> List[int]:
+        """
+        选取作为区域起点的锚点片段下标 (总是包含 0)。
+
+        锚点要求：片段足够长、在字符流中唯一精确出现且首尾落在词边界上，并且位置单调递增。
+        区域数量控制在 max_workers 的若干倍以内，且每个区域至少包含 min_segments_per_region 个片段。
+        """
+        cleaned = [seg.strip().replace(" ", "") for seg in segments]
+        anchor_segments: List[int] = []
+        last_end = -1
+        for segment_index, segment_clean in enumerate(cleaned):
+            if len(segment_clean) < self.MIN_GLOBAL_ANCHOR_CHARS:
+                continue
+            char_pos = self.char_stream.find(segment_clean)
+            if char_pos == -1 or self.char_stream.find(segment_clean, char_pos + 1) != -1:
+                continue
+            if char_pos <= last_end:
+                continue  # 只保留位置单调递增的锚点 (贪心)
+            first_word = self.char_to_word[char_pos]
+            last_word = self.char_to_word[char_pos + len(segment_clean) - 1]
+            if self.word_char_offsets[first_word] != char_pos or self.word_char_offsets[last_word + 1] != char_pos + len(segment_clean):
+                continue
+            anchor_segments.append(segment_index)
+            last_end = char_pos + len(segment_clean) - 1
+
+        target_regions = max(1, max_workers * 4)
+        region_size = max(min_segments_per_region, len(segments) // target_regions)
+        region_starts = [0]
+        for segment_index in anchor_segments:
+            if segment_index - region_starts[-1] >= region_size and len(segments) - segment_index >= min_segments_per_region:
+                region_starts.append(segment_index)
+        return region_starts
+
+    def align(self, segment_clean: str, start_word: int, max_start_word: int) -> Tuple[int, int, float]:
+        """
+        在 [start_word, max_start_word) 范围内寻找与片段最相似的词区间。
+
+        Args:
+            segment_clean: 已去除空格的 LLM 片段文本
+            start_word: 搜索起始词索引
+            max_start_word: 匹配区间起点允许的最大词索引 (不含)
+
+        Returns:
+            (区间起点, 区间终点(不含), 相似度)；未找到任何候选时返回 (start_word, start_word, 0.0)
+        """
+        segment_len = len(segment_clean)
+        max_start_word = min(max_start_word, self.word_count)
+        if segment_len == 0 or start_word >= max_start_word:
+            return start_word, start_word, 0.0
+
+        # 候选区间终点最多延伸到 起点上限 + 片段长度 + 30 个词，与原有扫描范围一致
+        max_end_word = min(max_start_word + segment_len + 30, self.word_count)
+        window_char_start = self.word_char_offsets[start_word]
+        window_char_end = self.word_char_offsets[max_end_word]
+        start_char_limit = self.word_char_offsets[max_start_word]
+        if window_char_end <= window_char_start:
+            return start_word, start_word, 0.0
+
+        # 1. 精确命中：片段在字符流中原样出现
+        exact_pos = self.char_stream.find(segment_clean, window_char_start, window_char_end)
+        if exact_pos != -1 and exact_pos < start_char_limit:
+            first_word = self.char_to_word[exact_pos]
+            last_word = self.char_to_word[exact_pos + segment_len - 1]
+            # 词边界恰好与片段边界重合时长度相同，再用滚动哈希确认，无需切片比较
+            if (self.span_length(first_word, last_word + 1) == segment_len and
+                    self.text_index.clean_span_hash(first_word, last_word + 1) == self.text_index.text_hash(segment_clean)):
+                return self._extend_over_leading_blanks(first_word, start_word), last_word + 1, 1.0
+            candidate_diagonals = [exact_pos]
+        else:
+            candidate_diagonals = self._seed_diagonals(segment_clean, window_char_start, window_char_end, start_char_limit)
+
+        if not candidate_diagonals:
+            return start_word, start_word, 0.0
+
+        matcher = difflib.SequenceMatcher(None, autojunk=False)
+        matcher.set_seq1(segment_clean)
+        score_cache: Dict[Tuple[int, int], Tuple[float, int, int, int]] = {}
+
+        def score(span_start: int, span_end: int) -> Tuple[float, int, int, int]:
+            key = (span_start, span_end)
+            cached = score_cache.get(key)
+            if cached is not None:
+                return cached
+            built_text = self.span_text(span_start, span_end)
+            if built_text:
+                matcher.set_seq2(built_text)
+                ratio = matcher.ratio()
+            else:
+                ratio = 0.0
+            # 比较顺序：相似度高者优先，其次长度差小者优先，再次起点靠前者优先，最后终点靠前者优先 (不带上末尾的空白词，与旧版一致)
+            result = (ratio, -abs(len(built_text) - segment_len), -span_start, -span_end)
+            score_cache[key] = result
+            return result
+
+        def valid(span_start: int, span_end: int) -> bool:
+            return start_word <= span_start < max_start_word and span_start < span_end <= max_end_word
+
+        best_span = None
+        best_score = None
+        for diagonal in candidate_diagonals:
+            diag_start_char = min(max(diagonal, window_char_start), window_char_end - 1)
+            diag_end_char = min(max(diagonal + segment_len - 1, window_char_start), window_char_end - 1)
+            anchor_start = self.char_to_word[diag_start_char]
+            anchor_end = self.char_to_word[diag_end_char] + 1
+
+            # 在锚点附近 ±1 词内取初始区间
+            local_best_span = None
+            local_best_score = None
+            for span_start in (anchor_start - 1, anchor_start, anchor_start + 1):
+                for span_end in (anchor_end - 1, anchor_end, anchor_end + 1):
+                    if not valid(span_start, span_end):
+                        continue
+                    current = score(span_start, span_end)
+                    if local_best_score is None or current > local_best_score:
+                        local_best_score = current
+                        local_best_span = (span_start, span_end)
+            if local_best_span is None:
+                continue
+
+            # 局部爬山：逐词移动起点/终点，直到无法继续提升
+            for _ in range(self.MAX_REFINE_STEPS):
+                improved = False
+                span_start, span_end = local_best_span
+                for next_span in ((span_start - 1, span_end), (span_start + 1, span_end),
+                                  (span_start, span_end - 1), (span_start, span_end + 1)):
+                    if not valid(*next_span):
+                        continue
+                    current = score(*next_span)
+                    if current > local_best_score:
+                        local_best_score = current
+                        local_best_span = next_span
+                        improved = True
+                if not improved:
+                    break
+
+            if best_score is None or local_best_score > best_score:
+                best_score = local_best_score
+                best_span = local_best_span
+
+        if best_span is None:
+            return start_word, start_word, 0.0
+
+        # 候选对角线只覆盖投票最多的位置，爬山也可能停在局部最优；最佳相似度低于接受阈值时，
+        # 在与旧版相同的 (起点, 终点) 搜索范围内从最佳区间附近向外做有界穷举
+        if best_score[0] < app_config.ALIGNMENT_SIMILARITY_THRESHOLD:
+            best_span, best_score = self._exhaustive_refine(segment_clean, start_word, max_start_word, max_end_word,
+                                                            best_span, best_score, score)
+
+        if best_score[0] <= 0.01:
+            return start_word, start_word, 0.0
+        return self._extend_over_leading_blanks(best_span[0], start_word), best_span[1], best_score[0]
+
+    def align_global(self, segments_clean: List[str], band_width: int = 64,
+                     is_running: Optional[Callable[[], bool]] = None) -> Optional[List[Tuple[int, int, float]]]:
+        """
+        全局单调对齐：把所有片段拼接后与整个字符流一次性对齐，再按片段边界切分。
+
+        1. 先把在字符流中唯一精确出现的较长片段作为锚点，并取其位置的最长递增子序列保证单调；
+        2. 锚点之间的区域各自使用带状 Needleman-Wunsch (编辑距离) 对齐，带的中心沿区域对角线，
+           带宽随区域两侧长度差自动放宽，因此 LLM 漏掉整段文本时也不会偏离；
+        3. 没有任何锚点时，带的中心跟随上一行的最优列移动。
+
+        回溯信息每行只保存一个 bytearray，时间与内存都与片段总长度近似线性。
+        字符流开头和结尾 (以及每个区域两端) 多出的内容不计代价。
+
+        Args:
+            segments_clean: 已去除空格的片段文本列表 (按顺序)
+            band_width: 单侧基础带宽 (字符)
+            is_running: 可选的取消检查回调，返回 False 时中止并返回 None
+
+        Returns:
+            与 segments_clean 一一对应的 (区间起点, 区间终点(不含), 相似度) 列表；
+            无法对齐的片段为 (0, 0, 0.0)。被取消时返回 None。
+        """
+        query = "".join(segments_clean)
+        target_len = len(self.char_stream)
+        results: List[Tuple[int, int, float]] = [(0, 0, 0.0)] * len(segments_clean)
+        if not query or target_len == 0:
+            return results
+        band_width = max(1, band_width)
+
+        # aligned_target[k]: 片段拼接文本第 k 个字符匹配到的字符流位置，未匹配为 -1
+        aligned_target = [-1] * len(query)
+        anchors = self._find_global_anchors(segments_clean)
+
+        if not anchors:
+            if not self._banded_align_region(query, 0, 0, target_len, None, band_width, aligned_target, is_running):
+                return None
+        else:
+            # 锚点本身逐字符对应
+            for query_start, target_start, length in anchors:
+                for k in range(length):
+                    aligned_target[query_start + k] = target_start + k
+
+            # 锚点之间 (以及首尾) 的区域分别对齐
+            regions = []
+            prev_query_end, prev_target_end = 0, 0
+            for query_start, target_start, length in anchors:
+                regions.append((prev_query_end, query_start, prev_target_end, target_start, "right" if prev_query_end == 0 else "both"))
+                prev_query_end, prev_target_end = query_start + length, target_start + length
+            regions.append((prev_query_end, len(query), prev_target_end, target_len, "left"))
+
+            for query_start, query_end, target_start, target_end, pin in regions:
+                if query_end <= query_start or target_end <= target_start:
+                    continue
+                region_query = query[query_start:query_end]
+                region_query_len = query_end - query_start
+                region_target_len = target_end - target_start
+                if pin == "right":
+                    # 首个区域：右端贴住第一个锚点，字符流开头多出的内容 (如片头) 直接跳过
+                    line = (target_end - region_query_len, 1.0)
+                    half_width = band_width
+                elif pin == "left":
+                    # 末尾区域：左端贴住最后一个锚点
+                    line = (target_start, 1.0)
+                    half_width = band_width
+                else:
+                    line = (target_start, region_target_len / region_query_len)
+                    half_width = band_width + abs(region_target_len - region_query_len)
+                if region_query_len * (2 * half_width + 1) > self.MAX_GLOBAL_REGION_CELLS:
+                    line = None  # 区域过大时退回跟随式带宽，避免内存失控
+                    half_width = band_width
+                if not self._banded_align_region(region_query, query_start, target_start, target_end,
+                                                 line, half_width, aligned_target, is_running):
+                    return None
+
+        # 按片段边界切分并计算相似度
+        matcher = difflib.SequenceMatcher(None, autojunk=False)
+        query_pos = 0
+        for segment_index, segment_clean in enumerate(segments_clean):
+            segment_end = query_pos + len(segment_clean)
+            matched_chars = [pos for pos in aligned_target[query_pos:segment_end] if pos != -1]
+            query_pos = segment_end
+            if not matched_chars:
+                continue
+            span_start = self.char_to_word[matched_chars[0]]
+            span_end = self.char_to_word[matched_chars[-1]] + 1
+            matcher.set_seqs(segment_clean, self.span_text(span_start, span_end))
+            results[segment_index] = (span_start, span_end, matcher.ratio())
+        return results
+
+    def _find_global_anchors(self, segments_clean: List[str]) -> List[Tuple[int, int, int]]:
+        """
+        找出在字符流中唯一精确出现的片段作为锚点，返回 (拼接文本中的起点, 字符流起点, 长度) 列表。
+        只保留字符流位置单调递增的最长子序列，避免重复台词造成交叉。
+        """
+        candidates: List[Tuple[int, int, int]] = []
+        query_pos = 0
+        for segment_clean in segments_clean:
+            length = len(segment_clean)
+            if length >= self.MIN_GLOBAL_ANCHOR_CHARS:
+                target_pos = self.char_stream.find(segment_clean)
+                if target_pos != -1 and self.char_stream.find(segment_clean, target_pos + 1) == -1:
+                    candidates.append((query_pos, target_pos, length))
+            query_pos += length
+
+        # 最长递增子序列 (按字符流位置，且锚点之间互不重叠)
+        tails: List[int] = []  # tails[k]: 长度为 k+1 的递增子序列中末尾锚点的下标
+        tail_positions: List[int] = []
+        parents: List[int] = [-1] * len(candidates)
+        for index, (_, target_pos, _) in enumerate(candidates):
+            k = bisect.bisect_left(tail_positions, target_pos)
+            while k > 0:
+                prev_query, prev_target, prev_len = candidates[tails[k - 1]]
+                if prev_target + prev_len <= target_pos:
+                    break
+                k -= 1
+            if k > 0:
+                parents[index] = tails[k - 1]
+            if k == len(tails):
+                tails.append(index)
+                tail_positions.append(target_pos)
+            elif target_pos < tail_positions[k]:
+                tails[k] = index
+                tail_positions[k] = target_pos
+
+        anchors: List[Tuple[int, int, int]] = []
+        index = tails[-1] if tails else -1
+        while index != -1:
+            anchors.append(candidates[index])
+            index = parents[index]
+        anchors.reverse()
+        return anchors
+
+    def _banded_align_region(self, query: str, query_offset: int, target_start: int, target_end: int,
+                             line: Optional[Tuple[float, float]], half_width: int,
+                             aligned_target: List[int], is_running: Optional[Callable[[], bool]]) -> bool:
+        """
+        带状 Needleman-Wunsch：把 query 与 字符流[target_start:target_end) 对齐，结果写入 aligned_target。
+
+        line 为 (起点, 斜率) 时，第 i 行的带中心为 起点 + 斜率*i；为 None 时跟随上一行的最优列。
+        返回 False 表示被取消。
+        """
+        target = self.char_stream
+        query_len = len(query)
+        big = query_len + (target_end - target_start) + 1
+
+        def band_for_row(row: int, prev_best: int) -> Tuple[int, int]:
+            if line is None:
+                center = prev_best + 1
+            else:
+                center = int(line[0] + line[1] * row)
+            low = min(max(target_start, center - half_width), target_end)
+            high = max(min(target_end, center + half_width), target_start)
+            return low, high
+
+        # 回溯方向：0=对角 (匹配/替换)，1=上 (片段字符未匹配)，2=左 (跳过字符流字符)
+        row_lows: List[int] = [0] * (query_len + 1)
+        trace_rows: List[bytearray] = [bytearray()] * (query_len + 1)
+
+        # 第 0 行：区域开头的任意前缀都可以免费跳过
+        prev_low, prev_high = band_for_row(0, target_start - 1)
+        prev_costs = [0] * (prev_high - prev_low + 1)
+        prev_best_col = prev_low
+
+        for i in range(1, query_len + 1):
+            if is_running is not None and i % 2048 == 0 and not is_running():
+                return False
+            query_char = query[i - 1]
+            low, high = band_for_row(i, prev_best_col)
+            costs = [big] * (high - low + 1)
+            trace = bytearray(high - low + 1)
+            best_cost = big
+            best_col = low
+
+            for j in range(low, high + 1):
+                # 上：片段字符未匹配
+                cost = big
+                direction = 1
+                if prev_low <= j <= prev_high:
+                    cost = prev_costs[j - prev_low] + 1
+                # 对角：匹配或替换
+                if j > target_start and prev_low <= j - 1 <= prev_high:
+                    diag_cost = prev_costs[j - 1 - prev_low] + (0 if target[j - 1] == query_char else 1)
+                    if diag_cost <= cost:
+                        cost = diag_cost
+                        direction = 0
+                # 左：跳过字符流中的字符
+                if j > low:
+                    left_cost = costs[j - 1 - low] + 1
+                    if left_cost < cost:
+                        cost = left_cost
+                        direction = 2
+                costs[j - low] = cost
+                trace[j - low] = direction
+                if cost < best_cost:
+                    best_cost = cost
+                    best_col = j
+
+            row_lows[i] = low
+            trace_rows[i] = trace
+            prev_low, prev_high, prev_costs, prev_best_col = low, high, costs, best_col
+
+        # 回溯：最后一行任意位置结束 (区域末尾多出的内容不计代价)
+        i = query_len
+        j = prev_best_col
+        while i > 0:
+            offset = j - row_lows[i]
+            if offset < 0 or offset >= len(trace_rows[i]):
+                # 超出带宽，剩余片段字符视为未匹配
+                break
+            direction = trace_rows[i][offset]
+            if direction == 0:
+                if target[j - 1] == query[i - 1]:
+                    aligned_target[query_offset + i - 1] = j - 1
+                i -= 1
+                j -= 1
+            elif direction == 1:
+                i -= 1
+            else:
+                j -= 1
+        return True
+
+    def _exhaustive_refine(self, segment_clean: str, start_word: int, max_start_word: int, max_end_word: int,
+                           best_span: Tuple[int, int], best_score: Tuple[float, int, int, int],
+                           score: Callable[[int, int], Tuple[float, int, int, int]]) -> Tuple[Tuple[int, int], Tuple[float, int, int, int]]:
+        """
+        在旧版的候选区间 (起点 ∈ [start_word, max_start_word)，终点不超过 起点 + 片段长度 + 30 个词) 中寻找更优区间。
+
+        起点按与当前最佳区间起点的距离由近到远遍历，只有相似度上界不低于当前最佳值的区间才计算 difflib 相似度：
+        字符多重集合交集的上界 (同 SequenceMatcher.quick_ratio) 随终点延伸增量维护，
+        长度上界 (同 real_quick_ratio) 在区间文本超过片段长度后单调下降，低于最佳值时提前结束该起点。
+        计算次数达到 MAX_EXHAUSTIVE_SCORES 时停止：片段在字符流中没有真正的对应文本 (如字母文字里的无关片段) 时上界剪枝几乎无效，
+        不设上限会退化为旧版的二次扫描。
+        """
+        segment_len = len(segment_clean)
+        segment_counts: Dict[str, int] = {}
+        for char in segment_clean:
+            segment_counts[char] = segment_counts.get(char, 0) + 1
+
+        center = best_span[0]
+        scored = 0
+        for span_start in sorted(range(start_word, max_start_word), key=lambda start: (abs(start - center), start)):
+            span_counts: Dict[str, int] = {}
+            matches = 0
+            span_len = 0
+            for span_end in range(span_start + 1, min(span_start + segment_len + 30, max_end_word) + 1):
+                for char in self.span_text(span_end - 1, span_end):
+                    count = span_counts.get(char, 0)
+                    if count < segment_counts.get(char, 0):
+                        matches += 1
+                    span_counts[char] = count + 1
+                span_len += self.span_length(span_end - 1, span_end)
+                if span_len == 0:
+                    continue
+                if span_len > segment_len and 2.0 * segment_len / (segment_len + span_len) < best_score[0]:
+                    break
+                if 2.0 * matches / (segment_len + span_len) < best_score[0]:
+                    continue
+                if scored >= self.MAX_EXHAUSTIVE_SCORES:
+                    return best_span, best_score
+                scored += 1
+                current = score(span_start, span_end)
+                if current > best_score:
+                    best_score = current
+                    best_span = (span_start, span_end)
+        return best_span, best_score
+
+    def _extend_over_leading_blanks(self, span_start: int, start_word: int) -> int:
+        """相似度相同时优先靠前的起点：把区间起点向前扩展到紧邻的空白词 (如空格词元) 上。"""
+        while span_start > start_word and self.word_char_offsets[span_start - 1] == self.word_char_offsets[span_start]:
+            span_start -= 1
+        return span_start
+
+    def _seed_diagonals(self, segment_clean: str, window_char_start: int, window_char_end: int, start_char_limit: int) -> List[int]:
+        """
+        通过 n-gram 锚点投票找出片段在字符流中最可能的起始位置 (对角线)。
+
+        片段中第 k 个 n-gram 出现在字符流位置 p 时，为对角线 p-k 投一票；
+        紧邻对角线 (插入/删除造成的偏移) 的票数会被合并统计。
+        """
+        segment_len = len(segment_clean)
+        for gram_size in self._gram_sizes(segment_len):
+            gram_count = segment_len - gram_size + 1
+            step = max(1, gram_count // self.MAX_SEEDS_PER_SEGMENT)
+            votes: Dict[int, int] = {}
+            for offset in range(0, gram_count, step):
+                gram = segment_clean[offset:offset + gram_size]
+                pos = self.char_stream.find(gram, window_char_start, window_char_end)
+                while pos != -1:
+                    diagonal = pos - offset
+                    if diagonal < start_char_limit:
+                        votes[diagonal] = votes.get(diagonal, 0) + 1
+                    pos = self.char_stream.find(gram, pos + 1, window_char_end)
+            if not votes:
+                continue
+
+            # 少量插入/删除只会让对角线偏移一两个字符，因此只合并紧邻的对角线票数
+            smoothed = {}
+            for diagonal in votes:
+                smoothed[diagonal] = sum(votes.get(d, 0) for d in range(diagonal - self.DIAGONAL_MERGE_RADIUS, diagonal + self.DIAGONAL_MERGE_RADIUS + 1))
+
+            # 已选对角线附近的候选会落到同一局部最优，直接跳过
+            suppress_radius = max(2, segment_len // 4)
+            picked: List[int] = []
+            for diagonal in sorted(smoothed, key=lambda d: (-smoothed[d], d)):
+                if any(abs(diagonal - chosen) <= suppress_radius for chosen in picked):
+                    continue
+                picked.append(diagonal)
+                if len(picked) >= self.MAX_SEED_DIAGONALS:
+                    break
+            return picked
+        return []
+
+    @staticmethod
+    def _gram_sizes(segment_len: int) -> List[int]:
+        """根据片段长度确定 n-gram 尺寸的尝试顺序 (由长到短，最后退回单字)。"""
+        if segment_len >= 9:
+            return [3, 2, 1]
+        if segment_len >= 4:
+            return [2, 1]
+        return [1]
+
+
+# --- 多进程区域对齐 (供 align_sequence_parallel 使用) ---
+_region_worker_engine: Optional[AlignmentEngine] = None
+
+
+def _init_region_worker(word_texts: List[str]) -> None:
+    """子进程初始化：只传入词文本，在子进程内重建一次对齐引擎。"""
+    global _region_worker_engine
+    _region_worker_engine = AlignmentEngine([TimestampedWord(text, 0.0, 0.0) for text in word_texts])
+
+
+def _align_region_in_worker(segments: List[str], start_word: int, accept_ratio: float) -> Tuple[List[Tuple[int, int, float]], int]:
+    """子进程任务：顺序对齐一个区域内的片段。"""
+    return _region_worker_engine.align_sequence(segments, start_word, accept_ratio)
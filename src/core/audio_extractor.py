@@ -9,6 +9,8 @@ import os
 import tempfile
 import json
 import math
+from collections import deque
+from fractions import Fraction
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Any
 
@@ -23,6 +25,11 @@ OGG_SAMPLE_RATE = 16000  # 16kHz 足够语音识别
 OGG_CHANNELS = 1  # 单声道
 OGG_QUALITY = 4  # VBR 质量 0-10，4 约等于 128kbps，适合语音
 
+# 长音频分割点的静音检测参数
+SPLIT_SEARCH_WINDOW = 120.0  # 在目标分割点之前多少秒内查找静音
+SPLIT_SILENCE_THRESH_DB = -40.0  # 静音阈值（分贝）
+SPLIT_MIN_SILENCE_DURATION = 0.5  # 最小静音持续时间（秒）
+
 
 def is_video_file(file_path: str) -> bool:
     """
@@ -424,58 +431,223 @@ def split_audio_by_duration(
     if output_dir is None:
         output_dir = tempfile.gettempdir()
     
-    # 计算分割点
-    split_points = [0.0]
-    current_pos = 0.0
-    
-    while current_pos + max_duration < total_duration:
-        target_split = current_pos + max_duration
-        # 使用静音检测查找最佳分割点
-        actual_split = find_silence_near_target(
-            input_path, 
-            target_seconds=target_split,
-            search_window=120.0,
-            silence_thresh_db=-40.0,
-            min_silence_duration=0.5
-        )
-        split_points.append(actual_split)
-        current_pos = actual_split
+    base_name = Path(input_path).stem
+    estimated_chunks = int(math.ceil(total_duration / max_duration))
+    log_with_time(f"单次解码流式分割，预计 {estimated_chunks} 个片段")
     
-    split_points.append(total_duration)
+    splitter = _StreamingOggSplitter(
+        av, output_dir, base_name, max_duration, sample_rate, channels,
+        log_func=log_with_time, progress_callback=progress_callback, estimated_chunks=estimated_chunks
+    )
+    try:
+        chunk_info = splitter.run(input_path, total_duration)
+    except Exception as e:
+        splitter.abort()
+        return False, f"音频分割失败: {str(e)}", None
     
-    # 生成输出文件列表
-    base_name = Path(input_path).stem
-    chunk_info = []
+    if chunk_info is None:
+        return False, "音频文件中没有找到音频流", None
     
-    num_chunks = len(split_points) - 1
-    log_with_time(f"将分割为 {num_chunks} 个片段")
+    return True, f"成功分割为 {len(chunk_info)} 个片段", chunk_info
+
+
+class _OggChunkWriter:
+    """一个输出片段：独立的 OGG 容器与 Vorbis 编码器，写入的帧时间戳从 0 开始。"""
+    
+    def __init__(self, av, output_path: str, sample_rate: int, channels: int):
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.container = av.open(output_path, 'w')
+        self.stream = self.container.add_stream('libvorbis', rate=sample_rate)
+        self.stream.codec_context.layout = 'mono' if channels == 1 else 'stereo'
+        self.samples_written = 0
+    
+    def write(self, frames) -> None:
+        """编码并写入已重采样的帧。"""
+        for frame in frames:
+            frame.pts = self.samples_written
+            frame.time_base = Fraction(1, self.sample_rate)
+            self.samples_written += frame.samples
+            for out_packet in self.stream.encode(frame):
+                self.container.mux(out_packet)
+    
+    def close(self) -> bool:
+        """刷新编码器并关闭容器，返回输出文件是否有效。"""
+        for out_packet in self.stream.encode(None):
+            self.container.mux(out_packet)
+        self.container.close()
+        return os.path.exists(self.output_path) and os.path.getsize(self.output_path) > 0
+
+
+class _StreamingOggSplitter:
+    """
+    单次解码的流式分割器
+    
+    输入文件只打开、解码一次：每帧重采样后直接写入当前片段的编码器，同时计算帧 RMS
+    (在重采样后的浮点样本上计算，整数采样格式的输入也使用同一个分贝刻度)。
+    进入目标分割点之前 SPLIT_SEARCH_WINDOW 秒的回看窗口后，帧先暂存并记录静音段；
+    解码越过目标分割点时，在窗口内选择中点最接近目标的静音段中点作为分割点（没有静音段时在目标点分割），
+    分割点之前的暂存帧写入当前片段，然后切换到新的编码器/容器，分割点之后的暂存帧进入新片段。
+    帧按其起始时间归属片段，与逐段 seek 提取时的取舍规则相同。
+    """
     
-    # 提取每个片段
-    for i in range(num_chunks):
-        start_time = split_points[i]
-        end_time = split_points[i + 1]
-        chunk_duration = end_time - start_time
-        
-        output_path = os.path.join(output_dir, f"{base_name}_part{i+1:03d}.ogg")
-        
-        if progress_callback:
-            progress_callback(i + 1, num_chunks, f"正在分割片段 {i+1}/{num_chunks} ({chunk_duration:.1f}s)")
-        
-        log_with_time(f"片段 {i+1}/{num_chunks}: {start_time:.1f}s - {end_time:.1f}s -> {output_path}")
-        
-        # 提取片段
-        success = extract_audio_segment(
-            input_path, output_path,
-            start_time, end_time,
-            sample_rate, channels, quality
-        )
-        
-        if not success:
-            return False, f"提取片段 {i+1} 失败", None
-        
-        chunk_info.append((output_path, start_time, end_time))
+    def __init__(self, av, output_dir: str, base_name: str, max_duration: float,
+                 sample_rate: int, channels: int, log_func=None, progress_callback=None,
+                 estimated_chunks: int = 0):
+        self.av = av
+        self.output_dir = output_dir
+        self.base_name = base_name
+        self.max_duration = max_duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.log_func = log_func
+        self.progress_callback = progress_callback
+        self.estimated_chunks = estimated_chunks
+        
+        self.chunk_info: List[Tuple[str, float, float]] = []
+        self.writer: Optional[_OggChunkWriter] = None
+        self.chunk_start = 0.0
+        self.pending = deque()  # 回看窗口内尚未写入的 (帧时间, dB, 重采样帧列表)
+        self.silence_segments: List[Tuple[float, float]] = []
+        self.current_silence_start: Optional[float] = None
+    
+    @property
+    def target(self) -> float:
+        return self.chunk_start + self.max_duration
+    
+    @property
+    def window_start(self) -> float:
+        # 片段时长短于回看窗口时，窗口不早于片段中点，避免选中上一个分割点所在的静音段而产生极短的片段
+        return max(self.chunk_start + self.max_duration / 2, self.target - SPLIT_SEARCH_WINDOW)
+    
+    def _open_chunk(self, start_time: float) -> None:
+        self.chunk_start = start_time
+        self.silence_segments = []
+        self.current_silence_start = None
+        output_path = os.path.join(self.output_dir, f"{self.base_name}_part{len(self.chunk_info) + 1:03d}.ogg")
+        self.writer = _OggChunkWriter(self.av, output_path, self.sample_rate, self.channels)
+    
+    def _close_chunk(self, end_time: float) -> None:
+        writer, self.writer = self.writer, None
+        if not writer.close():
+            raise RuntimeError(f"片段 {len(self.chunk_info) + 1} 输出文件为空")
+        self.chunk_info.append((writer.output_path, self.chunk_start, end_time))
+        index = len(self.chunk_info)
+        total = max(self.estimated_chunks, index)
+        if self.log_func:
+            self.log_func(f"片段 {index}/{total}: {self.chunk_start:.1f}s - {end_time:.1f}s -> {writer.output_path}")
+        if self.progress_callback:
+            self.progress_callback(index, total, f"已分割片段 {index}/{total} ({end_time - self.chunk_start:.1f}s)")
+    
+    @staticmethod
+    def _frames_db(frames) -> Optional[float]:
+        """重采样帧的 RMS 分贝值；重采样器本次没有输出样本时返回 None。"""
+        import numpy as np
+        arrays = [frame.to_ndarray().ravel() for frame in frames]
+        if not arrays or not sum(len(a) for a in arrays):
+            return None
+        samples = np.concatenate(arrays).astype(np.float64)
+        return rms_to_db(float(np.sqrt(np.mean(samples ** 2))))
+    
+    def _track_silence(self, frame_time: float, db: Optional[float]) -> None:
+        if db is None:
+            return
+        if db < SPLIT_SILENCE_THRESH_DB:
+            if self.current_silence_start is None:
+                self.current_silence_start = frame_time
+        elif self.current_silence_start is not None:
+            if frame_time - self.current_silence_start >= SPLIT_MIN_SILENCE_DURATION:
+                self.silence_segments.append((self.current_silence_start, frame_time))
+            self.current_silence_start = None
+    
+    def _choose_split_point(self) -> float:
+        """选择最接近目标时间的静音段中点，没有合适的静音段时返回目标时间。"""
+        target = self.target
+        if self.current_silence_start is not None and target - self.current_silence_start >= SPLIT_MIN_SILENCE_DURATION:
+            self.silence_segments.append((self.current_silence_start, target))
+        if not self.silence_segments:
+            return target
+        best_silence = min(self.silence_segments, key=lambda s: abs((s[0] + s[1]) / 2 - target))
+        split_point = (best_silence[0] + best_silence[1]) / 2
+        return split_point if split_point > self.chunk_start else target
+    
+    def _roll_over(self) -> deque:
+        """在回看窗口内选择分割点并切换到新片段，返回需要在新片段中重新处理的暂存帧。"""
+        split_point = self._choose_split_point()
+        carried = deque()
+        for item in self.pending:
+            if item[0] < split_point:
+                self.writer.write(item[2])
+            else:
+                carried.append(item)
+        self.pending = deque()
+        self._close_chunk(split_point)
+        self._open_chunk(split_point)
+        return carried
+    
+    def _feed(self, frame_time: float, db: Optional[float], frames) -> None:
+        incoming = deque([(frame_time, db, frames)])
+        while incoming:
+            item = incoming.popleft()
+            if item[0] > self.target:
+                carried = self._roll_over()
+                carried.append(item)
+                carried.extend(incoming)
+                incoming = carried
+            elif item[0] >= self.window_start:
+                self.pending.append(item)
+                self._track_silence(item[0], item[1])
+            else:
+                self.writer.write(item[2])
+    
+    def run(self, input_path: str, total_duration: float) -> Optional[List[Tuple[str, float, float]]]:
+        """执行分割，返回片段信息列表 [(文件路径, 起始时间, 结束时间)]；没有音频流时返回 None。"""
+        try:
+            import numpy  # noqa: F401  静音检测需要 numpy
+            detect_silence = True
+        except ImportError:
+            detect_silence = False
+        
+        input_container = self.av.open(input_path)
+        try:
+            audio_streams = [s for s in input_container.streams if s.type == 'audio']
+            if not audio_streams:
+                return None
+            input_audio_stream = audio_streams[0]
+            resampler = self.av.AudioResampler(
+                format='fltp',  # libvorbis 需要 float planar 格式
+                layout='mono' if self.channels == 1 else 'stereo',
+                rate=self.sample_rate
+            )
+            
+            self._open_chunk(0.0)
+            for packet in input_container.demux(input_audio_stream):
+                for frame in packet.decode():
+                    if frame.pts is None:
+                        continue
+                    frame_time = float(frame.pts * input_audio_stream.time_base)
+                    resampled_frames = resampler.resample(frame)
+                    db = self._frames_db(resampled_frames) if detect_silence else None
+                    self._feed(frame_time, db, resampled_frames)
+            
+            # 文件结束：暂存帧与重采样器中剩余的样本都属于最后一个片段
+            for item in self.pending:
+                self.writer.write(item[2])
+            self.pending = deque()
+            self.writer.write(resampler.resample(None))
+            self._close_chunk(max(total_duration, self.chunk_start))
+            return self.chunk_info
+        finally:
+            input_container.close()
     
-    return True, f"成功分割为 {num_chunks} 个片段", chunk_info
+    def abort(self) -> None:
+        """出错时关闭尚未完成的输出容器。"""
+        if self.writer is not None:
+            try:
+                self.writer.container.close()
+            except Exception:
+                pass
+            self.writer = None
 
 
 def extract_audio_segment(
@@ -9,40 +9,308 @@
 版本: 0.2.2.0
 """
 
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Union
 import re
 
+_WHITESPACE_RUN_PATTERN = re.compile(r'\s+')
+
 # --- 统一的数据结构 ---
-@dataclass
 class TimestampedWord:
-    """表示带时间戳的单个词。"""
-    text: str # 词文本
-    start_time: float # 开始时间 (秒)
-    end_time: float # 结束时间 (秒)
-    speaker_id: Optional[str] = None # 发言人ID (可选)
-    confidence: float = 1.0 # 置信度 (新增，默认1.0表示完全信任，兼容旧数据)
+    """表示带时间戳的单个词 (使用 __slots__，不为每个实例分配 __dict__)。"""
+    __slots__ = ("text", "start_time", "end_time", "speaker_id", "confidence")
+
+    def __init__(self, text: str, start_time: float, end_time: float, speaker_id: Optional[str] = None, confidence: float = 1.0):
+        self.text = text # 词文本
+        self.start_time = start_time # 开始时间 (秒)
+        self.end_time = end_time # 结束时间 (秒)
+        self.speaker_id = speaker_id # 发言人ID (可选)
+        self.confidence = confidence # 置信度 (新增，默认1.0表示完全信任，兼容旧数据)
+
+    def _astuple(self):
+        return (self.text, self.start_time, self.end_time, self.speaker_id, self.confidence)
+
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return self._astuple() == other._astuple()
+        return NotImplemented
+
+    __hash__ = None # 与原先的可变 dataclass 一致，不可哈希
+
+    def __repr__(self):
+        return (f"TimestampedWord(text={self.text!r}, start_time={self.start_time!r}, end_time={self.end_time!r}, "
+                f"speaker_id={self.speaker_id!r}, confidence={self.confidence!r})")
 
 @dataclass
 class ParsedTranscription:
     """表示解析后的ASR转录结果。"""
-    words: List[TimestampedWord] # 词列表
+    words: List[TimestampedWord] # 词列表 (TranscriptionParser 输出为列式存储上的 WordSpan 视图)
     full_text: Optional[str] = None # 完整文本 (可选)
     language_code: Optional[str] = None # 语言代码 (可选)
     soniox_metadata: Optional[Dict[str, Any]] = None # Soniox元数据 (可选)
 
+# --- 列式词存储 ---
+class WordStore:
+    """
+    列式 (数组) 存储的词列表。
+
+    开始/结束时间与置信度存放在 array('d') 中，文本与发言人分别放入去重表、
+    每个词只保存一个整数编号，避免为每个词创建带 __dict__ 的对象。
+    通过 WordView / WordSpan 视图访问，可直接替代 List[TimestampedWord] 使用。
+    """
+
+    def __init__(self):
+        self.starts = array('d') # 开始时间 (秒)
+        self.ends = array('d') # 结束时间 (秒)
+        self.confidences = array('d') # 置信度
+        self.text_ids = array('l') # 文本编号 (指向 texts)
+        self.speaker_codes = array('l') # 发言人编号 (指向 speakers，-1 表示无)
+        self.texts: List[str] = [] # 去重后的文本表
+        self.speakers: List[str] = [] # 去重后的发言人表
+        self._text_table: Dict[str, int] = {}
+        self._speaker_table: Dict[str, int] = {}
+
+    @classmethod
+    def from_words(cls, words: Iterable[TimestampedWord]) -> "WordStore":
+        store = cls()
+        for w in words:
+            store.append(w.text, w.start_time, w.end_time, w.speaker_id, w.confidence)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, text: str, start_time: float, end_time: float, speaker_id: Optional[str] = None, confidence: float = 1.0):
+        self.starts.append(start_time)
+        self.ends.append(end_time)
+        self.confidences.append(1.0 if confidence is None else confidence)
+        self.text_ids.append(self.intern_text(text))
+        if speaker_id is None:
+            self.speaker_codes.append(-1)
+        else:
+            speaker_code = self._speaker_table.get(speaker_id)
+            if speaker_code is None:
+                speaker_code = len(self.speakers)
+                self.speakers.append(speaker_id)
+                self._speaker_table[speaker_id] = speaker_code
+            self.speaker_codes.append(speaker_code)
+
+    def intern_text(self, text: str) -> int:
+        """返回文本在去重表中的编号，不存在时加入。"""
+        text_id = self._text_table.get(text)
+        if text_id is None:
+            text_id = len(self.texts)
+            self.texts.append(text)
+            self._text_table[text] = text_id
+        return text_id
+
+    def text_at(self, index: int) -> str:
+        return self.texts[self.text_ids[index]]
+
+    def speaker_at(self, index: int) -> Optional[str]:
+        speaker_code = self.speaker_codes[index]
+        return self.speakers[speaker_code] if speaker_code >= 0 else None
+
+    def span(self, start: int = 0, end: Optional[int] = None) -> "WordSpan":
+        """返回词区间 [start, end) 的视图。"""
+        return WordSpan(self, start, len(self) if end is None else end)
+
+    def to_words(self) -> List[TimestampedWord]:
+        """转换回 TimestampedWord 列表。"""
+        return [TimestampedWord(self.text_at(i), self.starts[i], self.ends[i], self.speaker_at(i), self.confidences[i])
+                for i in range(len(self))]
+
+
+class WordView:
+    """WordStore 中单个词的轻量视图，属性与 TimestampedWord 相同 (修改会写回存储)。"""
+    __slots__ = ("store", "index")
+    type = "word" # 与 getattr(w, 'type', 'word') 的默认值一致，避免每次触发 AttributeError
+
+    def __init__(self, store: WordStore, index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.store.texts[self.store.text_ids[self.index]]
+
+    @text.setter
+    def text(self, value: str):
+        self.store.text_ids[self.index] = self.store.intern_text(value)
+
+    @property
+    def start_time(self) -> float:
+        return self.store.starts[self.index]
+
+    @start_time.setter
+    def start_time(self, value: float):
+        self.store.starts[self.index] = value
+
+    @property
+    def end_time(self) -> float:
+        return self.store.ends[self.index]
+
+    @end_time.setter
+    def end_time(self, value: float):
+        self.store.ends[self.index] = value
+
+    @property
+    def speaker_id(self) -> Optional[str]:
+        return self.store.speaker_at(self.index)
+
+    @property
+    def confidence(self) -> float:
+        return self.store.confidences[self.index]
+
+    @confidence.setter
+    def confidence(self, value: float):
+        self.store.confidences[self.index] = value
+
+    def __eq__(self, other):
+        if isinstance(other, WordView):
+            return self.store is other.store and self.index == other.index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return (f"WordView(text={self.text!r}, start_time={self.start_time}, end_time={self.end_time}, "
+                f"speaker_id={self.speaker_id!r}, confidence={self.confidence})")
+
+
+class WordSpan:
+    """
+    WordStore 中连续词区间 [start, end) 的视图。
+
+    支持 len / 下标 / 切片 / 迭代 / 拼接，可以直接替代 List[TimestampedWord]；
+    切片和相邻区间的拼接仍然返回 WordSpan，不复制任何词数据。
+    """
+    __slots__ = ("store", "start", "end")
+
+    def __init__(self, store: WordStore, start: int, end: int):
+        self.store = store
+        self.start = start
+        self.end = max(start, end)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __bool__(self) -> bool:
+        return self.end > self.start
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return WordSpan(self.store, self.start + start, self.start + max(start, stop))
+            return [WordView(self.store, self.start + i) for i in range(start, stop, step)]
+        length = self.end - self.start
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
+            raise IndexError("WordSpan index out of range")
+        return WordView(self.store, self.start + key)
+
+    def __iter__(self) -> Iterator[WordView]:
+        store = self.store
+        for i in range(self.start, self.end):
+            yield WordView(store, i)
+
+    def texts(self) -> List[str]:
+        """按列直接取出区间内所有词的文本，不创建视图对象。"""
+        texts = self.store.texts
+        return [texts[text_id] for text_id in self.store.text_ids[self.start:self.end]]
+
+    def start_times(self) -> array:
+        return self.store.starts[self.start:self.end]
+
+    def end_times(self) -> array:
+        return self.store.ends[self.start:self.end]
+
+    def confidences(self) -> array:
+        return self.store.confidences[self.start:self.end]
+
+    def __add__(self, other):
+        if isinstance(other, WordSpan) and other.store is self.store:
+            if not other:
+                return self
+            if not self:
+                return other
+            if other.start == self.end:
+                return WordSpan(self.store, self.start, other.end)
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        if isinstance(other, list) and not other:
+            return self
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, WordSpan):
+            if other.store is self.store:
+                return other.start == self.start and other.end == self.end
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"WordSpan([{self.start}:{self.end}] of {len(self.store)} words)"
+
+
+def word_texts(words: Union[WordSpan, Iterable[TimestampedWord]]) -> List[str]:
+    """返回词列表的文本列表；WordSpan 直接按列读取。"""
+    if isinstance(words, WordSpan):
+        return words.texts()
+    return [w.text for w in words]
+
+
+def as_word_span(words: Union[WordSpan, Iterable[TimestampedWord]]) -> WordSpan:
+    """把词列表转换为列式存储上的 WordSpan (已经是 WordSpan 时原样返回)。"""
+    if isinstance(words, WordSpan):
+        return words
+    return WordStore.from_words(words).span()
+
 # --- 字幕条目类 ---
+@lru_cache(maxsize=8192)
+def _normalize_entry_text(text: str) -> str:
+    """去除多余空白并剥离首尾空格；同一文本只计算一次。"""
+    return _WHITESPACE_RUN_PATTERN.sub(' ', text).strip()
+
+
 class SubtitleEntry:
     """表示一条SRT字幕。"""
+    __slots__ = ("index", "start_time", "end_time", "_text", "_text_pending", "words_used", "alignment_ratio", "is_intentionally_oversized")
+
     def __init__(self, index, start_time, end_time, text, words_used: Optional[List[TimestampedWord]] = None, alignment_ratio=1.0):
         self.index = index # 字幕序号
         self.start_time = start_time # 开始时间
         self.end_time = end_time # 结束时间
-        self.text = re.sub(r'\s+', ' ', text).strip() # 文本内容 (去除多余空格并剥离首尾空格)
+        # 文本内容 (去除多余空格并剥离首尾空格)：合并/分割时会创建大量临时条目，规范化推迟到首次读取
+        self._text = text
+        self._text_pending = True
         self.words_used = words_used if words_used else [] # 使用的词对象列表 (用于调试和高级处理)
         self.alignment_ratio = alignment_ratio # 对齐比率 (LLM片段与ASR词的相似度)
         self.is_intentionally_oversized = False # 标记是否故意超限 (例如无法合理分割的长句)
 
+    @property
+    def text(self) -> str:
+        if self._text_pending:
+            self._text = _normalize_entry_text(self._text)
+            self._text_pending = False
+        return self._text
+
+    @text.setter
+    def text(self, value: str):
+        # 与原先一致：只对构造时传入的文本做规范化，之后的直接赋值原样保存
+        self._text = value
+        self._text_pending = False
+
     @property
     def duration(self):
         """计算字幕持续时间。"""
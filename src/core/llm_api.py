@@ -10,13 +10,22 @@ LLM API 客户端模块
 """
 
 import os
+import json
 import requests
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Tuple, Callable
+from dataclasses import dataclass
 import traceback
 import time
 import re
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import config as app_config # 使用别名
+from core.llm_transport import LLMTransport, get_llm_transport, parse_retry_after
+from core.llm_cache import LLMResponseCache, get_llm_cache, make_cache_key
+from core.llm_chunk_planner import ChunkPlanner
+from core.llm_checkpoint import make_checkpoint_key
 
 from langdetect import detect
 
@@ -24,8 +33,15 @@ from langdetect import detect
 DEFAULT_SYSTEM_PROMPT_FOR_SEGMENTATION = app_config.DEEPSEEK_SYSTEM_PROMPT_EN
 DEFAULT_SYSTEM_PROMPT_FOR_SUMMARY = app_config.DEEPSEEK_SYSTEM_PROMPT_SUMMARY_EN
 
-# 文本分块处理的最大字符数
-MAX_CHARS_PER_CHUNK = 2800
+# 分段摘要合并 (reduce) 请求中放在各段摘要之前的说明
+SUMMARY_REDUCE_INSTRUCTION = "以下是同一文本按顺序分段生成的摘要，请把它们视为完整文本的内容，合并生成一份整体摘要：\n\n"
+
+# Claude / Gemini 请求必须给出输出上限，未指定时使用该值
+LLM_DEFAULT_MAX_OUTPUT_TOKENS = 8192
+# 视为瞬时错误、可以重试的 HTTP 状态码
+LLM_RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# 只与发送请求的配置有关 (如 API Key 无效或无权限)、负载均衡池中换用其他配置可能成功的 HTTP 状态码
+LLM_MEMBER_SPECIFIC_STATUS_CODES = (401, 403)
 
 
 def _parse_api_url_and_model(
@@ -122,6 +138,387 @@ def _parse_api_url_and_model(
 
     return final_url, effective_model
 
+@dataclass
+class LLMCompletion:
+    """LLMClient.complete 的统一返回结果。content 为 None 表示响应中没有可用文本 (data 保留原始响应以便记录错误)。"""
+    content: Optional[str]
+    finish_reason: str
+    data: Dict[str, Any]
+    from_cache: bool = False
+
+    @property
+    def is_truncated(self) -> bool:
+        return self.finish_reason in ("length", "MAX_TOKENS", "max_tokens")
+
+
+def parse_llm_response(data: Any) -> Tuple[Optional[str], str]:
+    """
+    从 OpenAI / Gemini / Claude 三种响应格式中提取 (文本内容, 完成原因)。
+    无法识别或内容为空时返回 (None, 完成原因或 "unknown")。
+    """
+    if not isinstance(data, dict):
+        return None, "unknown"
+    choices = data.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        choice = choices[0]
+        content = (choice.get("message") or {}).get("content")
+        if content is not None:
+            return content, choice.get("finish_reason", "unknown")
+    candidates = data.get("candidates")
+    if isinstance(candidates, list) and candidates and isinstance(candidates[0], dict):
+        candidate = candidates[0]
+        parts = (candidate.get("content") or {}).get("parts")
+        if isinstance(parts, list) and parts and isinstance(parts[0], dict) and parts[0].get("text") is not None:
+            return parts[0]["text"], candidate.get("finishReason", "unknown")
+    content_blocks = data.get("content")
+    if isinstance(content_blocks, list) and content_blocks:
+        texts = [block.get("text") for block in content_blocks if isinstance(block, dict) and block.get("text") is not None]
+        if texts:
+            return "".join(texts), data.get("stop_reason", "unknown")
+    return None, "unknown"
+
+
+def parse_llm_usage(data: Any) -> Tuple[int, int]:
+    """
+    从响应或流式事件中提取 (输入 tokens, 输出 tokens)。
+    支持 OpenAI 的 usage、Claude 的 usage / message.usage 与 Gemini 的 usageMetadata；没有用量信息时返回 (0, 0)。
+    """
+    if not isinstance(data, dict):
+        return 0, 0
+    usage = data.get("usage")
+    if not isinstance(usage, dict) and isinstance(data.get("message"), dict):
+        usage = data["message"].get("usage")
+    if isinstance(usage, dict):
+        prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+        completion_tokens = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+        return int(prompt_tokens), int(completion_tokens)
+    usage_metadata = data.get("usageMetadata")
+    if isinstance(usage_metadata, dict):
+        return int(usage_metadata.get("promptTokenCount") or 0), int(usage_metadata.get("candidatesTokenCount") or 0)
+    return 0, 0
+
+
+class LLMUsage:
+    """线程安全的 token 用量累计。只统计实际发出的请求 (缓存命中不计入)，数值以 API 返回的 usage 为准。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.max_prompt_tokens = 0  # 单个请求的最大输入 tokens，用于判断是否接近上下文长度上限
+
+    def add(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+
+    def describe(self) -> str:
+        with self._lock:
+            return (f"{self.requests} 次请求, 输入 {self.prompt_tokens} tokens, 输出 {self.completion_tokens} tokens, "
+                    f"单次最大输入 {self.max_prompt_tokens} tokens")
+
+
+def _retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    第 attempt 次 (从 0 开始) 重试前的等待时间：以 LLM_RETRY_DELAY_S 为基数指数退避，在 [一半, 全部] 之间随机抖动，
+    避免并发请求在同一时刻重试；服务端给出 Retry-After 时以其为下限。
+    """
+    delay = min(app_config.LLM_RETRY_MAX_DELAY_S, app_config.LLM_RETRY_DELAY_S * (2 ** attempt))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, app_config.LLM_RETRY_AFTER_MAX_S))
+    return delay
+
+
+def get_profile_transport(custom_api_base_url_str: Optional[str], custom_model_name: Optional[str],
+                          api_format: Optional[str] = None, profile_id: Optional[str] = None,
+                          max_concurrent_requests: Optional[int] = None,
+                          requests_per_minute: Optional[float] = None) -> LLMTransport:
+    """
+    取得一个模型配置在本次任务中使用的共享传输对象 (连接池 + 限速器)。
+
+    调用方在任务开始时取得一次，传给分块分割 (call_llm_api_for_segmentation) 与 AI 校正 (SrtProcessor.llm_transport)，
+    使两类并发批量请求经过同一个限速器，合起来不超出该配置每分钟的请求数。连接池大小至少容纳全部在途请求。
+    """
+    target_url, _ = _parse_api_url_and_model(
+        custom_api_base_url_str, custom_model_name,
+        app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME,
+        api_format
+    )
+    if max_concurrent_requests is None: max_concurrent_requests = app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS
+    return get_llm_transport(target_url, profile_id,
+                             pool_maxsize=max(app_config.LLM_HTTP_POOL_MAXSIZE, int(max_concurrent_requests or 1)),
+                             requests_per_minute=requests_per_minute)
+
+
+class LLMClient:
+    """
+    统一的 LLM 请求客户端。
+
+    负责按 API 格式 (OpenAI兼容 / Claude / Gemini) 构建请求、复用共享连接池 (LLMTransport)、
+    输出长度限制、对瞬时错误的重试、磁盘响应缓存，以及把三种响应格式统一为 LLMCompletion。
+    摘要、分块分割、AI 校正、台本清洗和连接测试都通过它发送请求。
+    """
+
+    _USE_DEFAULT = object()  # 区分 "未指定温度" 与 "显式不发送温度 (None)"；也表示 "使用全局缓存"
+
+    def __init__(self, api_key: str, target_url: str, model: str,
+                 api_format: Optional[str] = None,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 transport: Optional[LLMTransport] = None,
+                 profile_id: Optional[str] = None,
+                 max_retries: Optional[int] = None,
+                 cache: Any = _USE_DEFAULT):
+        self.api_key = api_key
+        self.target_url = target_url
+        self.model = model
+        self.api_format = self._resolve_api_format(api_format, target_url)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.transport = transport if transport is not None else get_llm_transport(target_url, profile_id)
+        self.max_retries = max_retries if max_retries is not None else app_config.DEFAULT_LLM_MAX_RETRIES
+        # cache 为 None 时不使用缓存 (如连接测试)
+        self.cache: Optional[LLMResponseCache] = get_llm_cache() if cache is LLMClient._USE_DEFAULT else cache
+        self.usage = LLMUsage()
+
+    @classmethod
+    def from_settings(cls, api_key: str, custom_api_base_url_str: Optional[str], custom_model_name: Optional[str],
+                      api_format: Optional[str] = None, **kwargs) -> "LLMClient":
+        """根据用户配置的 API 地址与模型名创建客户端 (地址补全规则见 _parse_api_url_and_model)。"""
+        target_url, effective_model = _parse_api_url_and_model(
+            custom_api_base_url_str, custom_model_name,
+            app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME,
+            api_format
+        )
+        return cls(api_key, target_url, effective_model, api_format=api_format, **kwargs)
+
+    @staticmethod
+    def _resolve_api_format(api_format: Optional[str], target_url: str) -> str:
+        if api_format == app_config.API_FORMAT_GEMINI or "generativelanguage.googleapis.com" in target_url:
+            return app_config.API_FORMAT_GEMINI
+        if api_format == app_config.API_FORMAT_CLAUDE or "/v1/messages" in target_url:
+            return app_config.API_FORMAT_CLAUDE
+        return app_config.API_FORMAT_OPENAI
+
+    def build_request(self, system: str, user: str, temperature: Optional[float],
+                      max_tokens: Optional[int], stream: bool = False) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """构建 (URL, 请求头, 请求体)。system 为空时只发送用户内容；stream 为 True 时请求 SSE 流式响应。"""
+        headers = {"Content-Type": "application/json"}
+        # Gemini 与 Claude 请求把系统提示并入用户消息
+        combined_user = f"系统提示：{system}\n\n用户输入：{user}" if system else user
+        if self.api_format == app_config.API_FORMAT_GEMINI:
+            generation_config: Dict[str, Any] = {"maxOutputTokens": max_tokens or LLM_DEFAULT_MAX_OUTPUT_TOKENS}
+            if temperature is not None: generation_config["temperature"] = temperature
+            payload = {"contents": [{"parts": [{"text": combined_user}]}], "generationConfig": generation_config}
+            # Gemini API 使用 URL 参数传递 API key；流式请求改用 streamGenerateContent 并指定 SSE 格式
+            if stream:
+                return f"{self.target_url.replace(':generateContent', ':streamGenerateContent')}?alt=sse&key={self.api_key}", headers, payload
+            return f"{self.target_url}?key={self.api_key}", headers, payload
+        if self.api_format == app_config.API_FORMAT_CLAUDE:
+            payload = {
+                "model": self.model,
+                "max_tokens": max_tokens or LLM_DEFAULT_MAX_OUTPUT_TOKENS,
+                "messages": [{"role": "user", "content": combined_user}]
+            }
+            if temperature is not None: payload["temperature"] = temperature
+            if stream: payload["stream"] = True
+            headers.update({
+                "Authorization": f"Bearer {self.api_key}",
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01"
+            })
+            return self.target_url, headers, payload
+        # OpenAI 兼容格式 (默认格式)；未指定 max_tokens 时使用服务端默认值
+        messages = [{"role": "user", "content": user}]
+        if system: messages.insert(0, {"role": "system", "content": system})
+        payload = {"model": self.model, "messages": messages}
+        if max_tokens: payload["max_tokens"] = max_tokens
+        if temperature is not None: payload["temperature"] = temperature
+        if stream: payload["stream"] = True
+        headers["Authorization"] = f"Bearer {self.api_key}"
+        return self.target_url, headers, payload
+
+    def send(self, system: str, user: str, temperature: Any = _USE_DEFAULT, max_tokens: Optional[int] = None,
+             timeout: Optional[Any] = None, max_retries: Optional[int] = None, stream: bool = False) -> requests.Response:
+        """
+        发送请求并返回原始响应 (不检查状态码)。
+
+        连接错误与 429/5xx 响应会按 max_retries 重试，等待时间按指数退避加抖动并遵从 Retry-After；
+        超时不在这里重试 (已等待了完整的读取超时)，由调用方决定是否重新排队。
+        """
+        if temperature is LLMClient._USE_DEFAULT: temperature = self.temperature
+        if max_tokens is None: max_tokens = self.max_tokens
+        retries = self.max_retries if max_retries is None else max_retries
+        url, headers, payload = self.build_request(system, user, temperature, max_tokens, stream=stream)
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.transport.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+            except requests.exceptions.ConnectionError:
+                if attempt >= retries: raise
+            else:
+                if response.status_code not in LLM_RETRYABLE_STATUS_CODES or attempt >= retries:
+                    return response
+                retry_after = parse_retry_after(response)
+                response.close()
+            time.sleep(_retry_delay(attempt, retry_after))
+            attempt += 1
+
+    def complete(self, system: str, user: str, use_cache: bool = True, **opts) -> LLMCompletion:
+        """
+        发送一次补全请求并把响应统一为 LLMCompletion。
+
+        opts 支持 temperature / max_tokens / timeout / max_retries；HTTP 错误以 requests 异常抛出，由调用方记录。
+        相同请求内容命中磁盘缓存时不发送请求；只缓存有内容且未被截断的响应。
+        """
+        cache_key = self._cache_key_for(system, user, opts) if use_cache else None
+        if cache_key is not None:
+            record = self.cache.get(cache_key)
+            if record is not None:
+                return LLMCompletion(content=record["content"], finish_reason=record.get("finish_reason", "unknown"),
+                                     data={}, from_cache=True)
+
+        response = self.send(system, user, **opts)
+        response.raise_for_status()
+        data = response.json()
+        self.usage.add(*parse_llm_usage(data))
+        content, finish_reason = parse_llm_response(data)
+        completion = LLMCompletion(content=content, finish_reason=finish_reason, data=data)
+        if cache_key is not None and content and not completion.is_truncated:
+            self.cache.put(cache_key, content, finish_reason, self.model)
+        return completion
+
+    def stream(self, system: str, user: str, use_cache: bool = True, **opts) -> "LLMStream":
+        """
+        以流式方式请求补全 (OpenAI兼容 / Claude 使用 SSE，Gemini 使用 streamGenerateContent)。
+
+        返回的 LLMStream 在迭代时逐段产生文本；连接与 HTTP 错误在调用本方法时以 requests 异常抛出。
+        """
+        cache_key = self._cache_key_for(system, user, opts) if use_cache else None
+        if cache_key is not None:
+            record = self.cache.get(cache_key)
+            if record is not None:
+                return LLMStream(self, cached=record)
+        response = self.send(system, user, stream=True, **opts)
+        response.raise_for_status()
+        return LLMStream(self, response=response, cache_key=cache_key)
+
+    def _cache_key_for(self, system: str, user: str, opts: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        temperature = opts.get("temperature", LLMClient._USE_DEFAULT)
+        if temperature is LLMClient._USE_DEFAULT: temperature = self.temperature
+        max_tokens = opts.get("max_tokens") or self.max_tokens
+        return make_cache_key(self.api_format, self.model, system, user, temperature, max_tokens)
+
+
+def _parse_stream_event(event: Any) -> Tuple[Optional[str], Optional[str]]:
+    """从一条流式事件 (OpenAI / Claude / Gemini 的 SSE data) 中提取 (文本增量, 完成原因)。"""
+    if not isinstance(event, dict):
+        return None, None
+    choices = event.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        choice = choices[0]
+        return (choice.get("delta") or {}).get("content"), choice.get("finish_reason")
+    event_type = event.get("type")
+    if event_type == "content_block_delta":
+        return (event.get("delta") or {}).get("text"), None
+    if event_type == "message_delta":
+        return None, (event.get("delta") or {}).get("stop_reason")
+    candidates = event.get("candidates")
+    if isinstance(candidates, list) and candidates and isinstance(candidates[0], dict):
+        candidate = candidates[0]
+        parts = (candidate.get("content") or {}).get("parts") or []
+        text = "".join(part.get("text", "") for part in parts if isinstance(part, dict)) or None
+        return text, candidate.get("finishReason")
+    return None, None
+
+
+class LLMStream:
+    """
+    LLMClient.stream 的返回值：迭代时逐段产生文本增量，迭代结束后可读取完整内容与完成原因。
+
+    命中缓存时一次性产生缓存的完整内容；收到结束标记 ([DONE] 或完成原因) 且未被截断的流会写入缓存。
+    """
+
+    def __init__(self, client: "LLMClient", response: Optional[requests.Response] = None,
+                 cached: Optional[Dict[str, Any]] = None, cache_key: Optional[str] = None):
+        self._client = client
+        self._response = response
+        self._cached = cached
+        self._cache_key = cache_key
+        self.content: Optional[str] = None
+        self.finish_reason: str = "unknown"
+        self.from_cache = cached is not None
+
+    @property
+    def is_truncated(self) -> bool:
+        return self.finish_reason in ("length", "MAX_TOKENS", "max_tokens")
+
+    def __iter__(self):
+        if self._cached is not None:
+            self.content = self._cached["content"]
+            self.finish_reason = self._cached.get("finish_reason", "unknown")
+            yield self.content
+            return
+        parts: List[str] = []
+        completed = False
+        done_seen = False
+        # 流式用量分散在多个事件中 (Claude 的输入/输出分开给出，Gemini 每个事件给出累计值)，各取最大值
+        prompt_tokens = completion_tokens = 0
+        try:
+            # SSE 响应常不声明字符集，requests 会按 ISO-8859-1 解码，必须显式指定
+            self._response.encoding = "utf-8"
+            for line in self._response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    done_seen = True
+                    break
+                try:
+                    event = json.loads(payload)
+                except ValueError:
+                    continue
+                text, finish_reason = _parse_stream_event(event)
+                event_prompt_tokens, event_completion_tokens = parse_llm_usage(event)
+                prompt_tokens = max(prompt_tokens, event_prompt_tokens)
+                completion_tokens = max(completion_tokens, event_completion_tokens)
+                if finish_reason:
+                    self.finish_reason = finish_reason
+                if text:
+                    parts.append(text)
+                    yield text
+            # 代理或服务端提前关闭连接时流也会"正常"结束，但既没有 [DONE] 也没有完成原因，内容不完整，不能写入缓存
+            completed = done_seen or self.finish_reason != "unknown"
+        finally:
+            self.content = "".join(parts) if parts else None
+            self._client.usage.add(prompt_tokens, completion_tokens)
+            self.close()
+        if completed and self._cache_key is not None and self.content and not self.is_truncated:
+            self._client.cache.put(self._cache_key, self.content, self.finish_reason, self._client.model)
+
+    def lines(self):
+        """按行产生内容：每收到一个换行符就产生一整行 (不含换行符)，最后产生剩余的不完整行。"""
+        buffer = ""
+        for text in self:
+            buffer += text
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                yield line
+        if buffer:
+            yield buffer
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+
+
 def _test_gemini_connection(api_key: str, raw_url: str, effective_model: str, test_temperature: float, _log_test_connection) -> tuple[bool, str]:
     """
     专门的Gemini API连接测试函数
@@ -166,25 +563,10 @@ def _test_gemini_connection(api_key: str, raw_url: str, effective_model: str, te
 
     # 测试模型连接性
     try:
-        generate_url = f"{raw_url.rstrip('/')}/v1beta/models/{test_model}:generateContent?key={api_key}"
-
-        payload = {
-            "contents": [{
-                "parts": [{"text": "Hello"}]
-            }],
-            "generationConfig": {
-                "maxOutputTokens": 10
-            }
-        }
-        if test_temperature is not None:
-            payload["generationConfig"]["temperature"] = test_temperature
-
-        response = requests.post(
-            generate_url,
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=15
-        )
+        generate_url = f"{raw_url.rstrip('/')}/v1beta/models/{test_model}:generateContent"
+        client = LLMClient(api_key, generate_url, test_model, api_format=app_config.API_FORMAT_GEMINI,
+                           temperature=test_temperature, max_retries=0, cache=None)
+        response = client.send("", "Hello", max_tokens=10, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -217,23 +599,11 @@ def _test_claude_connection(api_key: str, raw_url: str, effective_model: str, te
 
     # Claude API端点
     target_url = f"{raw_url.rstrip('/')}/v1/messages"
-
-    payload = {
-        "model": effective_model,
-        "max_tokens": 100,
-        "messages": [{"role": "user", "content": "Hello"}]
-    }
-    if test_temperature is not None:
-        payload["temperature"] = test_temperature
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-        "anthropic-version": "2023-06-01"
-    }
+    client = LLMClient(api_key, target_url, effective_model, api_format=app_config.API_FORMAT_CLAUDE,
+                       temperature=test_temperature, max_retries=0, cache=None)
 
     try:
-        response = requests.post(target_url, headers=headers, json=payload, timeout=20)
+        response = client.send("", "Hello", max_tokens=100, timeout=20)
 
         if response.status_code == 401:
             return False, f"Claude API密钥无效或已过期。请检查您的Anthropic API密钥。"
@@ -342,14 +712,11 @@ def _test_openai_compatible_direct_connection(api_key: str, raw_url: str, effect
         app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME
     )
 
-    payload = {"model": effective_model, "messages": [{"role": "user", "content": "Hello"}]}
-    if test_temperature is not None:
-        payload["temperature"] = test_temperature
-
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+    client = LLMClient(api_key, target_url, effective_model, api_format=app_config.API_FORMAT_OPENAI,
+                       temperature=test_temperature, max_retries=0, cache=None)
 
     try:
-        response = requests.post(target_url, headers=headers, json=payload, timeout=20)
+        response = client.send("", "Hello", timeout=20)
 
         if response.status_code == 401:
             return False, "API密钥无效。请检查您的API密钥。"
@@ -388,8 +755,10 @@ def _log_api_message(message: str, signals_forwarder: Optional[Any], prefix: str
     else:
         print(f"{prefix} {message}")
 
-def _split_text_into_chunks(text: str, max_chars: int, signals_forwarder: Optional[Any]) -> List[str]:
+def _split_text_into_chunks(text: str, max_chars: int, signals_forwarder: Optional[Any],
+                            logger_func: Optional[Callable[[str], None]] = None) -> List[str]:
     def _log_splitter(message: str):
+        if logger_func is not None: logger_func(message); return
         _log_api_message(message, signals_forwarder, prefix="[LLM API - Splitter]")
 
     chunks: List[str] = []
@@ -427,77 +796,337 @@ def _get_summary(
     custom_api_base_url_str: Optional[str],
     custom_model_name: Optional[str],
     custom_temperature: Optional[float],
-    signals_forwarder: Optional[Any] = None
+    signals_forwarder: Optional[Any] = None,
+    client: Optional[LLMClient] = None,
+    section_label: Optional[str] = None  # 分段摘要时的段标签 (如 "段 2/5")，仅用于日志
 ) -> Optional[str]:
     def _log_summary_api(message: str):
-        _log_api_message(message, signals_forwarder, prefix="[LLM API - Summary]")
+        _log_api_message(f"[{section_label}] {message}" if section_label else message, signals_forwarder, prefix="[LLM API - Summary]")
 
-    target_url, effective_model = _parse_api_url_and_model(
-        custom_api_base_url_str, custom_model_name,
-        app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME
-    )
+    if client is None:
+        client = LLMClient.from_settings(api_key, custom_api_base_url_str, custom_model_name)
     effective_summary_temperature = custom_temperature if custom_temperature is not None else 0.5
 
-    _log_summary_api(f"向 LLM API 请求文本摘要 (URL: {target_url}, 模型: {effective_model}, 温度: {effective_summary_temperature})...")
-
-    # 根据不同的API提供商构建请求
-    if "generativelanguage.googleapis.com" in target_url:
-        # Gemini API 使用不同的请求格式和认证方式
-        payload = {
-            "contents": [{"parts": [{"text": f"系统提示：{system_prompt_summary}\n\n用户输入：{full_text}"}]}],
-            "generationConfig": {
-                "temperature": effective_summary_temperature,
-                "maxOutputTokens": 8192
-            }
-        }
-        # Gemini API 使用 URL 参数传递 API key
-        response = requests.post(f"{target_url}?key={api_key}", json=payload, timeout=180)
-    else:
-        # 其他 API 使用 OpenAI 兼容格式
-        payload = {"model": effective_model, "messages": [{"role": "system", "content": system_prompt_summary}, {"role": "user", "content": full_text}]}
-        if custom_temperature is not None: payload["temperature"] = effective_summary_temperature
-
-        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
-        response = requests.post(target_url, headers=headers, json=payload, timeout=180)
+    _log_summary_api(f"向 LLM API 请求文本摘要 (URL: {client.target_url}, 模型: {client.model}, 温度: {effective_summary_temperature})...")
 
     try:
-        response.raise_for_status(); data = response.json()
-        content = None; finish_reason = "unknown"
-        if "choices" in data and data["choices"] and isinstance(data["choices"], list) and len(data["choices"]) > 0 and \
-           isinstance(data["choices"][0], dict) and data["choices"][0].get("message", {}).get("content") is not None:
-            choice = data["choices"][0]; content = choice.get("message", {}).get("content"); finish_reason = choice.get("finish_reason", "unknown")
-        elif data.get("candidates") and isinstance(data["candidates"], list) and len(data["candidates"]) > 0 and \
-             isinstance(data["candidates"][0], dict) and \
-             data["candidates"][0].get("content", {}).get("parts", [{}]) and \
-             isinstance(data["candidates"][0].get("content").get("parts"), list) and \
-             len(data["candidates"][0].get("content").get("parts")) > 0 and \
-             isinstance(data["candidates"][0].get("content").get("parts")[0], dict) and \
-             data["candidates"][0].get("content").get("parts")[0].get("text") is not None:
-            content = data["candidates"][0].get("content").get("parts")[0].get("text"); finish_reason = data["candidates"][0].get("finishReason", "unknown")
+        completion = client.complete(system_prompt_summary, full_text, temperature=effective_summary_temperature)
+        content = completion.content; finish_reason = completion.finish_reason; data = completion.data
 
         if content is not None:
-            _log_summary_api(f"摘要获取成功。完成原因: {finish_reason}")
-            if finish_reason == "MAX_TOKENS" or finish_reason == "length": 
+            _log_summary_api(f"摘要获取成功{'（缓存命中）' if completion.from_cache else ''}。完成原因: {finish_reason}")
+            if completion.is_truncated: 
                 _log_summary_api(f"警告: 摘要输出可能因达到API的默认max_tokens限制而被截断。")
             return content.strip()
         else: 
-            error_info = data.get('error', {}); 
-            if not error_info and data.get("code") and data.get("message"): error_info = data
-            error_msg = error_info.get('message', str(data))
             _log_summary_api(f"错误: LLM API 对摘要请求的响应中内容为空或格式不符。完成原因: {finish_reason}, 响应数据: {str(data)[:500]}")
-    except requests.exceptions.Timeout: _log_summary_api(f"错误: LLM API 对摘要请求超时 (180秒)。URL: {target_url}"); return None
+    except requests.exceptions.Timeout: _log_summary_api(f"错误: LLM API 对摘要请求超时 ({client.transport.read_timeout}秒)。URL: {client.target_url}"); return None
     except requests.exceptions.RequestException as e: 
         status_code = e.response.status_code if e.response is not None else 'N/A'
-        _log_summary_api(f"错误: LLM API 对摘要请求失败 (状态码: {status_code}) URL: {target_url}: {e}"); return None
-    except Exception as e: _log_summary_api(f"错误: 处理 LLM API 对摘要请求的响应时发生未知错误 (URL: {target_url}): {e}"); _log_summary_api(traceback.format_exc()); return None
+        _log_summary_api(f"错误: LLM API 对摘要请求失败 (状态码: {status_code}) URL: {client.target_url}: {e}"); return None
+    except Exception as e: _log_summary_api(f"错误: 处理 LLM API 对摘要请求的响应时发生未知错误 (URL: {client.target_url}): {e}"); _log_summary_api(traceback.format_exc()); return None
     return None
 
+def _group_chunks_into_sections(text_chunks: List[str], max_chars: int) -> List[int]:
+    """把相邻的分割块合并为不超过 max_chars 字符的摘要段，返回每块所属的段序号 (单块超长时独占一段)。"""
+    section_of_chunk: List[int] = []
+    section = 0; section_chars = 0
+    for chunk in text_chunks:
+        if section_chars and section_chars + len(chunk) > max_chars:
+            section += 1; section_chars = 0
+        section_of_chunk.append(section)
+        section_chars += len(chunk)
+    return section_of_chunk
+
+def _get_map_reduce_summary(
+    client: LLMClient, section_texts: List[str], system_prompt_summary: str,
+    custom_temperature: Optional[float], signals_forwarder: Optional[Any], max_workers: int
+) -> Optional[str]:
+    """
+    分段摘要：各段并行请求摘要 (map)，再把各段摘要合并为一份全文摘要 (reduce)。
+    每个请求的输入都不超过一段的长度，长文件不会因全文过长而超出上下文。
+    部分段失败时只合并成功的段；合并请求失败时直接按顺序拼接各段摘要。
+    """
+    num_sections = len(section_texts)
+    def _summarize_section(index: int) -> Optional[str]:
+        return _get_summary("", section_texts[index], system_prompt_summary, None, None, custom_temperature,
+                            signals_forwarder=signals_forwarder, client=client,
+                            section_label=f"段 {index+1}/{num_sections}" if num_sections > 1 else None)
+    if num_sections == 1:
+        return _summarize_section(0)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, num_sections)), thread_name_prefix="llm-summary") as executor:
+        section_summaries = list(executor.map(_summarize_section, range(num_sections)))
+    valid_summaries = [(i, summary) for i, summary in enumerate(section_summaries) if summary]
+    if not valid_summaries: return None
+    if len(valid_summaries) == 1: return valid_summaries[0][1]
+
+    _log_api_message(f"已获得 {len(valid_summaries)}/{num_sections} 段摘要，开始合并...", signals_forwarder, prefix="[LLM API - Summary]")
+    combined = "\n\n".join(f"【第{i+1}段摘要】\n{summary}" for i, summary in valid_summaries)
+    merged = _get_summary("", SUMMARY_REDUCE_INSTRUCTION + combined, system_prompt_summary, None, None, custom_temperature,
+                          signals_forwarder=signals_forwarder, client=client, section_label="合并")
+    return merged or "\n\n".join(summary for _, summary in valid_summaries)
+
+class _ChunkSegmentationError(Exception):
+    """
+    分块请求失败。partial_segments 为失败前已得到的片段 (流式模式下已送出)，remaining_text 为尚未分割的文本，
+    retryable 表示失败是否为超时、连接错误、429/5xx 等可以重新排队再试的瞬时错误；
+    member_specific 表示失败只与发送请求的配置有关 (瞬时错误或认证失败)，负载均衡池中换用其他配置可能成功。
+    """
+
+    def __init__(self, partial_segments: List[str], remaining_text: str, retryable: bool, member_specific: bool = False):
+        super().__init__(f"块分割失败 (可重试: {retryable})")
+        self.partial_segments = partial_segments
+        self.remaining_text = remaining_text
+        self.retryable = retryable
+        self.member_specific = member_specific
+
+def _fallback_segments(text: str) -> List[str]:
+    """分块最终失败时按原文的行保留文本，避免该块的内容从字幕中消失。"""
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+def _remaining_text_after(chunk: str, emitted_lines: List[str]) -> str:
+    """
+    返回文本块中位于 emitted_lines 之后、尚未被分割输出的部分。
+    按去除空白后的字符数定位，再用已输出内容的末尾若干字符在附近校正 (LLM 偶尔增删个别字符)。
+    """
+    emitted = re.sub(r"\s+", "", "".join(emitted_lines))
+    if not emitted: return chunk
+    positions = [i for i, ch in enumerate(chunk) if not ch.isspace()]
+    compact = "".join(chunk[i] for i in positions)
+    consumed = min(len(emitted), len(compact))
+    tail = emitted[-20:]
+    found = compact.find(tail, max(0, consumed - len(tail) - 200), consumed + 200)
+    if found != -1: consumed = found + len(tail)
+    return chunk[positions[consumed]:] if consumed < len(positions) else ""
+
+def _segment_single_chunk(
+    chunk: str, chunk_label: str, client: LLMClient,
+    system_prompt_segmentation: str, summary_text: str,
+    is_running, _log_main_api,
+    on_segments: Optional[Callable[[List[str]], None]] = None,
+    continuations_left: Optional[int] = None
+) -> Tuple[Optional[List[str]], bool]:
+    """
+    请求 LLM 分割单个文本块。
+
+    返回 (片段列表, 是否命中缓存)。片段列表为该块修正后的片段，任务被取消时为 None；
+    请求或解析失败时抛出 _ChunkSegmentationError，由调用方决定重新排队还是按原文保留。
+    提供 on_segments 时使用流式请求，每收到完整的一行就把修正后的片段交给 on_segments。
+    输出因达到输出上限被截断时，丢弃可能不完整的最后一行，对块内剩余的文本重新请求 (最多 continuations_left 次)；
+    续请求次数用完后仍被截断时，以不可重试的 _ChunkSegmentationError 交出已完整的片段与剩余文本，由调用方按原文保留。
+    可能在线程池中并发调用，只通过 _log_main_api 输出日志，不直接操作进度信号。
+    """
+    if continuations_left is None: continuations_left = app_config.LLM_CHUNK_MAX_CONTINUATIONS
+    user_content_with_summary = f"【全文摘要】:\n{summary_text}\n\n【当前文本块】:\n{chunk}"
+    if not summary_text: user_content_with_summary = f"【当前文本块】:\n{chunk}"
+
+    segments_from_chunk: List[str] = []
+    raw_lines: List[str] = []
+    retryable = False; member_specific = False
+    try:
+        if on_segments is None:
+            completion = client.complete(system_prompt_segmentation, user_content_with_summary)
+            if not is_running(): _log_main_api(f"API 对块 {chunk_label} 响应接收后任务已取消。"); return None, completion.from_cache
+            content = completion.content; finish_reason = completion.finish_reason; data = completion.data
+            from_cache = completion.from_cache; is_truncated = completion.is_truncated
+            raw_segment_count = 0
+            if content is not None:
+                raw_segments = [seg.strip() for seg in content.split('\n') if seg.strip()]
+                raw_segment_count = len(raw_segments)
+                raw_lines = raw_segments
+                if is_truncated: raw_segments = raw_segments[:-1]  # 最后一行可能不完整，留给续请求或按原文保留
+
+                # 预处理：检测并修正括号内容混合的分割
+                preprocessed_segments = _preprocess_bracket_mixed_segments(raw_segments, _log_main_api)
+
+                # 验证并可能修正分割结果
+                segments_from_chunk = _validate_and_fix_segments(preprocessed_segments, _log_main_api)
+        else:
+            # 流式模式：两个修正函数都逐行独立处理，逐行应用与整体应用结果相同
+            # 每行要等到下一行到达 (或流结束且未被截断) 才送出，截断时最后一行可能不完整
+            llm_stream = client.stream(system_prompt_segmentation, user_content_with_summary)
+            def _emit_line(line: str):
+                fixed_segments = _validate_and_fix_segments(_preprocess_bracket_mixed_segments([line], _log_main_api), _log_main_api)
+                if fixed_segments:
+                    segments_from_chunk.extend(fixed_segments)
+                    on_segments(fixed_segments)
+            for line in llm_stream.lines():
+                if not is_running():
+                    llm_stream.close()
+                    _log_main_api(f"API 对块 {chunk_label} 流式接收中任务已取消。"); return None, llm_stream.from_cache
+                line = line.strip()
+                if not line: continue
+                if raw_lines: _emit_line(raw_lines[-1])
+                raw_lines.append(line)
+            content = llm_stream.content; finish_reason = llm_stream.finish_reason; data = {}
+            from_cache = llm_stream.from_cache; is_truncated = llm_stream.is_truncated
+            raw_segment_count = len(raw_lines)
+            if raw_lines and not is_truncated: _emit_line(raw_lines[-1])
+
+        if content is not None:
+            # 处理分割结果
+            if raw_segment_count > 0:
+                _log_main_api(f"块 {chunk_label} 成功获得 {raw_segment_count} 个文本片段{'（缓存命中）' if from_cache else ''}")
+
+            _log_main_api(f"块 {chunk_label} 修正后获得 {len(segments_from_chunk)} 个片段。完成原因: {finish_reason}")
+            if is_truncated and continuations_left > 0:
+                # 从已完整输出的行之后继续：按这次实际输出了多少原文重新切分剩余部分；一行都没有完整输出时按半块切分
+                remainder = _remaining_text_after(chunk, raw_lines[:-1])
+                consumed_chars = len(chunk) - len(remainder)
+                piece_chars = int(consumed_chars * 0.9) if consumed_chars > 0 else len(chunk) // 2 + 1
+                pieces = _split_text_into_chunks(remainder, max(1, piece_chars), None, logger_func=_log_main_api) if remainder.strip() else []
+                _log_main_api(f"块 {chunk_label} 的输出被截断 (完成原因: {finish_reason})，对剩余的 {sum(len(p) for p in pieces)} 个字符分 {len(pieces)} 次重新请求。")
+                for piece_index, piece in enumerate(pieces):
+                    try:
+                        piece_segments, piece_from_cache = _segment_single_chunk(
+                            piece, f"{chunk_label}(续{piece_index+1})", client, system_prompt_segmentation, summary_text,
+                            is_running, _log_main_api, on_segments=on_segments, continuations_left=continuations_left - 1)
+                    except _ChunkSegmentationError as e:
+                        # 续请求失败：已得到的片段与尚未分割的剩余文本一并交给调用方
+                        raise _ChunkSegmentationError(segments_from_chunk + e.partial_segments,
+                                                      e.remaining_text + "".join(pieces[piece_index+1:]), e.retryable, e.member_specific)
+                    if piece_segments is None: return None, False
+                    segments_from_chunk.extend(piece_segments)
+                    from_cache = from_cache and piece_from_cache
+                return segments_from_chunk, from_cache
+            if is_truncated:
+                # 续请求次数已用完：不完整的最后一行与之后的文本都不能丢，交给调用方按原文保留
+                remainder = _remaining_text_after(chunk, raw_lines[:-1])
+                _log_main_api(f"警告: 块 {chunk_label} 的输出被截断 (完成原因: {finish_reason})，续请求次数已用完，剩余的 {len(remainder)} 个字符按原文保留。")
+                raise _ChunkSegmentationError(segments_from_chunk, remainder, retryable=False)
+            return segments_from_chunk, from_cache
+        else: 
+            error_info = data.get('error', {}); 
+            if not error_info and data.get("code") and data.get("message"): error_info = data 
+            error_msg = error_info.get('message', str(data)); error_type = error_info.get('type', error_info.get("status")); error_code_val = error_info.get('code')
+            _log_main_api(f"错误: LLM API 对块 {chunk_label} 的响应格式错误或API返回错误。类型: {error_type}, Code: {error_code_val}, 消息: {str(data)[:500]}")
+    except _ChunkSegmentationError: raise  # 截断后续请求失败或续请求次数用完，已带有完整的片段与剩余文本
+    except requests.exceptions.Timeout: _log_main_api(f"错误: LLM API 对块 {chunk_label} 的请求超时 ({client.transport.read_timeout}秒)。URL: {client.target_url}"); retryable = member_specific = True
+    except requests.exceptions.RequestException as e: 
+        error_details = ""; status_code = 'N/A'
+        retryable = e.response is None or e.response.status_code in LLM_RETRYABLE_STATUS_CODES
+        member_specific = retryable or e.response.status_code in LLM_MEMBER_SPECIFIC_STATUS_CODES
+        if e.response is not None:
+            status_code = e.response.status_code
+            try: 
+                err_json_data = e.response.json(); err_info_openai = err_json_data.get('error', {}); err_info_gemini = err_json_data if "message" in err_json_data and "code" in err_json_data else {}
+                message = err_info_openai.get('message', err_info_gemini.get('message', e.response.text)); err_type = err_info_openai.get('type', err_info_gemini.get('status', 'UnknownType')); err_code = err_info_openai.get('code', err_info_gemini.get('code', 'UnknownCode'))
+                error_details = f": [{err_type}/{err_code}] {message}"
+            except requests.exceptions.JSONDecodeError: error_details = f": {e.response.text[:200]}"
+        else: error_details = f": {str(e)}"
+        _log_main_api(f"错误: LLM API 对块 {chunk_label} 的请求失败 (状态码: {status_code}, URL: {client.target_url}){error_details}")
+    except Exception as e: _log_main_api(f"错误: 处理 LLM API 对块 {chunk_label} 的响应时发生未知错误 (URL: {client.target_url}): {e}"); _log_main_api(traceback.format_exc())
+    # 流式模式下除最后一行外都已送出，剩余文本从已送出的行之后算起
+    emitted_lines = raw_lines[:-1] if on_segments is not None else []
+    raise _ChunkSegmentationError(segments_from_chunk, _remaining_text_after(chunk, emitted_lines), retryable, member_specific)
+
+class SegmentStream:
+    """
+    按顺序逐个产生 LLM 分割片段的可迭代对象，供 SrtProcessor 在分割尚未完成时就开始对齐。
+
+    生产者线程调用 put / close，消费者直接迭代；迭代在流关闭且片段取完后结束。
+    failed 为 True 表示分割失败或被取消 (与 call_llm_api_for_segmentation 返回 None 的情况一致)。
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._segments: List[str] = []
+        self._closed = False
+        self.failed = False
+
+    def put(self, segments: List[str]):
+        with self._condition:
+            self._segments.extend(segments)
+            self._condition.notify_all()
+
+    def close(self, failed: bool = False):
+        with self._condition:
+            self._closed = True
+            self.failed = failed
+            self._condition.notify_all()
+
+    @property
+    def segments(self) -> List[str]:
+        """目前已产生的全部片段。"""
+        with self._condition:
+            return list(self._segments)
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self._segments) and not self._closed:
+                    self._condition.wait()
+                if index >= len(self._segments):
+                    return
+                segment = self._segments[index]
+            index += 1
+            yield segment
+
+
+class _OrderedSegmentEmitter:
+    """并发分块时按块顺序把片段送入 SegmentStream：靠后的块先到的片段暂存，等前面的块全部完成后再送出。"""
+
+    def __init__(self, sink: SegmentStream, num_chunks: int):
+        self._sink = sink
+        self._lock = threading.Lock()
+        self._buffers: List[List[str]] = [[] for _ in range(num_chunks)]
+        self._finished = [False] * num_chunks
+        self._cursor = 0
+
+    def add(self, chunk_index: int, segments: List[str]):
+        with self._lock:
+            if chunk_index == self._cursor:
+                self._sink.put(segments)
+            else:
+                self._buffers[chunk_index].extend(segments)
+
+    def finish(self, chunk_index: int):
+        with self._lock:
+            self._finished[chunk_index] = True
+            while self._cursor < len(self._finished) and self._finished[self._cursor]:
+                self._cursor += 1
+                if self._cursor < len(self._buffers) and self._buffers[self._cursor]:
+                    self._sink.put(self._buffers[self._cursor])
+                    self._buffers[self._cursor] = []
+
+def _sleep_while_running(seconds: float, is_running) -> bool:
+    """分段等待，期间任务被取消时提前返回 False。"""
+    deadline = time.perf_counter() + seconds
+    while True:
+        if not is_running(): return False
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0: return True
+        time.sleep(min(0.5, remaining))
+
+def _emit_llm_progress(signals_forwarder: Optional[Any], completed: int, total: int):
+    """通过 llm_progress_signal 报告分块分割进度 (0-100)。"""
+    if signals_forwarder and hasattr(signals_forwarder, 'llm_progress_signal') and hasattr(signals_forwarder.llm_progress_signal, 'emit'):
+        signals_forwarder.llm_progress_signal.emit(int((completed / total) * 100))
+
+def _log_chunk_latency_summary(chunk_latencies: Dict[int, float], wall_time: float, _log_main_api):
+    if not chunk_latencies: return
+    latencies = list(chunk_latencies.values())
+    _log_main_api(f"分块耗时统计: {len(latencies)} 块, 平均 {sum(latencies) / len(latencies):.1f}秒, "
+                  f"最长 {max(latencies):.1f}秒, 累计 {sum(latencies):.1f}秒, 实际总耗时 {wall_time:.1f}秒")
+
 def call_llm_api_for_segmentation(
     api_key: str, text_to_segment: str,
     custom_api_base_url_str: Optional[str], custom_model_name: Optional[str],
     custom_temperature: Optional[float],
     signals_forwarder: Optional[Any] = None, target_language: Optional[str] = None,
-    api_format: Optional[str] = None  # 新增：API格式参数
+    api_format: Optional[str] = None,  # 新增：API格式参数
+    max_concurrent_requests: Optional[int] = None,  # 同时在途的分块请求数，None 使用默认值
+    profile_id: Optional[str] = None,  # 模型配置ID，用于选择共享的HTTP连接池
+    segment_sink: Optional[SegmentStream] = None,  # 提供时使用流式请求，并按顺序把片段逐行送入其中
+    summary_mode: Optional[str] = None,  # 摘要生成方式 (LLM_SUMMARY_MODE_*)，None 使用默认值
+    context_tokens: Optional[int] = None,  # 模型上下文长度，用于规划分块大小，None 使用默认值
+    max_output_tokens: Optional[int] = None,  # 模型最大输出 tokens；指定时同时作为请求的输出上限
+    requests_per_minute: Optional[float] = None,  # 该模型配置每分钟最多发送的请求数，0 表示不限速，None 保持现有设置
+    client_pool: Optional[Any] = None,  # 负载均衡池 (LLMClientPool)，提供时分块请求在池中的各模型配置间分配
+    checkpoint: Optional[Any] = None,  # 任务检查点 (LLMCheckpoint)：已完成的块与摘要从中恢复，新完成的写入其中
+    transport: Optional[LLMTransport] = None  # 本次任务共享的传输对象 (get_profile_transport)，None 时按配置ID与主机取得
 ) -> Optional[List[str]]:
     def _log_main_api(message: str):
         _log_api_message(message, signals_forwarder, prefix="[LLM API - Main]")
@@ -514,6 +1143,20 @@ def call_llm_api_for_segmentation(
         api_format
     )
     effective_temperature = custom_temperature if custom_temperature is not None else app_config.DEFAULT_LLM_TEMPERATURE
+    if max_concurrent_requests is None: max_concurrent_requests = app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS
+    if summary_mode is None: summary_mode = app_config.DEFAULT_LLM_SUMMARY_MODE
+    if client_pool is not None:
+        # 负载均衡池模式：摘要与分块规划使用主配置，分块请求按各配置的延迟与错误率分配，同时在途数为各配置并发上限之和
+        client = client_pool.primary.client
+        max_concurrent_requests = client_pool.total_capacity
+        _log_main_api(f"负载均衡池: {len(client_pool.members)} 个模型配置 ({', '.join(m.name for m in client_pool.members)})，同时在途上限 {max_concurrent_requests}")
+    else:
+        # 摘要与所有分块共用同一个客户端与连接池，池大小至少容纳全部在途请求
+        if transport is None:
+            transport = get_profile_transport(custom_api_base_url_str, custom_model_name, api_format, profile_id,
+                                              max_concurrent_requests, requests_per_minute)
+        client = LLMClient(api_key, target_url, effective_model, api_format=api_format,
+                           temperature=custom_temperature, max_tokens=max_output_tokens, transport=transport)
 
     detected_lang_code_for_prompt = None
     # 1. 优先使用明确传入的目标语言 (来自ASR或用户选择)
@@ -559,127 +1202,302 @@ def call_llm_api_for_segmentation(
 
     _log_main_api(f"分割任务选用的系统提示词语言: {detected_lang_code_for_prompt or 'Universal (Auto)'}")
 
-    summary_text = ""
-    if text_to_segment.strip():
-        _log_main_api("尝试获取全文摘要...")
-        summary_text_optional = _get_summary(
-            api_key, text_to_segment, system_prompt_summary_task,
-            custom_api_base_url_str, custom_model_name, effective_temperature,
-            signals_forwarder=signals_forwarder
-        )
-        if summary_text_optional: summary_text = summary_text_optional; _log_main_api("成功获取到摘要。")
-        else: _log_main_api("未能获取到摘要，将不带摘要继续进行分割。")
-    else: _log_main_api("输入文本为空，跳过摘要获取。")
+    if not text_to_segment.strip(): _log_main_api("输入文本为空，跳过摘要获取。"); return []
 
     all_segments: List[str] = []
-    text_chunks = _split_text_into_chunks(text_to_segment, MAX_CHARS_PER_CHUNK, signals_forwarder)
+    # 按 token 预算决定块大小：未指定输出上限时，OpenAI 兼容格式按服务端常见默认值估计，Claude / Gemini 按请求中固定发送的上限
+    output_budget = max_output_tokens or (app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET if client.api_format == app_config.API_FORMAT_OPENAI
+                                          else LLM_DEFAULT_MAX_OUTPUT_TOKENS)
+    planner = ChunkPlanner(context_tokens=context_tokens, max_output_tokens=output_budget)
+    max_chunk_chars = planner.max_chunk_chars(text_to_segment, system_prompt_segmentation)
+    _log_main_api(f"分块规划: 上下文 {planner.context_tokens} tokens, 输出上限 {planner.max_output_tokens} tokens, "
+                  f"每块约 {planner.max_chunk_tokens(system_prompt_segmentation)} tokens (约 {max_chunk_chars} 字符)")
+    text_chunks = _split_text_into_chunks(text_to_segment, max_chunk_chars, signals_forwarder)
+    if not text_chunks: text_chunks = [text_to_segment]
     num_chunks = len(text_chunks)
-    if num_chunks == 0: 
-        if text_to_segment.strip(): text_chunks = [text_to_segment]; num_chunks = 1
-        else: return []
-
-    for i, chunk in enumerate(text_chunks):
-        if not is_running(): _log_main_api(f"处理块 {i+1}/{num_chunks} 前任务已取消。"); return all_segments if all_segments else None 
-        _log_main_api(f"向 LLM API 发送块 {i+1}/{num_chunks} 进行分割 (URL: {target_url}, 模型: {effective_model}, 温度: {effective_temperature})...")
-        
-        user_content_with_summary = f"【全文摘要】:\n{summary_text}\n\n【当前文本块】:\n{chunk}"
-        if not summary_text: user_content_with_summary = f"【当前文本块】:\n{chunk}"
-
-        # 根据确定的API格式构建请求
-        if api_format == app_config.API_FORMAT_GEMINI or "generativelanguage.googleapis.com" in target_url:
-            # Gemini API 使用不同的请求格式和认证方式
-            payload = {
-                "contents": [{"parts": [{"text": f"系统提示：{system_prompt_segmentation}\n\n用户输入：{user_content_with_summary}"}]}],
-                "generationConfig": {
-                    "temperature": effective_temperature,
-                    "maxOutputTokens": 8192
-                }
-            }
-            # Gemini API 使用 URL 参数传递 API key
-            response = requests.post(f"{target_url}?key={api_key}", json=payload, timeout=180)
-        elif api_format == app_config.API_FORMAT_CLAUDE or "/v1/messages" in target_url:
-            # Claude API 使用 /v1/messages 格式
-            payload = {
-                "model": effective_model,
-                "max_tokens": 8192,
-                "messages": [{"role": "user", "content": f"系统提示：{system_prompt_segmentation}\n\n用户输入：{user_content_with_summary}"}]
-            }
-            if custom_temperature is not None: payload["temperature"] = effective_temperature
+    max_in_flight = max(1, min(int(max_concurrent_requests), num_chunks))
+
+    # 检查点：块的记录以 (模型, 分割提示词, 块文本) 为键，分块规划变化时对不上的块会重新请求
+    chunk_checkpoint_keys = [make_checkpoint_key(client.model, system_prompt_segmentation, chunk) for chunk in text_chunks] if checkpoint is not None else []
+    restored_chunks: Dict[int, List[str]] = {}
+    for i, key in enumerate(chunk_checkpoint_keys):
+        restored_segments = checkpoint.get("chunk", key)
+        if restored_segments is not None: restored_chunks[i] = restored_segments
+    if restored_chunks:
+        first_missing = next((i for i in range(num_chunks) if i not in restored_chunks), None)
+        _log_main_api(f"从检查点恢复了 {len(restored_chunks)}/{num_chunks} 个块" +
+                      (f"，从块 {first_missing+1} 继续。" if first_missing is not None else "，无需再发送分割请求。"))
+    def _checkpoint_chunk(index: int, segments: List[str]):
+        if checkpoint is not None: checkpoint.put("chunk", chunk_checkpoint_keys[index], segments)
+
+    # 摘要段由相邻的分割块组成，流水线模式下每块只依赖所在段与前一段的摘要
+    section_of_chunk = _group_chunks_into_sections(text_chunks, app_config.LLM_SUMMARY_SECTION_MAX_CHARS)
+    num_sections = section_of_chunk[-1] + 1
+    section_texts = ["".join(chunk for chunk, section in zip(text_chunks, section_of_chunk) if section == s) for s in range(num_sections)]
+    if summary_mode == app_config.LLM_SUMMARY_MODE_FULL and len(text_to_segment) > app_config.LLM_SUMMARY_FULL_MAX_CHARS:
+        _log_main_api(f"全文 {len(text_to_segment)} 字符超过单次摘要上限 {app_config.LLM_SUMMARY_FULL_MAX_CHARS}，改为分段摘要后合并。")
+        summary_mode = app_config.LLM_SUMMARY_MODE_MAP_REDUCE
+    if summary_mode != app_config.LLM_SUMMARY_MODE_FULL and num_sections == 1:
+        summary_mode = app_config.LLM_SUMMARY_MODE_FULL  # 只有一段时分段摘要就是全文摘要
+    pipelined = summary_mode == app_config.LLM_SUMMARY_MODE_PIPELINED
 
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-                "anthropic-version": "2023-06-01"
-            }
-            response = requests.post(target_url, headers=headers, json=payload, timeout=180)
+    summary_text = ""
+    section_summaries: Dict[int, Optional[str]] = {}  # 流水线模式下已完成的段摘要 (失败为 None)
+    def _summarize_section(section: int) -> Optional[str]:
+        checkpoint_key = make_checkpoint_key(client.model, system_prompt_summary_task, section_texts[section]) if checkpoint is not None else None
+        if checkpoint_key is not None and checkpoint.get("section_summary", checkpoint_key):
+            return checkpoint.get("section_summary", checkpoint_key)
+        section_summary = _get_summary(api_key, section_texts[section], system_prompt_summary_task,
+                                       custom_api_base_url_str, custom_model_name, effective_temperature,
+                                       signals_forwarder=signals_forwarder, client=client, section_label=f"段 {section+1}/{num_sections}")
+        if checkpoint_key is not None and section_summary: checkpoint.put("section_summary", checkpoint_key, section_summary)
+        return section_summary
+    def _sections_needed_by(index: int) -> List[int]:
+        section = section_of_chunk[index]
+        return [section - 1, section] if section > 0 else [section]
+    def _summary_for_chunk(index: int) -> str:
+        if not pipelined: return summary_text
+        return "\n\n".join(section_summaries[s] for s in _sections_needed_by(index) if section_summaries.get(s))
+
+    summary_checkpoint_key = make_checkpoint_key(summary_mode, client.model, system_prompt_summary_task, text_to_segment) if checkpoint is not None else None
+    summary_started_at = time.perf_counter()
+    if pipelined:
+        _log_main_api(f"流水线摘要: 全文分为 {num_sections} 段摘要，每块在所在段与前一段的摘要完成后即开始分割。")
+    elif len(restored_chunks) == num_chunks:
+        _log_main_api("所有块都已从检查点恢复，跳过摘要。")
+    elif summary_checkpoint_key is not None and checkpoint.get("summary", summary_checkpoint_key):
+        summary_text = checkpoint.get("summary", summary_checkpoint_key)
+        _log_main_api("从检查点恢复了摘要。")
+    else:
+        if summary_mode == app_config.LLM_SUMMARY_MODE_MAP_REDUCE:
+            _log_main_api(f"尝试分 {num_sections} 段获取摘要并合并...")
+            summary_text_optional = _get_map_reduce_summary(client, section_texts, system_prompt_summary_task,
+                                                            effective_temperature, signals_forwarder, int(max_concurrent_requests))
         else:
-            # OpenAI 兼容格式 (默认格式)
-            payload = {"model": effective_model, "messages": [{"role": "system", "content": system_prompt_segmentation}, {"role": "user", "content": user_content_with_summary }]}
-            if custom_temperature is not None: payload["temperature"] = effective_temperature
-
-            headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
-            response = requests.post(target_url, headers=headers, json=payload, timeout=180)
+            _log_main_api("尝试获取全文摘要...")
+            summary_text_optional = _get_summary(
+                api_key, text_to_segment, system_prompt_summary_task,
+                custom_api_base_url_str, custom_model_name, effective_temperature,
+                signals_forwarder=signals_forwarder, client=client
+            )
+        if summary_text_optional:
+            summary_text = summary_text_optional; _log_main_api(f"成功获取到摘要，耗时 {time.perf_counter() - summary_started_at:.1f}秒。")
+            if summary_checkpoint_key is not None: checkpoint.put("summary", summary_checkpoint_key, summary_text)
+        else: _log_main_api("未能获取到摘要，将不带摘要继续进行分割。")
 
+    chunk_kwargs = dict(
+        system_prompt_segmentation=system_prompt_segmentation,
+        is_running=is_running, _log_main_api=_log_main_api
+    )
+    chunk_latencies: Dict[int, float] = {}
+    failed_chunks = 0  # 重试用尽后按原文保留的块数
+    fallback_segment_count = 0  # 按原文保留的行数；失败的块在失败前得到的片段仍算作有效的分割结果
+    segmentation_started_at = time.perf_counter()
+    emitter = _OrderedSegmentEmitter(segment_sink, num_chunks) if segment_sink is not None else None
+    def _chunk_sink(index: int):
+        if emitter is None: return None
+        return lambda segments: emitter.add(index, segments)
+
+    def _run_chunk(index: int, chunk_text: str, avoid: Optional[Any] = None):
+        """
+        发送块 index 的分割请求。负载均衡池模式下从池中选择配置 (avoid 为该块上次失败的配置) 并报告结果；
+        失败时记下失败的配置；失败只与该配置有关 (瞬时错误或认证失败) 且池中还有其他可用配置时标记为可重试，
+        重新排队时换用其他配置。请求本身有问题 (如 400、超出上下文长度) 时保留原有的可重试标记，不在各配置间反复发送。
+        """
+        chunk_label = f"{index+1}/{num_chunks}"
+        if client_pool is None:
+            return _segment_single_chunk(chunk_text, chunk_label, client=client, summary_text=_summary_for_chunk(index),
+                                         on_segments=_chunk_sink(index), **chunk_kwargs)
+        member = client_pool.acquire(avoid=avoid)
+        started_at = time.perf_counter(); success = None
         try:
-            if not is_running(): _log_main_api(f"API 对块 {i+1}/{num_chunks} 响应接收后任务已取消。"); return all_segments if all_segments else None
-            response.raise_for_status(); data = response.json()
-            if not is_running(): _log_main_api(f"API 对块 {i+1}/{num_chunks} 响应解析后任务已取消。"); return all_segments if all_segments else None
-            content = None; finish_reason = "unknown"
-            if "choices" in data and data["choices"] and isinstance(data["choices"], list) and len(data["choices"]) > 0 and \
-               isinstance(data["choices"][0], dict) and data["choices"][0].get("message", {}).get("content") is not None:
-                choice = data["choices"][0]; content = choice.get("message", {}).get("content"); finish_reason = choice.get("finish_reason", "unknown")
-            elif data.get("candidates") and isinstance(data["candidates"], list) and len(data["candidates"]) > 0 and \
-                 isinstance(data["candidates"][0], dict) and \
-                 data["candidates"][0].get("content", {}).get("parts", [{}]) and \
-                 isinstance(data["candidates"][0].get("content").get("parts"), list) and \
-                 len(data["candidates"][0].get("content").get("parts")) > 0 and \
-                 isinstance(data["candidates"][0].get("content").get("parts")[0], dict) and \
-                 data["candidates"][0].get("content").get("parts")[0].get("text") is not None:
-                content = data["candidates"][0].get("content").get("parts")[0].get("text"); finish_reason = data["candidates"][0].get("finishReason", "unknown")
-
-            if content is not None:
-                raw_segments = [seg.strip() for seg in content.split('\n') if seg.strip()]
-                segments_from_chunk = []
+            result = _segment_single_chunk(chunk_text, f"{chunk_label}@{member.name}", client=member.client,
+                                           summary_text=_summary_for_chunk(index), on_segments=_chunk_sink(index), **chunk_kwargs)
+            if result[0] is not None: success = True
+            return result
+        except _ChunkSegmentationError as e:
+            success = False
+            e.failed_member = member
+            if e.member_specific and client_pool.has_alternative(member): e.retryable = True
+            raise
+        finally:
+            client_pool.release(member, time.perf_counter() - started_at, success)
+
+    def _requeue_delay(requeues: int, error: _ChunkSegmentationError) -> float:
+        """失败块重新发送前的等待时间；池中还有其他可用配置时立即换用，不必退避。"""
+        failed_member = getattr(error, "failed_member", None)
+        if failed_member is not None and client_pool.has_alternative(failed_member): return 0.0
+        return _retry_delay(requeues)
+
+    if max_in_flight == 1:
+        for i, chunk in enumerate(text_chunks):
+            if not is_running(): _log_main_api(f"处理块 {i+1}/{num_chunks} 前任务已取消。"); return all_segments if all_segments else None 
+            if i in restored_chunks:
+                if emitter is not None: emitter.add(i, restored_chunks[i]); emitter.finish(i)
+                all_segments.extend(restored_chunks[i])
+                _emit_llm_progress(signals_forwarder, i + 1, num_chunks)
+                continue
+            if pipelined:
+                for section in _sections_needed_by(i):
+                    if section not in section_summaries: section_summaries[section] = _summarize_section(section)
+            _log_main_api(f"向 LLM API 发送块 {i+1}/{num_chunks} 进行分割 (URL: {target_url}, 模型: {effective_model}, 温度: {effective_temperature})...")
+            chunk_started_at = time.perf_counter()
+            segments_from_chunk: List[str] = []; chunk_text = chunk; attempt = 0; avoid = None; fell_back = False
+            while True:
+                try:
+                    chunk_part, from_cache = _run_chunk(i, chunk_text, avoid)
+                except _ChunkSegmentationError as e:
+                    segments_from_chunk.extend(e.partial_segments); from_cache = False
+                    if e.retryable and attempt < app_config.LLM_CHUNK_MAX_REQUEUES:
+                        delay = _requeue_delay(attempt + 1, e); avoid = getattr(e, "failed_member", None)
+                        _log_main_api(f"块 {i+1}/{num_chunks} 请求失败，{delay:.1f}秒后重试剩余的 {len(e.remaining_text)} 个字符 ({attempt+1}/{app_config.LLM_CHUNK_MAX_REQUEUES})。")
+                        if not _sleep_while_running(delay, is_running): _log_main_api(f"等待重试块 {i+1}/{num_chunks} 时任务已取消。"); return all_segments if all_segments else None
+                        chunk_text = e.remaining_text; attempt += 1
+                        continue
+                    chunk_part = _fallback_segments(e.remaining_text); failed_chunks += 1; fell_back = True
+                    fallback_segment_count += len(chunk_part)
+                    _log_main_api(f"警告: 块 {i+1}/{num_chunks} 分割失败，按原文保留剩余的 {len(chunk_part)} 行未分割文本。")
+                    if emitter is not None: emitter.add(i, chunk_part)
+                if chunk_part is None: return all_segments if all_segments else None
+                segments_from_chunk.extend(chunk_part)
+                break
+            if emitter is not None: emitter.finish(i)
+            if not fell_back: _checkpoint_chunk(i, segments_from_chunk)
+            chunk_latencies[i] = time.perf_counter() - chunk_started_at
+            _log_main_api(f"块 {i+1}/{num_chunks} 耗时 {chunk_latencies[i]:.1f}秒")
+            all_segments.extend(segments_from_chunk)
+            _emit_llm_progress(signals_forwarder, i + 1, num_chunks)
+            if num_chunks > 1 and i < num_chunks - 1 and not from_cache:
+                if not is_running(): _log_main_api(f"处理完块 {i+1}/{num_chunks} 后任务已取消，不再延时。"); return all_segments if all_segments else None
+                time.sleep(0.5)
+    else:
+        # 并发模式：最多 max_in_flight 个请求同时在途，完成后按块序号放回原位。
+        # 进度与取消检查都在调用线程中进行，工作线程只负责请求与解析。
+        # 流水线摘要时段摘要请求与分块请求共用在途名额：下一块所需的摘要已完成就发送该块，否则先发送下一段的摘要。
+        # 失败的块 (超时、429/5xx 重试用尽) 退避后重新排队，只重发尚未分割的剩余文本，且优先于新块发送。
+        _log_main_api(f"并发分割 {num_chunks} 个块，同时在途请求上限: {max_in_flight} (URL: {target_url}, 模型: {effective_model}, 温度: {effective_temperature})")
+        chunk_results: Dict[int, List[str]] = {}
+        partial_results: Dict[int, List[str]] = {}  # 重新排队的块在失败前已得到的片段
+        for index in sorted(restored_chunks):
+            chunk_results[index] = restored_chunks[index]
+            if emitter is not None: emitter.add(index, restored_chunks[index]); emitter.finish(index)
+        if restored_chunks: _emit_llm_progress(signals_forwarder, len(chunk_results), num_chunks)
+        pending: Dict[Any, Tuple[int, int, str]] = {}  # future -> (块序号, 重新排队次数, 本次发送的文本)
+        summary_pending: Dict[Any, int] = {}
+        retry_queue: List[Tuple[float, int, str, int, Any]] = []  # (可重新发送的时间, 块序号, 剩余文本, 重新排队次数, 上次失败的池配置)
+        chunk_started_at: Dict[int, float] = {}
+        next_index = 0; next_section = 0; cancelled = False
+        executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-segment")
+        try:
+            while next_index < num_chunks or pending or summary_pending or retry_queue:
+                if not is_running():
+                    _log_main_api(f"任务已取消，已完成 {len(chunk_results)}/{num_chunks} 块，放弃剩余 {num_chunks - len(chunk_results)} 块。")
+                    cancelled = True; break
+                while len(pending) + len(summary_pending) < max_in_flight:
+                    now = time.perf_counter()
+                    due_retries = [item for item in retry_queue if item[0] <= now]
+                    if due_retries:
+                        retry_item = min(due_retries, key=lambda item: item[1]); retry_queue.remove(retry_item)
+                        _, index, chunk_text, requeues, avoid = retry_item
+                        _log_main_api(f"重新发送块 {index+1}/{num_chunks} 的剩余文本 ({requeues}/{app_config.LLM_CHUNK_MAX_REQUEUES})...")
+                        future = executor.submit(_run_chunk, index, chunk_text, avoid)
+                        pending[future] = (index, requeues, chunk_text)
+                        continue
+                    while next_index < num_chunks and next_index in restored_chunks: next_index += 1
+                    if next_index >= num_chunks: break
+                    if pipelined and any(s not in section_summaries for s in _sections_needed_by(next_index)):
+                        if next_section >= num_sections: break
+                        summary_pending[executor.submit(_summarize_section, next_section)] = next_section
+                        next_section += 1
+                        continue
+                    _log_main_api(f"向 LLM API 发送块 {next_index+1}/{num_chunks} 进行分割...")
+                    chunk_started_at[next_index] = time.perf_counter()
+                    future = executor.submit(_run_chunk, next_index, text_chunks[next_index])
+                    pending[future] = (next_index, 0, text_chunks[next_index]); next_index += 1
+                # 定时唤醒以便及时响应取消与发送到期的重试
+                in_flight = list(pending) + list(summary_pending)
+                if not in_flight:
+                    if retry_queue: time.sleep(min(0.5, max(0.0, min(item[0] for item in retry_queue) - time.perf_counter())))
+                    continue
+                done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in summary_pending:
+                        section = summary_pending.pop(future)
+                        try: section_summaries[section] = future.result()
+                        except Exception as e: _log_main_api(f"错误: 段 {section+1}/{num_sections} 摘要时发生未知错误: {e}"); section_summaries[section] = None
+                        continue
+                    index, requeues, sent_text = pending.pop(future)
+                    chunk_latencies[index] = time.perf_counter() - chunk_started_at[index]
+                    fell_back = False
+                    try: segments_from_chunk, _ = future.result()
+                    except _ChunkSegmentationError as e:
+                        partial_results.setdefault(index, []).extend(e.partial_segments)
+                        if e.retryable and requeues < app_config.LLM_CHUNK_MAX_REQUEUES:
+                            delay = _requeue_delay(requeues + 1, e)
+                            retry_queue.append((time.perf_counter() + delay, index, e.remaining_text, requeues + 1, getattr(e, "failed_member", None)))
+                            _log_main_api(f"块 {index+1}/{num_chunks} 请求失败，{delay:.1f}秒后重新排队剩余的 {len(e.remaining_text)} 个字符。")
+                            continue
+                        segments_from_chunk = _fallback_segments(e.remaining_text); failed_chunks += 1; fell_back = True
+                        fallback_segment_count += len(segments_from_chunk)
+                        _log_main_api(f"警告: 块 {index+1}/{num_chunks} 分割失败，按原文保留剩余的 {len(segments_from_chunk)} 行未分割文本。")
+                        if emitter is not None: emitter.add(index, segments_from_chunk)
+                    except Exception as e:
+                        # 意外错误：与重试用尽一样按原文保留本次发送的文本 (之前失败时已得到的片段保存在 partial_results 中)
+                        segments_from_chunk = _fallback_segments(sent_text); failed_chunks += 1; fell_back = True
+                        fallback_segment_count += len(segments_from_chunk)
+                        _log_main_api(f"错误: 块 {index+1}/{num_chunks} 处理时发生未知错误: {e}，按原文保留 {len(segments_from_chunk)} 行未分割文本。")
+                        if emitter is not None: emitter.add(index, segments_from_chunk)
+                    if segments_from_chunk is None: cancelled = True; continue
+                    chunk_results[index] = partial_results.pop(index, []) + segments_from_chunk
+                    if not fell_back: _checkpoint_chunk(index, chunk_results[index])
+                    if emitter is not None: emitter.finish(index)
+                    _log_main_api(f"块 {index+1}/{num_chunks} 完成，耗时 {chunk_latencies[index]:.1f}秒 (已完成 {len(chunk_results)}/{num_chunks})")
+                    _emit_llm_progress(signals_forwarder, len(chunk_results), num_chunks)
+                if cancelled: break
+        finally:
+            # 未开始的请求直接取消；已在途的请求无法中断，交由后台线程自行结束
+            for future in list(pending) + list(summary_pending): future.cancel()
+            executor.shutdown(wait=False)
+
+        # 按块顺序拼接；取消时只保留从第一块开始连续完成的部分
+        for i in range(num_chunks):
+            if i not in chunk_results:
+                if cancelled: break
+                continue
+            all_segments.extend(chunk_results[i])
+        if cancelled:
+            _log_chunk_latency_summary(chunk_latencies, time.perf_counter() - segmentation_started_at, _log_main_api)
+            _log_main_api(f"LLM 用量: {client.usage.describe()}")
+            if client_pool is not None: _log_main_api(f"负载均衡池统计: {client_pool.describe()}")
+            return all_segments if all_segments else None
+
+    _log_chunk_latency_summary(chunk_latencies, time.perf_counter() - segmentation_started_at, _log_main_api)
+    _log_main_api(f"LLM 用量 (含摘要): {client.usage.describe()}，摘要与分割总耗时 {time.perf_counter() - summary_started_at:.1f}秒")
+    if client_pool is not None: _log_main_api(f"负载均衡池统计: {client_pool.describe()}")
+    if len(all_segments) <= fallback_segment_count: _log_main_api("所有块处理完毕，但未能从任何块中获取到有效的分割结果。"); return None 
+    if failed_chunks: _log_main_api(f"警告: {failed_chunks}/{num_chunks} 个块分割失败，其文本已按原文行保留。")
+    _log_main_api(f"所有 {num_chunks} 个块处理完成。总共收集到 {len(all_segments)} 个片段。"); return all_segments
 
-                # 处理分割结果
-                if len(raw_segments) > 0:
-                    _log_main_api(f"块 {i+1}/{num_chunks} 成功获得 {len(raw_segments)} 个文本片段")
+def stream_llm_api_for_segmentation(**kwargs) -> SegmentStream:
+    """
+    在后台线程中以流式模式运行 call_llm_api_for_segmentation (参数相同)，立即返回 SegmentStream。
 
-                # 预处理：检测并修正括号内容混合的分割
-                preprocessed_segments = _preprocess_bracket_mixed_segments(raw_segments, _log_main_api)
+    片段按原文顺序、每行完成时即送出，调用方可以一边接收一边对齐；
+    分割失败或被取消时流以 failed=True 关闭。
+    """
+    segment_stream = SegmentStream()
 
-                # 验证并可能修正分割结果
-                segments_from_chunk = _validate_and_fix_segments(preprocessed_segments, _log_main_api)
+    def _run():
+        result = None
+        try:
+            result = call_llm_api_for_segmentation(segment_sink=segment_stream, **kwargs)
+        except Exception as e:
+            _log_api_message(f"流式分割出错: {e}", kwargs.get("signals_forwarder"), prefix="[LLM API - Main]")
+        finally:
+            segment_stream.close(failed=result is None)
 
-                all_segments.extend(segments_from_chunk)
-                _log_main_api(f"块 {i+1}/{num_chunks} 修正后获得 {len(segments_from_chunk)} 个片段。完成原因: {finish_reason}")
-                if finish_reason == "length" or finish_reason == "MAX_TOKENS":
-                    _log_main_api(f"警告: 块 {i+1}/{num_chunks} 的输出可能因为达到API的默认max_tokens限制而被截断。")
-            else: 
-                error_info = data.get('error', {}); 
-                if not error_info and data.get("code") and data.get("message"): error_info = data 
-                error_msg = error_info.get('message', str(data)); error_type = error_info.get('type', error_info.get("status")); error_code_val = error_info.get('code')
-                _log_main_api(f"错误: LLM API 对块 {i+1}/{num_chunks} 的响应格式错误或API返回错误。类型: {error_type}, Code: {error_code_val}, 消息: {str(data)[:500]}")
-        except requests.exceptions.Timeout: _log_main_api(f"错误: LLM API 对块 {i+1}/{num_chunks} 的请求超时 (180秒)。URL: {target_url}")
-        except requests.exceptions.RequestException as e: 
-            error_details = ""; status_code = 'N/A'
-            if e.response is not None:
-                status_code = e.response.status_code
-                try: 
-                    err_json_data = e.response.json(); err_info_openai = err_json_data.get('error', {}); err_info_gemini = err_json_data if "message" in err_json_data and "code" in err_json_data else {}
-                    message = err_info_openai.get('message', err_info_gemini.get('message', e.response.text)); err_type = err_info_openai.get('type', err_info_gemini.get('status', 'UnknownType')); err_code = err_info_openai.get('code', err_info_gemini.get('code', 'UnknownCode'))
-                    error_details = f": [{err_type}/{err_code}] {message}"
-                except requests.exceptions.JSONDecodeError: error_details = f": {e.response.text[:200]}"
-            else: error_details = f": {str(e)}"
-            _log_main_api(f"错误: LLM API 对块 {i+1}/{num_chunks} 的请求失败 (状态码: {status_code}, URL: {target_url}){error_details}")
-        except Exception as e: _log_main_api(f"错误: 处理 LLM API 对块 {i+1}/{num_chunks} 的响应时发生未知错误 (URL: {target_url}): {e}"); _log_main_api(traceback.format_exc())
-        if signals_forwarder and hasattr(signals_forwarder, 'llm_progress_signal') and hasattr(signals_forwarder.llm_progress_signal, 'emit'):
-             signals_forwarder.llm_progress_signal.emit(int(((i + 1) / num_chunks) * 100))
-        if num_chunks > 1 and i < num_chunks - 1:
-            if not is_running(): _log_main_api(f"处理完块 {i+1}/{num_chunks} 后任务已取消，不再延时。"); return all_segments if all_segments else None
-            time.sleep(0.5)
-    if not all_segments and text_to_segment.strip(): _log_main_api("所有块处理完毕，但未能从任何块中获取到有效的分割结果。"); return None 
-    _log_main_api(f"所有 {num_chunks} 个块处理完成。总共收集到 {len(all_segments)} 个片段。"); return all_segments
+    threading.Thread(target=_run, name="llm-segment-stream", daemon=True).start()
+    return segment_stream
 
 # --- 测试连接函数 ---
 def _preprocess_bracket_mixed_segments(segments: List[str], logger_func) -> List[str]:
@@ -852,13 +1670,11 @@ def test_llm_connection(
             custom_api_base_url_str, custom_model_name,
             app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME
         )
-        payload = {"model": effective_model, "messages": [{"role": "user", "content": "Hello"}]}
-        if custom_temperature is not None:
-            payload["temperature"] = test_temperature
-        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+        client = LLMClient(api_key, target_url, effective_model, api_format=app_config.API_FORMAT_OPENAI,
+                           temperature=custom_temperature, max_retries=0, cache=None)
 
     try:
-        response = requests.post(target_url, headers=headers, json=payload, timeout=20)
+        response = client.send("", "Hello", timeout=20)
         response.raise_for_status()
         data = response.json()
 
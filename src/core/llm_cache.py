@@ -0,0 +1,133 @@
+"""
+LLM 响应磁盘缓存模块
+
+以 (API格式, 模型, 系统提示, 用户内容, 温度, 输出上限) 的哈希为键，把成功的 LLM 响应文本
+持久化到 ~/.heal_jimaku/cache。同一文件仅修改 SRT 参数重新处理时，摘要、分块分割和 AI 校正
+批次都可以直接命中缓存，不再消耗 token。缓存按总大小上限以 LRU (文件修改时间) 淘汰。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+import config as app_config
+
+
+def make_cache_key(api_format: str, model: str, system: str, user: str,
+                   temperature: Optional[float], max_tokens: Optional[int]) -> str:
+    """计算请求内容的 SHA-256 键。"""
+    material = json.dumps([api_format, model, system, user, temperature, max_tokens],
+                          ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    内容寻址的 LLM 响应缓存。
+
+    每条记录是 <目录>/<键前2位>/<键>.json；读取命中时更新文件修改时间，
+    写入后若总大小超过上限，则从最久未使用的记录开始删除，直到降到上限的 90%。
+    所有 I/O 错误都被吞掉并视为未命中，缓存永远不会让请求失败。
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # 首次写入时扫描目录得到
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path_for(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            return None
+        return record if isinstance(record, dict) and record.get("content") is not None else None
+
+    def put(self, key: str, content: str, finish_reason: str, model: str):
+        path = self._path_for(key)
+        record = {"content": content, "finish_reason": finish_reason, "model": model, "created_at": time.time()}
+        data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self._total_bytes is None:
+                    self._total_bytes = sum(size for _, _, size in self._scan())
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - previous_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict(int(self.max_bytes * 0.9))
+            except OSError:
+                pass
+
+    def clear(self):
+        """删除全部缓存记录。"""
+        with self._lock:
+            for path, _, _ in self._scan():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def _scan(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self, target_bytes: int):
+        entries = sorted(self._scan(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """返回全局响应缓存；缓存被禁用时返回 None。"""
+    global _cache_instance
+    if not app_config.DEFAULT_LLM_CACHE_ENABLED:
+        return None
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            _cache_instance = LLMResponseCache(app_config.LLM_CACHE_DIR, app_config.LLM_CACHE_MAX_MB * 1024 * 1024)
+        return _cache_instance
@@ -0,0 +1,120 @@
+"""
+LLM 任务检查点模块
+
+把已完成的分割块、摘要和 AI 校正批次的结果逐条追加写入输出目录中的检查点文件 (JSON Lines)。
+任务被停止或崩溃后重新处理同一输入时，已完成的部分直接从检查点恢复，只请求缺失的块与批次。
+检查点以输入文本的哈希标识：输入变化后旧的检查点不再使用，首次写入时被覆盖；任务成功完成后删除。
+
+与 LLMResponseCache 的区别：缓存按请求内容全局复用且可能被关闭或淘汰，检查点只服务于同一任务的续跑，
+并且记录的是修正后的最终片段，恢复时不需要重新请求摘要，也不受缓存开关与淘汰的影响。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple, TextIO
+
+CHECKPOINT_VERSION = 1
+
+
+def make_checkpoint_key(*parts: Any) -> str:
+    """计算检查点记录 (或整个输入) 的 SHA-256 键。"""
+    material = json.dumps(list(parts), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCheckpoint:
+    """
+    追加写入的检查点文件，可在多个线程间共享。
+
+    第一行为 {"version", "input_hash"} 头部，之后每行一条 {"kind", "key", "value"} 记录。
+    每条记录写入后立即 flush，进程崩溃时最多丢失最后一条不完整的记录 (读取时跳过)。
+    所有 I/O 错误都被吞掉，检查点永远不会让任务失败。
+    """
+
+    def __init__(self, path: str, input_hash: str):
+        self.path = path
+        self.input_hash = input_hash
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, str], Any] = {}
+        self._file: Optional[TextIO] = None
+        self._resumable = False  # 现有文件属于同一输入，可以在其后追加
+        self._needs_newline = False  # 现有文件末尾是崩溃时写了一半的记录
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return
+        lines = content.split("\n")
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return
+        if not isinstance(header, dict) or header.get("version") != CHECKPOINT_VERSION or header.get("input_hash") != self.input_hash:
+            return
+        self._resumable = True
+        self._needs_newline = not content.endswith("\n")
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+                self._records[(record["kind"], record["key"])] = record["value"]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    @property
+    def restored_count(self) -> int:
+        """从检查点文件中读到的记录数。"""
+        return len(self._records)
+
+    def get(self, kind: str, key: str) -> Any:
+        with self._lock:
+            return self._records.get((kind, key))
+
+    def put(self, kind: str, key: str, value: Any):
+        line = json.dumps({"kind": kind, "key": key, "value": value}, ensure_ascii=False)
+        with self._lock:
+            self._records[(kind, key)] = value
+            try:
+                if self._file is None:
+                    self._file = self._open_for_append()
+                self._file.write(line + "\n")
+                self._file.flush()
+            except OSError:
+                pass
+
+    def _open_for_append(self) -> TextIO:
+        if self._resumable:
+            f = open(self.path, "a", encoding="utf-8")
+            if self._needs_newline:
+                f.write("\n")
+            return f
+        f = open(self.path, "w", encoding="utf-8")
+        f.write(json.dumps({"version": CHECKPOINT_VERSION, "input_hash": self.input_hash}) + "\n")
+        return f
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+
+    def discard(self):
+        """任务成功完成后删除检查点文件。"""
+        self.close()
+        with self._lock:
+            self._records.clear()
+            self._resumable = False
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
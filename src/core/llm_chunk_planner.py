@@ -0,0 +1,176 @@
+"""
+LLM 分块规划模块
+
+按 token 而不是固定字符数决定分割块的大小。同样的字符数在不同语言下对应的 token 数相差数倍
+(CJK 文字约 1 字符 1 token，英文约 4 字符 1 token)，固定的字符上限会让英文等文本的请求次数远多于必要。
+规划器根据模型配置的上下文长度与输出上限计算每块可容纳的 token 数，再按文本的 token 密度换算为字符数，
+仍由 _split_text_into_chunks 在段落 / 换行 / 句末等自然断点处切分。
+AI 校对批次同样按 token 预算打包：上下文长度大的模型一次校对更多目标片段，减少请求次数；
+上下文或输出上限小的模型缩小批次与参考上下文，避免提示超长或输出被截断。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import math
+import re
+from typing import Optional, Callable, List, Dict
+
+import config as app_config
+
+# 汉字、平假名、片假名 (含半角)、韩文：常见分词器中约 1 个字符对应 1 个 token
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af\uff66-\uff9f]")
+_WHITESPACE_PATTERN = re.compile(r"\s")
+CJK_TOKENS_PER_CHAR = 1.0
+OTHER_CHARS_PER_TOKEN = 4.0  # 拉丁字母、数字、标点等
+
+# 分割结果是原文加上换行，输出 tokens 约为输入文本块的该倍数
+SEGMENTATION_OUTPUT_EXPANSION = 1.15
+
+# 校对结果为 {"片段索引": "纠错后文本"} 形式的 JSON：按批次内每个片段都被修改估算输出，
+# 文本部分约为原片段的该倍数 (转义与改写)，另加每个片段的键、引号与分隔符
+CORRECTION_OUTPUT_EXPANSION = 1.2
+CORRECTION_OUTPUT_TOKENS_PER_SEGMENT = 8
+# 提示中每个片段所在行的 "序号. " 前缀与换行
+CORRECTION_INPUT_TOKENS_PER_SEGMENT = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """按字符类别估算 token 数 (不依赖具体模型的分词器)。"""
+    if not text:
+        return 0
+    cjk_chars = len(_CJK_PATTERN.findall(text))
+    other_chars = len(text) - cjk_chars - len(_WHITESPACE_PATTERN.findall(text))
+    return int(math.ceil(cjk_chars * CJK_TOKENS_PER_CHAR + max(0, other_chars) / OTHER_CHARS_PER_TOKEN))
+
+
+class ChunkPlanner:
+    """
+    按 token 预算规划分割块大小。
+
+    每块的 token 上限取以下三者的最小值 (且不低于 LLM_CHUNK_MIN_TOKENS)：
+    - LLM_CHUNK_TARGET_TOKENS：单块目标大小，块过大时分割质量下降，也会减少可并发的块数；
+    - 输出预算：分割结果约为原文的 SEGMENTATION_OUTPUT_EXPANSION 倍，必须放得进 max_output_tokens；
+    - 上下文预算：系统提示 + 摘要 + 文本块 + 输出 不能超过 context_tokens。
+
+    tokenizer 可替换为模型对应的分词器 (接收文本、返回 token 数)，默认使用 estimate_tokens。
+    """
+
+    def __init__(self, context_tokens: Optional[int] = None, max_output_tokens: Optional[int] = None,
+                 tokenizer: Optional[Callable[[str], int]] = None):
+        self.context_tokens = context_tokens or app_config.DEFAULT_LLM_CONTEXT_TOKENS
+        self.max_output_tokens = max_output_tokens or app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET
+        self.tokenizer = tokenizer or estimate_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokenizer(text)
+
+    def max_chunk_tokens(self, system_prompt: str) -> int:
+        """单个文本块最多可包含的 tokens。"""
+        output_limit = self.max_output_tokens / SEGMENTATION_OUTPUT_EXPANSION
+        overhead = self.count_tokens(system_prompt) + app_config.LLM_SUMMARY_TOKEN_ALLOWANCE
+        context_limit = (self.context_tokens - overhead) / (1 + SEGMENTATION_OUTPUT_EXPANSION)
+        limit = min(app_config.LLM_CHUNK_TARGET_TOKENS, output_limit, context_limit)
+        return max(app_config.LLM_CHUNK_MIN_TOKENS, int(limit))
+
+    def max_chunk_chars(self, text: str, system_prompt: str) -> int:
+        """把 token 上限按该文本的平均 token 密度换算为字符数，供按自然断点切分时使用。"""
+        chars_per_token = len(text) / max(1, self.count_tokens(text))
+        return max(1, int(self.max_chunk_tokens(system_prompt) * chars_per_token))
+
+
+class CorrectionBatchPlanner:
+    """
+    按 token 预算把 AI 校对的目标片段及其前后相邻的上下文片段打包为批次。
+
+    一次请求的上下文窗口 (context_tokens) 需要容纳：提示模板 + 参考上下文 + 批次片段 + 输出。
+    - 参考上下文 ("完整转录上下文") 最多 LLM_CORRECTION_CONTEXT_TOKENS，且不超过可用输入预算的三分之一；
+    - 批次片段占用其余的输入预算；
+    - 按批次内所有片段都被修改估算的输出不超过 max_output_tokens；
+    - 每批目标片段数不超过 LLM_CORRECTION_MAX_TARGETS_PER_BATCH。
+    目标片段按顺序依次加入当前批次，加入后超出任一预算时先结束当前批次；单个目标自身超出预算时独占一个批次。
+    """
+
+    def __init__(self, context_tokens: Optional[int] = None, max_output_tokens: Optional[int] = None,
+                 tokenizer: Optional[Callable[[str], int]] = None):
+        self.context_tokens = context_tokens or app_config.DEFAULT_LLM_CONTEXT_TOKENS
+        self.max_output_tokens = max_output_tokens or app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET
+        self.tokenizer = tokenizer or estimate_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokenizer(text)
+
+    def _input_budget(self, prompt_overhead_tokens: int) -> int:
+        """参考上下文与批次片段可用的输入 tokens (上下文窗口减去提示模板与输出)。"""
+        return self.context_tokens - prompt_overhead_tokens - self.max_output_tokens
+
+    def reference_context_tokens(self, prompt_overhead_tokens: int) -> int:
+        """参考上下文的 tokens 上限。"""
+        return max(0, min(app_config.LLM_CORRECTION_CONTEXT_TOKENS, self._input_budget(prompt_overhead_tokens) // 3))
+
+    def reference_context_chars(self, full_text: str, prompt_overhead_tokens: int) -> int:
+        """把参考上下文的 token 上限按全文的平均 token 密度换算为字符数，供按句子边界截取时使用。"""
+        chars_per_token = len(full_text) / max(1, self.count_tokens(full_text))
+        return int(self.reference_context_tokens(prompt_overhead_tokens) * chars_per_token)
+
+    def batch_input_tokens(self, prompt_overhead_tokens: int) -> int:
+        """每批片段 (目标 + 相邻上下文) 可占用的输入 tokens。"""
+        budget = self._input_budget(prompt_overhead_tokens) - self.reference_context_tokens(prompt_overhead_tokens)
+        return max(app_config.LLM_CHUNK_MIN_TOKENS, budget)
+
+    def plan(self, segments: List[str], target_indices: List[int], prompt_overhead_tokens: int) -> List[List[int]]:
+        """
+        返回批次列表，每个批次为升序的片段索引 (目标片段 + 不属于任何目标的前后相邻片段)。
+
+        Args:
+            segments: 所有片段 (带【】标记的文本)
+            target_indices: 需要校对的目标片段索引
+            prompt_overhead_tokens: 不含参考上下文与片段列表时提示模板的 tokens
+        """
+        if not target_indices:
+            return []
+        targets = sorted(set(target_indices))
+        target_set = set(targets)
+        segment_count = len(segments)
+        input_budget = self.batch_input_tokens(prompt_overhead_tokens)
+        output_budget = self.max_output_tokens
+        max_targets = app_config.LLM_CORRECTION_MAX_TARGETS_PER_BATCH
+
+        segment_tokens: Dict[int, int] = {}
+
+        def tokens_of(index: int) -> int:
+            tokens = segment_tokens.get(index)
+            if tokens is None:
+                tokens = segment_tokens[index] = self.count_tokens(segments[index])
+            return tokens
+
+        def additions(target: int, batch_indices: set):
+            """目标本身，以及不是目标的前后相邻片段 (相邻的目标片段由其自身加入)；返回 (新增索引, 输入 tokens, 输出 tokens)。"""
+            new_indices = [i for i in (target - 1, target, target + 1)
+                           if 0 <= i < segment_count and i not in batch_indices and (i == target or i not in target_set)]
+            add_input = sum(tokens_of(i) + CORRECTION_INPUT_TOKENS_PER_SEGMENT for i in new_indices)
+            add_output = sum(math.ceil(tokens_of(i) * CORRECTION_OUTPUT_EXPANSION) + CORRECTION_OUTPUT_TOKENS_PER_SEGMENT
+                             for i in new_indices)
+            return new_indices, add_input, add_output
+
+        batches: List[List[int]] = []
+        batch_indices: set = set()
+        batch_target_count = batch_input = batch_output = 0
+
+        for target in targets:
+            new_indices, add_input, add_output = additions(target, batch_indices)
+            if batch_target_count and (batch_target_count >= max_targets
+                                       or batch_input + add_input > input_budget
+                                       or batch_output + add_output > output_budget):
+                batches.append(sorted(batch_indices))
+                batch_indices = set()
+                batch_target_count = batch_input = batch_output = 0
+                new_indices, add_input, add_output = additions(target, batch_indices)
+            batch_indices.update(new_indices)
+            batch_target_count += 1
+            batch_input += add_input
+            batch_output += add_output
+
+        if batch_indices:
+            batches.append(sorted(batch_indices))
+        return batches
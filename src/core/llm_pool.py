@@ -0,0 +1,157 @@
+"""
+LLM 多配置负载均衡池模块
+
+把分块分割与 AI 校正批次分散到多个模型配置 (不同的服务商、端点或 API Key) 上发送，提高大批量任务的总吞吐。
+每个请求按各配置最近的延迟、错误率与在途请求数加权随机选择配置；某个配置连续失败达到阈值后暂停向其分配请求，
+冷却结束后以较低的权重重新试探，端点恢复后权重随成功请求逐步回升，从而在端点退化时自动切换到其他配置。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import random
+import threading
+import time
+from typing import Optional, List, Callable, Dict, Any
+
+import config as app_config
+from core.llm_api import LLMClient, _parse_api_url_and_model
+from core.llm_transport import get_llm_transport
+
+
+class PoolMember:
+    """池中的一个模型配置：共享该配置连接池的客户端，以及用于加权选择的统计。"""
+
+    __slots__ = ("profile_id", "name", "client", "max_concurrent", "context_tokens", "latency_ewma", "error_rate",
+                 "in_flight", "consecutive_failures", "cooldown_until", "requests", "failures")
+
+    def __init__(self, profile_id: str, name: str, client: LLMClient, max_concurrent: int,
+                 context_tokens: Optional[int] = None):
+        self.profile_id = profile_id
+        self.name = name
+        self.client = client
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.context_tokens = context_tokens  # 模型上下文长度，None 表示使用默认值
+        self.latency_ewma: Optional[float] = None  # 成功请求的平均耗时 (秒)，尚无成功请求时为 None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0  # time.monotonic() 时间，之前不向该配置分配请求
+        self.requests = 0
+        self.failures = 0
+
+
+class LLMClientPool:
+    """
+    多个模型配置组成的负载均衡池，可在多个线程间共享。
+
+    acquire() 选出一个配置并计入在途请求，请求结束后必须调用 release() 报告耗时与结果。
+    选择权重为 (1 - 错误率)² / (平均延迟 × (1 + 在途请求数))：
+    尚无延迟数据的配置按其他配置的平均延迟计算，保证新配置也能分到请求；
+    在途请求数达到该配置并发上限的配置只在其他配置也都满载时才会被选中。
+    """
+
+    def __init__(self, members: List[PoolMember], logger_func: Optional[Callable[[str], None]] = None,
+                 rng: Optional[random.Random] = None):
+        if not members:
+            raise ValueError("负载均衡池至少需要一个模型配置")
+        self.members = members
+        self.logger_func = logger_func
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profiles(cls, profiles: List[Dict[str, Any]],
+                      logger_func: Optional[Callable[[str], None]] = None) -> "LLMClientPool":
+        """按模型配置列表创建池 (第一个配置为主配置)，每个配置使用各自的共享连接池与限速设置。"""
+        members = []
+        for profile in profiles:
+            api_format = profile.get(app_config.PROFILE_API_FORMAT_KEY, app_config.API_FORMAT_AUTO)
+            target_url, effective_model = _parse_api_url_and_model(
+                profile.get(app_config.PROFILE_API_BASE_URL_KEY), profile.get(app_config.PROFILE_MODEL_NAME_KEY),
+                app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME,
+                api_format
+            )
+            max_concurrent = profile.get(app_config.PROFILE_MAX_CONCURRENT_REQUESTS_KEY) or app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS
+            transport = get_llm_transport(target_url, profile.get(app_config.PROFILE_ID_KEY),
+                                          pool_maxsize=max(app_config.LLM_HTTP_POOL_MAXSIZE, int(max_concurrent)),
+                                          requests_per_minute=profile.get(app_config.PROFILE_REQUESTS_PER_MINUTE_KEY))
+            client = LLMClient(profile.get(app_config.PROFILE_API_KEY_KEY, ""), target_url, effective_model,
+                               api_format=api_format, temperature=profile.get(app_config.PROFILE_TEMPERATURE_KEY),
+                               max_tokens=profile.get(app_config.PROFILE_MAX_OUTPUT_TOKENS_KEY), transport=transport)
+            profile_id = profile.get(app_config.PROFILE_ID_KEY) or target_url
+            members.append(PoolMember(profile_id, profile.get(app_config.PROFILE_NAME_KEY) or profile_id,
+                                      client, max_concurrent, profile.get(app_config.PROFILE_CONTEXT_TOKENS_KEY)))
+        return cls(members, logger_func=logger_func)
+
+    @property
+    def primary(self) -> PoolMember:
+        return self.members[0]
+
+    @property
+    def total_capacity(self) -> int:
+        """各配置并发上限之和，即整个池同时在途的请求数上限。"""
+        return sum(member.max_concurrent for member in self.members)
+
+    def _log(self, message: str):
+        if self.logger_func:
+            self.logger_func(f"[LLM Pool] {message}")
+
+    def _weight(self, member: PoolMember, default_latency: float) -> float:
+        latency = member.latency_ewma if member.latency_ewma is not None else default_latency
+        return max(0.05, 1.0 - member.error_rate) ** 2 / (max(0.05, latency) * (1 + member.in_flight))
+
+    def acquire(self, avoid: Optional[PoolMember] = None) -> PoolMember:
+        """
+        选择一个配置发送请求。avoid 为刚刚失败的配置，有其他可用配置时不选它。
+        所有配置都在冷却中时选择最早结束冷却的配置，请求不会因为池中没有健康配置而被拒绝。
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = [m for m in self.members if m.cooldown_until <= now]
+            if not available:
+                available = [min(self.members, key=lambda m: m.cooldown_until)]
+            candidates = [m for m in available if m is not avoid] or available
+            candidates = [m for m in candidates if m.in_flight < m.max_concurrent] or candidates
+            known_latencies = [m.latency_ewma for m in self.members if m.latency_ewma is not None]
+            default_latency = sum(known_latencies) / len(known_latencies) if known_latencies else 1.0
+            member = self._rng.choices(candidates, [self._weight(m, default_latency) for m in candidates])[0]
+            member.in_flight += 1
+            member.requests += 1
+            return member
+
+    def release(self, member: PoolMember, latency_s: float, success: Optional[bool]):
+        """报告请求结果；success 为 None (如任务取消) 时只释放在途名额，不计入统计。"""
+        alpha = app_config.LLM_POOL_EWMA_ALPHA
+        with self._lock:
+            member.in_flight = max(0, member.in_flight - 1)
+            if success is None:
+                return
+            if success:
+                member.latency_ewma = latency_s if member.latency_ewma is None else alpha * latency_s + (1 - alpha) * member.latency_ewma
+                member.error_rate *= (1 - alpha)
+                member.consecutive_failures = 0
+                return
+            member.failures += 1
+            member.error_rate = alpha + (1 - alpha) * member.error_rate
+            member.consecutive_failures += 1
+            if member.consecutive_failures < app_config.LLM_POOL_FAILURE_THRESHOLD:
+                return
+            # 冷却后的试探请求再次失败时重新进入冷却
+            member.cooldown_until = time.monotonic() + app_config.LLM_POOL_COOLDOWN_S
+            failures = member.consecutive_failures
+        self._log(f"配置 '{member.name}' 连续失败 {failures} 次，{app_config.LLM_POOL_COOLDOWN_S:.0f}秒内不再向其分配请求。")
+
+    def has_alternative(self, member: Optional[PoolMember]) -> bool:
+        """池中是否还有 member 以外、未在冷却中的配置 (可以立即换用其重试)。"""
+        now = time.monotonic()
+        with self._lock:
+            return any(m is not member and m.cooldown_until <= now for m in self.members)
+
+    def describe(self) -> str:
+        with self._lock:
+            parts = []
+            for m in self.members:
+                latency = f"{m.latency_ewma:.1f}秒" if m.latency_ewma is not None else "-"
+                parts.append(f"{m.name}: {m.requests} 请求 / {m.failures} 失败 / 平均延迟 {latency} / {m.client.usage.describe()}")
+            return "；".join(parts)
@@ -0,0 +1,180 @@
+"""
+LLM HTTP 传输层模块
+
+为所有 LLM 调用（摘要、分块分割、AI 校正、台本清洗）提供共享的 HTTP 连接池。
+每个 (模型配置, API 主机) 对应一个持久的 requests.Session，
+复用 TCP/TLS 连接 (keep-alive)，避免每个分块、每个校正批次都重新握手。
+同一传输对象上的请求共享一个令牌桶限速器：按模型配置的每分钟请求数限速，
+收到 429 时按 Retry-After 让所有线程一起暂停，并发批量任务可以用满但不超出服务商的配额。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config as app_config
+
+
+def parse_retry_after(response: Any) -> Optional[float]:
+    """读取响应的 retry-after-ms / Retry-After (秒数或 HTTP 日期)，返回需要等待的秒数；没有或无法解析时返回 None。"""
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestRateLimiter:
+    """
+    令牌桶限速器。
+
+    按每分钟 requests_per_minute 个令牌匀速补充，桶容量为 1 秒的请求量 (至少 1 个)，只允许很小的突发；
+    requests_per_minute 为 0 / None 时不限速，只提供 pause()。pause() 让所有等待令牌的线程暂停到指定时间之后。
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.set_rate(requests_per_minute)
+
+    def set_rate(self, requests_per_minute: Optional[float]):
+        with self._lock:
+            self.requests_per_minute = float(requests_per_minute or 0)
+            self._capacity = max(1.0, self.requests_per_minute / 60) if self.requests_per_minute > 0 else 0.0
+            self._tokens = self._capacity
+            self._updated_at = time.monotonic()
+
+    def acquire(self):
+        """取得一个令牌，必要时阻塞等待。"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait_s = self._paused_until - now
+                if wait_s <= 0:
+                    if self.requests_per_minute <= 0:
+                        return
+                    self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self.requests_per_minute / 60)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_s = (1 - self._tokens) * 60 / self.requests_per_minute
+            time.sleep(min(wait_s, 1.0))
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class LLMTransport:
+    """
+    持有一个带连接池的 requests.Session，对外提供与 requests.post 相同的调用方式。
+
+    requests.Session 可以在多个线程间共享发送请求，连接池大小应不小于同时在途的请求数。
+    """
+
+    def __init__(self, base_url: str, profile_id: Optional[str] = None,
+                 pool_maxsize: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 requests_per_minute: Optional[float] = None):
+        self.base_url = base_url
+        self.profile_id = profile_id
+        self.pool_maxsize = pool_maxsize or app_config.LLM_HTTP_POOL_MAXSIZE
+        self.connect_timeout = connect_timeout if connect_timeout is not None else app_config.DEFAULT_LLM_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout if read_timeout is not None else app_config.DEFAULT_LLM_READ_TIMEOUT
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self._session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # 不在适配器层重试，失败由调用方按各自的逻辑处理
+        adapter = HTTPAdapter(pool_connections=app_config.LLM_HTTP_POOL_CONNECTIONS,
+                              pool_maxsize=self.pool_maxsize, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def default_timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+             timeout: Optional[Union[float, Tuple[float, float]]] = None, **kwargs) -> requests.Response:
+        """发送 POST 请求；未指定 timeout 时使用 (连接超时, 读取超时)。发送前先取得限速令牌，收到 429 时暂停限速器。"""
+        self.rate_limiter.acquire()
+        response = self._session.post(url, headers=headers, json=json,
+                                      timeout=timeout if timeout is not None else self.default_timeout, **kwargs)
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response)
+            self.rate_limiter.pause(min(retry_after if retry_after is not None else app_config.LLM_RETRY_DELAY_S,
+                                        app_config.LLM_RETRY_AFTER_MAX_S))
+        return response
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Union[float, Tuple[float, float]]] = None, **kwargs) -> requests.Response:
+        return self._session.get(url, headers=headers,
+                                 timeout=timeout if timeout is not None else self.default_timeout, **kwargs)
+
+    def close(self):
+        """关闭会话并释放池中的连接。"""
+        self._session.close()
+
+
+_transports: Dict[Tuple[str, str], LLMTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def _transport_key(base_url: str, profile_id: Optional[str]) -> Tuple[str, str]:
+    """以 (模型配置ID, scheme://host) 作为键；同一主机的不同路径 (如 Gemini 的各模型端点) 共用连接池。"""
+    parts = urlsplit(base_url or "")
+    origin = f"{parts.scheme}://{parts.netloc}" if parts.netloc else (base_url or "")
+    return (profile_id or "", origin.lower())
+
+
+def get_llm_transport(base_url: str, profile_id: Optional[str] = None,
+                      pool_maxsize: Optional[int] = None,
+                      requests_per_minute: Optional[float] = None) -> LLMTransport:
+    """
+    获取 (或创建) 与模型配置和 API 主机对应的共享传输对象。
+
+    pool_maxsize 大于已有传输对象的连接池时会重建该对象，以容纳更多并发请求。
+    给出 requests_per_minute 时更新该对象的限速 (0 表示不限速)。
+    """
+    key = _transport_key(base_url, profile_id)
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is not None and pool_maxsize and pool_maxsize > transport.pool_maxsize:
+            transport.close()
+            transport = None
+        if transport is None:
+            transport = LLMTransport(base_url, profile_id=profile_id, pool_maxsize=pool_maxsize,
+                                     requests_per_minute=requests_per_minute)
+            _transports[key] = transport
+        elif requests_per_minute is not None and float(requests_per_minute) != transport.rate_limiter.requests_per_minute:
+            transport.rate_limiter.set_rate(requests_per_minute)
+        return transport
+
+
+def close_all_llm_transports():
+    """关闭所有共享传输对象 (如程序退出时)。"""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
@@ -0,0 +1,85 @@
+"""
+处理过程性能剖析模块
+
+为 SrtProcessor 等处理流程提供轻量的结构化性能记录：
+按阶段记录耗时与条目数量，并统计热点辅助函数的调用次数。
+结果可以转换为字典，或写入与输出文件同名的 JSON 旁路文件。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import json
+import time
+from typing import Dict, Any, Optional
+
+
+class ProcessingProfile:
+    """
+    一次处理过程的性能剖析记录。
+
+    阶段按顺序切换：调用 begin_phase 时自动结束上一个阶段。
+    所有操作都只是字典累加，开销可以忽略，因此默认始终开启。
+    """
+
+    def __init__(self, **metadata: Any):
+        self.metadata: Dict[str, Any] = dict(metadata)
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.call_counts: Dict[str, int] = {}
+        self.completed: bool = False
+        self._started_at: float = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self._current_phase: Optional[str] = None
+        self._current_phase_started_at: float = self._started_at
+
+    def begin_phase(self, name: str):
+        """结束当前阶段 (如有) 并开始新阶段；同名阶段多次进入时耗时累加。"""
+        self._end_current_phase()
+        self._current_phase = name
+        self._current_phase_started_at = time.perf_counter()
+        self.phases.setdefault(name, {"wall_time_s": 0.0, "items": {}})
+
+    def set_items(self, phase: str, **counts: int):
+        """记录某阶段的条目数量 (如输入片段数、输出条目数)。"""
+        self.phases.setdefault(phase, {"wall_time_s": 0.0, "items": {}})["items"].update(counts)
+
+    def count(self, name: str, amount: int = 1):
+        """累加热点函数的调用次数。"""
+        self.call_counts[name] = self.call_counts.get(name, 0) + amount
+
+    def finish(self, completed: bool = True):
+        """结束剖析。completed 为 False 表示处理被中断或失败。"""
+        if self._finished_at is not None:
+            return
+        self._end_current_phase()
+        self._finished_at = time.perf_counter()
+        self.completed = completed
+
+    @property
+    def total_wall_time(self) -> float:
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        return end - self._started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "metadata": dict(self.metadata),
+            "completed": self.completed,
+            "total_wall_time_s": round(self.total_wall_time, 6),
+            "phases": {
+                name: {"wall_time_s": round(data["wall_time_s"], 6), "items": dict(data["items"])}
+                for name, data in self.phases.items()
+            },
+            "call_counts": dict(self.call_counts),
+        }
+
+    def write_json(self, path: str):
+        """把剖析结果写入 JSON 文件。"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def _end_current_phase(self):
+        if self._current_phase is None:
+            return
+        elapsed = time.perf_counter() - self._current_phase_started_at
+        self.phases[self._current_phase]["wall_time_s"] += elapsed
+        self._current_phase = None
@@ -0,0 +1,92 @@
+"""
+标点分类模块
+
+判断一个词是否为标点或以标点结尾 (分割点查找、AI 校对目标筛选等按词调用)。
+每个标点集合的分类器只构建一次：集合中的标点与省略号模式合并为一个编译好的"结尾"交替正则，
+末字符的 Unicode 标点类别查一次后存入按字符的类别表，判断结果再按词文本放入 LRU 缓存，
+同一个词 (ASR 输出中大量重复) 之后的判断只是一次缓存查找。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable
+
+import config as app_config
+
+# 集合中包含这些省略号时，额外匹配任意长度的省略号结尾
+_ELLIPSIS_MARKERS = ('...', '......', '‥', '…')
+_ELLIPSIS_PATTERNS = (r'…+', r'‥+', r'\.{3,}')
+
+# Unicode标点符号类别：Pc (连接符), Pd (破折号), Pe (后引号), Pf (后引号), Pi (前引号), Po (其他标点), Ps (前引号)
+_UNICODE_PUNCTUATION_CATEGORIES = frozenset({'Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps'})
+# 由各标点集合精确处理的常见标点，不再按 Unicode 类别判定，避免交叉匹配
+_CATEGORY_EXCLUDED_CHARS = frozenset({'.', '。', '?', '？', '!', '！', ',', '、', '，', '…', '‥'})
+
+# 字符 -> 是否按 Unicode 类别视为标点 (首次遇到时计算)
+_category_table: Dict[str, bool] = {}
+
+WORD_CACHE_SIZE = 16384  # 每个分类器缓存的词文本数量
+
+
+def is_unicode_punctuation_char(char: str) -> bool:
+    """字符是否属于 Unicode 标点类别 (不含 _CATEGORY_EXCLUDED_CHARS 中的常见标点)。"""
+    flag = _category_table.get(char)
+    if flag is None:
+        flag = char not in _CATEGORY_EXCLUDED_CHARS and unicodedata.category(char) in _UNICODE_PUNCTUATION_CATEGORIES
+        _category_table[char] = flag
+    return flag
+
+
+class PunctuationClassifier:
+    """
+    针对一个标点集合的分类器，可在多个线程间共享。
+
+    has_punctuation(word_text) 在去除首尾空白后的词满足以下任一条件时返回 True：
+    以集合中的某个标点结尾 (包括词本身就是标点)；集合包含省略号时以省略号结尾；
+    末字符属于 Unicode 标点类别 (常见标点除外)。
+    """
+
+    def __init__(self, punctuation_set: Iterable[str], cache_size: int = WORD_CACHE_SIZE):
+        self.punctuation_set: FrozenSet[str] = frozenset(punctuation_set)
+        # 长的标点在前，交替时优先尝试
+        alternatives = [re.escape(p) for p in sorted(self.punctuation_set, key=len, reverse=True)]
+        if any(p in self.punctuation_set for p in _ELLIPSIS_MARKERS):
+            alternatives.extend(_ELLIPSIS_PATTERNS)
+        self._suffix_pattern = re.compile('(?:' + '|'.join(alternatives) + r')\Z') if alternatives else None
+        self.has_punctuation = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, word_text: str) -> bool:
+        cleaned_text = word_text.strip()
+        if not cleaned_text:
+            return False
+        if self._suffix_pattern is not None and self._suffix_pattern.search(cleaned_text):
+            return True
+        return is_unicode_punctuation_char(cleaned_text[-1])
+
+
+FINAL_PUNCTUATION_CLASSIFIER = PunctuationClassifier(app_config.FINAL_PUNCTUATION)
+ELLIPSIS_PUNCTUATION_CLASSIFIER = PunctuationClassifier(app_config.ELLIPSIS_PUNCTUATION)
+COMMA_PUNCTUATION_CLASSIFIER = PunctuationClassifier(app_config.COMMA_PUNCTUATION)
+ALL_SPLIT_PUNCTUATION_CLASSIFIER = PunctuationClassifier(app_config.ALL_SPLIT_PUNCTUATION)
+
+_classifiers: Dict[FrozenSet[str], PunctuationClassifier] = {
+    classifier.punctuation_set: classifier
+    for classifier in (FINAL_PUNCTUATION_CLASSIFIER, ELLIPSIS_PUNCTUATION_CLASSIFIER,
+                       COMMA_PUNCTUATION_CLASSIFIER, ALL_SPLIT_PUNCTUATION_CLASSIFIER)
+}
+_classifiers_lock = threading.Lock()
+
+
+def get_punctuation_classifier(punctuation_set: Iterable[str]) -> PunctuationClassifier:
+    """获取 (或创建) 与标点集合对应的分类器；config 中的标点集合已预先构建。"""
+    key = frozenset(punctuation_set)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        with _classifiers_lock:
+            classifier = _classifiers.setdefault(key, PunctuationClassifier(key))
+    return classifier
@@ -9,11 +9,20 @@ SRT字幕处理器模块
 版本: 0.2.2.0
 """
 
+import os
 import re
-import difflib
 import json
-from typing import List, Optional, Any, Dict
-from .data_models import TimestampedWord, ParsedTranscription, SubtitleEntry
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional, Any, Dict, Iterable
+from .data_models import TimestampedWord, ParsedTranscription, SubtitleEntry, WordSpan, as_word_span, word_texts
+from .alignment_engine import AlignmentEngine, WordTextIndex, WordTimeIndex
+from .processing_profile import ProcessingProfile
+from .llm_checkpoint import make_checkpoint_key
+from .word_confidence import WordConfidenceIndex
+from .llm_chunk_planner import CorrectionBatchPlanner
+from .punctuation import (get_punctuation_classifier, FINAL_PUNCTUATION_CLASSIFIER, ELLIPSIS_PUNCTUATION_CLASSIFIER,
+                          COMMA_PUNCTUATION_CLASSIFIER, ALL_SPLIT_PUNCTUATION_CLASSIFIER)
 import config as app_config # 使用别名以减少潜在冲突并清晰化来源
 
 class SrtProcessor:
@@ -55,12 +64,38 @@ class SrtProcessor:
         self.max_duration: float = app_config.DEFAULT_MAX_DURATION
         self.max_chars_per_line: int = app_config.DEFAULT_MAX_CHARS_PER_LINE
         self.default_gap_ms: int = app_config.DEFAULT_DEFAULT_GAP_MS
+        self.alignment_mode: str = app_config.DEFAULT_ALIGNMENT_MODE
+        self.alignment_max_workers: int = app_config.DEFAULT_ALIGNMENT_MAX_WORKERS
 
         # 初始化LLM配置相关的成员变量
         self.llm_api_key: Optional[str] = app_config.DEFAULT_LLM_API_KEY
         self.llm_base_url: Optional[str] = app_config.DEFAULT_LLM_API_BASE_URL
         self.llm_model_name: Optional[str] = app_config.DEFAULT_LLM_MODEL_NAME
         self.llm_temperature: float = app_config.DEFAULT_LLM_TEMPERATURE
+        self.llm_max_concurrent_requests: int = app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS  # AI校正批次同时在途的请求数
+        self.llm_context_tokens: Optional[int] = None  # 模型上下文长度 (tokens)，None 表示使用默认值；用于规划校正批次
+        self.llm_max_output_tokens: Optional[int] = None  # 模型最大输出 tokens，None 表示使用默认值
+        self.llm_profile_id: Optional[str] = None  # 当前模型配置ID，校正批次与分块分割共用该配置的连接池与限速器
+        self.llm_requests_per_minute: Optional[float] = None  # 该模型配置每分钟最多发送的请求数，0 表示不限速，None 保持现有设置
+        # 本次任务共享的传输对象 (LLMTransport)，由调用方设置为与分块分割相同的对象；为 None 时按上面的配置取得
+        self.llm_transport = None
+        # AI纠错阶段在总进度中的 (起点, 权重)，用于按已返回的批次报告进度
+        self._ai_correction_progress_span = (0, 0)
+        # 负载均衡池 (LLMClientPool)，由调用方在启用多配置负载均衡时设置；为 None 时校正批次只使用上面的配置
+        self.llm_client_pool = None
+        # 任务检查点 (LLMCheckpoint)，由调用方设置；已完成的校正批次结果写入其中，续跑时直接恢复
+        self.llm_checkpoint = None
+        # AI校对各步骤共用的词置信度索引 (每次校对针对当前词列表构建一次)
+        self._word_confidence_index: Optional[WordConfidenceIndex] = None
+
+        # 词文本前缀索引与对齐引擎 (每次 process_to_srt 针对当前词列表构建一次)
+        self._word_text_index: Optional[WordTextIndex] = None
+        self._alignment_engine: Optional[AlignmentEngine] = None
+        self._word_time_index: Optional[WordTimeIndex] = None
+
+        # 最近一次 process_to_srt 的性能剖析 (各阶段耗时、热点函数调用次数、条目数)
+        self.profile: ProcessingProfile = ProcessingProfile()
+        self.save_profile_sidecar: bool = app_config.DEFAULT_SAVE_PROCESSING_PROFILE
 
         if initial_config:
             self.configure_from_main_config(initial_config)
@@ -68,6 +103,25 @@ class SrtProcessor:
     def set_signals_forwarder(self, signals_forwarder: Any):
         self._signals = signals_forwarder
 
+    def get_last_profile(self) -> Dict[str, Any]:
+        """返回最近一次 process_to_srt 的性能剖析结果 (字典形式)。"""
+        return self.profile.to_dict()
+
+    def write_profile_sidecar(self, srt_file_path: str) -> Optional[str]:
+        """
+        把最近一次的性能剖析写入 SRT 旁边的 JSON 文件 (<文件名>.profile.json)。
+
+        Returns:
+            写入的文件路径，失败时返回 None
+        """
+        sidecar_path = os.path.splitext(srt_file_path)[0] + ".profile.json"
+        try:
+            self.profile.write_json(sidecar_path)
+        except (IOError, OSError) as e:
+            self.log(f"写入性能剖析文件失败: {e}")
+            return None
+        return sidecar_path
+
     def configure_from_main_config(self, main_config_data: Dict[str, Any]):
         """
         Update SRT processor parameters from main application configuration.
@@ -80,6 +134,9 @@ class SrtProcessor:
         self.max_duration = float(main_config_data.get(app_config.USER_MAX_DURATION_KEY, app_config.DEFAULT_MAX_DURATION))
         self.max_chars_per_line = int(main_config_data.get(app_config.USER_MAX_CHARS_PER_LINE_KEY, app_config.DEFAULT_MAX_CHARS_PER_LINE))
         self.default_gap_ms = int(main_config_data.get(app_config.USER_DEFAULT_GAP_MS_KEY, app_config.DEFAULT_DEFAULT_GAP_MS))
+        self.alignment_mode = main_config_data.get(app_config.USER_ALIGNMENT_MODE_KEY, app_config.DEFAULT_ALIGNMENT_MODE)
+        self.alignment_max_workers = int(main_config_data.get(app_config.USER_ALIGNMENT_MAX_WORKERS_KEY, app_config.DEFAULT_ALIGNMENT_MAX_WORKERS))
+        self.save_profile_sidecar = bool(main_config_data.get(app_config.USER_SAVE_PROCESSING_PROFILE_KEY, app_config.DEFAULT_SAVE_PROCESSING_PROFILE))
 
         # Update LLM parameters - use same approach as ConversionWorker for consistency
         # First try to get from legacy config keys (for backward compatibility)
@@ -87,6 +144,15 @@ class SrtProcessor:
         self.llm_base_url = main_config_data.get(app_config.USER_LLM_API_BASE_URL_KEY, app_config.DEFAULT_LLM_API_BASE_URL)
         self.llm_model_name = main_config_data.get(app_config.USER_LLM_MODEL_NAME_KEY, app_config.DEFAULT_LLM_MODEL_NAME)
         self.llm_temperature = float(main_config_data.get(app_config.USER_LLM_TEMPERATURE_KEY, app_config.DEFAULT_LLM_TEMPERATURE))
+        current_profile = app_config.get_current_llm_profile(main_config_data)
+        self.llm_max_concurrent_requests = int(current_profile.get(
+            app_config.PROFILE_MAX_CONCURRENT_REQUESTS_KEY, app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS) or 1)
+        self.llm_context_tokens = current_profile.get(app_config.PROFILE_CONTEXT_TOKENS_KEY)
+        self.llm_max_output_tokens = current_profile.get(app_config.PROFILE_MAX_OUTPUT_TOKENS_KEY)
+        self.llm_profile_id = current_profile.get(app_config.PROFILE_ID_KEY)
+        self.llm_requests_per_minute = current_profile.get(
+            app_config.PROFILE_REQUESTS_PER_MINUTE_KEY, app_config.DEFAULT_LLM_REQUESTS_PER_MINUTE)
+        self.llm_transport = None  # 配置已变化，按新配置重新取得传输对象
 
         # If legacy keys are empty, try the new multi-profile system as fallback
         if not self.llm_api_key:
@@ -114,6 +180,9 @@ class SrtProcessor:
         self.max_duration = float(srt_params_dict.get('max_duration', self.max_duration))
         self.max_chars_per_line = int(srt_params_dict.get('max_chars_per_line', self.max_chars_per_line))
         self.default_gap_ms = int(srt_params_dict.get('default_gap_ms', self.default_gap_ms))
+        self.alignment_mode = srt_params_dict.get('alignment_mode', self.alignment_mode)
+        self.alignment_max_workers = int(srt_params_dict.get('alignment_max_workers', self.alignment_max_workers))
+        self.save_profile_sidecar = bool(srt_params_dict.get('save_profile_sidecar', self.save_profile_sidecar))
 
 
     def update_llm_config(
@@ -189,15 +258,23 @@ class SrtProcessor:
             return False
 
         # 组合所有词的文本
-        full_text = "".join([w.text for w in words_list]).strip()
+        full_text = self._joined_words_text(words_list).strip()
 
         # 检查是否为括号内容
         if self._is_bracketed_content(full_text):
             return True
 
-        # 如果ASR标记为audio_event类型，也认为是音频事件
+        # 如果ASR标记为audio_event类型，也认为是音频事件 (列式存储中的词均为普通词)
+        if isinstance(words_list, WordSpan):
+            return False
         return any(getattr(w, 'type', 'word') == 'audio_event' for w in words_list)
 
+    def _has_audio_event_word(self, words_list) -> bool:
+        """检查词列表中是否有空白词、audio_event 类型的词或被括号包裹的词"""
+        if not isinstance(words_list, WordSpan) and any(getattr(w, 'type', 'word') == 'audio_event' for w in words_list):
+            return True
+        return any(not text.strip() or re.match(r"^\(.*\)$|^（.*）$", text.strip()) for text in word_texts(words_list))
+
     def format_timecode(self, seconds_float: float) -> str:
         if not isinstance(seconds_float, (int, float)) or seconds_float < 0:
             return "00:00:00,000"
@@ -213,53 +290,23 @@ class SrtProcessor:
 
     def check_word_has_punctuation(self, word_text: str, punctuation_set: set) -> bool:
         """检查词汇是否包含标点符号（包括词汇本身是标点或以标点结尾）"""
-        import re
-        import unicodedata
-
-        cleaned_text = word_text.strip()
-        if not cleaned_text:
-            return False
-
-        # 0. 只过滤明显的无效内容：纯空格、单个标点符号
-        if len(cleaned_text) == 1:
-            # 只过滤单个空格和单个标点符号
-            if cleaned_text == ' ' or cleaned_text in punctuation_set:
-                return True
-
-        # 调试：记录详细的检测过程
-        step1_match = cleaned_text in punctuation_set
-        step2_match = False
-        step3_match = False
-        step4_match = False
-
-        # 1. 检查词汇本身是否在预定义标点符号集合中
-        if step1_match:
-            return True
-
-        # 2. 检查词汇是否以预定义标点符号结尾 - 精确匹配，优先级最高
-        for punct in punctuation_set:
-            if cleaned_text.endswith(punct):
-                return True
-
-        # 3. 检查常见的省略号模式（仅对ELLIPSIS_PUNCTUATION检测）
-        # 只有在检测省略号集合时才使用省略号正则表达式
-        ellipsis_chars_in_set = any(p in punctuation_set for p in ['...', '......', '‥', '…'])
-        if ellipsis_chars_in_set:
-            ellipsis_patterns = [r'…+', r'‥+', r'\.{3,}']  # 按优先级排序，避免重叠
-            for pattern in ellipsis_patterns:
-                if re.search(pattern + '$', cleaned_text):
-                    return True
-
-        # 4. 使用Unicode类别检测标点符号 - 但排除常见标点避免重复匹配
-        # Unicode标点符号类别：Pc (连接符), Pd (破折号), Pe (后引号), Pf (后引号), Pi (前引号), Po (其他标点), Ps (前引号)
-        last_char = cleaned_text[-1] if len(cleaned_text) > 0 else ''
-        # 排除已经被精确处理的常见标点符号，避免交叉匹配
-        excluded_chars = {'.', '。', '?', '？', '!', '！', ',', '、', '，', '…', '‥'}
-        if last_char and last_char not in excluded_chars:
-            if unicodedata.category(last_char) in ['Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps']:
-                return True
-
-        return False
+        return get_punctuation_classifier(punctuation_set).has_punctuation(word_text)
+
+    def _get_alignment_engine(self, all_parsed_words: List[TimestampedWord]) -> AlignmentEngine:
+        """获取与当前词列表对应的对齐引擎，词列表变化时重新构建索引。"""
+        engine = getattr(self, '_alignment_engine', None)
+        if engine is None or engine.words is not all_parsed_words or engine.word_count != len(all_parsed_words):
+            engine = AlignmentEngine(all_parsed_words, getattr(self, '_word_text_index', None))
+            self._alignment_engine = engine
+            self._word_text_index = engine.text_index
+        return engine
+
+    def _joined_words_text(self, words: List[TimestampedWord]) -> str:
+        """拼接词列表的原始文本；词列表是当前词流的连续片段时直接从前缀索引切片。"""
+        text_index = getattr(self, '_word_text_index', None)
+        if text_index is not None:
+            return text_index.joined_text(words)
+        return "".join([w.text for w in words])
 
     def get_segment_words_fuzzy(self, text_segment: str, all_parsed_words: List[TimestampedWord], start_search_index: int) -> tuple[List[TimestampedWord], int, float]:
         """
@@ -273,65 +320,19 @@ class SrtProcessor:
         Returns:
             Tuple of (matched_words, next_search_index, match_ratio)
         """
+        self.profile.count("get_segment_words_fuzzy")
         segment_clean = text_segment.strip().replace(" ", "")
         if not segment_clean:
             return [], start_search_index, 0.0
 
-        best_match_words_ts_objects: List[TimestampedWord] = []
-        best_match_ratio = 0.0
-        best_match_end_index = start_search_index
-
-        # 使用适当的搜索窗口大小
-        base_len_factor = 3
-        min_additional_words = 20
-        max_additional_words = 60
-        estimated_words_in_segment = len(text_segment.split())
-        search_window_size = len(segment_clean) * base_len_factor + min(max(estimated_words_in_segment * 2, min_additional_words), max_additional_words)
-        max_lookahead_outer = min(start_search_index + search_window_size, len(all_parsed_words))
-
-        for i in range(start_search_index, max_lookahead_outer):
-            if not self._is_worker_running():
-                break
-
-            current_words_text_list = []
-            current_word_ts_object_list: List[TimestampedWord] = []
-            max_j_lookahead = min(i + len(segment_clean) + 30, len(all_parsed_words))
-
-            for j in range(i, max_j_lookahead):
-                word_obj = all_parsed_words[j]
-                current_word_ts_object_list.append(word_obj)
-                current_words_text_list.append(word_obj.text.replace(" ", ""))
-                built_text = "".join(current_words_text_list)
-
-                if not built_text.strip():
-                    continue
-
-                matcher = difflib.SequenceMatcher(None, segment_clean, built_text, autojunk=False)
-                ratio = matcher.ratio()
-
-                update_best = False
-                if ratio > best_match_ratio:
-                    update_best = True
-                elif abs(ratio - best_match_ratio) < 1e-9:
-                    if best_match_words_ts_objects:
-                        current_len_diff = abs(len(built_text) - len(segment_clean))
-                        best_len_diff = abs(len("".join(w.text.replace(" ","") for w in best_match_words_ts_objects)) - len(segment_clean))
-                        if current_len_diff < best_len_diff:
-                            update_best = True
-                    else:
-                        update_best = True
-
-                if update_best and ratio > 0.01:
-                    best_match_ratio = ratio
-                    best_match_words_ts_objects = list(current_word_ts_object_list)
-                    best_match_end_index = j + 1
-
-                if ratio > 0.95 and len(built_text) > len(segment_clean) * 1.8:
-                    break
-
-            if best_match_ratio > 0.98:
-                break
+        # 通过预建索引的对齐引擎定位最佳词区间 (搜索窗口大小由引擎按片段长度计算)，避免逐一枚举 (i, j) 组合
+        alignment_engine = self._get_alignment_engine(all_parsed_words)
+        match_start, match_end, best_match_ratio = alignment_engine.align_segment(text_segment, start_search_index)
+        return self._accept_alignment_result(text_segment, segment_clean, all_parsed_words[match_start:match_end], match_end, best_match_ratio, start_search_index)
 
+    def _accept_alignment_result(self, text_segment: str, segment_clean: str, best_match_words_ts_objects: List[TimestampedWord],
+                                 best_match_end_index: int, best_match_ratio: float, start_search_index: int) -> tuple[List[TimestampedWord], int, float]:
+        """根据相似度阈值（含回退阈值）决定是否接受对齐结果，逐片段对齐与全局对齐共用。"""
         if not best_match_words_ts_objects:
             self.log(f"严重警告: LLM片段 \"{text_segment}\" (清理后: \"{segment_clean}\") 无法在ASR词语中找到任何匹配。将跳过此片段。搜索起始索引: {start_search_index}")
             return [], start_search_index, 0.0
@@ -457,13 +458,13 @@ class SrtProcessor:
             w_text = word_obj.text.strip()
 
             # 优先级1: 句末标点（。！？. !）
-            if self.check_word_has_punctuation(w_text, app_config.FINAL_PUNCTUATION):
+            if FINAL_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 split_indices.append(i)
             # 优先级2: 省略号（...）
-            elif self.check_word_has_punctuation(w_text, app_config.ELLIPSIS_PUNCTUATION):
+            elif ELLIPSIS_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 split_indices.append(i)
             # 优先级3: 逗号类（，、）
-            elif self.check_word_has_punctuation(w_text, app_config.COMMA_PUNCTUATION):
+            elif COMMA_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 split_indices.append(i)
 
         if not split_indices:
@@ -502,7 +503,7 @@ class SrtProcessor:
 
             # 创建当前段
             segment_words = sentence_words[start_idx:split_idx+1]
-            segment_text = "".join([w.text for w in segment_words])
+            segment_text = self._joined_words_text(segment_words)
             segment_start = segment_words[0].start_time
             segment_end = segment_words[-1].end_time
 
@@ -520,7 +521,7 @@ class SrtProcessor:
         # 处理最后一段
         if start_idx < len(sentence_words):
             segment_words = sentence_words[start_idx:]
-            segment_text = "".join([w.text for w in segment_words])
+            segment_text = self._joined_words_text(segment_words)
             segment_start = segment_words[0].start_time
             segment_end = original_end_time  # 最后一段使用原始结束时间
 
@@ -555,6 +556,7 @@ class SrtProcessor:
         Returns:
             分割后的字幕条目列表
         """
+        self.profile.count("split_long_sentence")
         # 常量定义
         MAX_RECURSION_DEPTH = 10
         MIN_SEGMENT_LENGTH = 3  # 最少3个词才尝试分割
@@ -639,15 +641,15 @@ class SrtProcessor:
             w_text = word_obj.text.strip()
 
               # 按优先级顺序检测标点：final > semicolon > ellipsis > comma
-            if self.check_word_has_punctuation(w_text, app_config.FINAL_PUNCTUATION):
+            if FINAL_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 potential_split_indices_by_priority['final'].append(idx)
-            elif self.check_word_has_punctuation(w_text, app_config.ELLIPSIS_PUNCTUATION):
+            elif ELLIPSIS_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 # 检查是否包含分号（中文分号优先级高于省略号）
                 if ';' in w_text or '；' in w_text:
                     potential_split_indices_by_priority['semicolon'].append(idx)
                 else:
                     potential_split_indices_by_priority['ellipsis'].append(idx)
-            elif self.check_word_has_punctuation(w_text, app_config.COMMA_PUNCTUATION):
+            elif COMMA_PUNCTUATION_CLASSIFIER.has_punctuation(w_text):
                 potential_split_indices_by_priority['comma'].append(idx)
 
         # 选择最佳分割点 - 按优先级顺序：final > semicolon > ellipsis > comma
@@ -692,7 +694,7 @@ class SrtProcessor:
         first_text = corrected_segments["first"]
         # 如果智能分割失败，回退到原始逻辑
         if not first_text:
-            first_text = "".join([w.text for w in first_segment_words])
+            first_text = self._joined_words_text(first_segment_words)
         first_start = first_segment_words[0].start_time
         # 对于第一段，使用词的原始结束时间；只有在没有第二段时才考虑override_end_time
         first_end = first_segment_words[-1].end_time
@@ -729,7 +731,7 @@ class SrtProcessor:
             second_text = corrected_segments["second"]
             # 如果智能分割失败，回退到原始逻辑
             if not second_text:
-                second_text = "".join([w.text for w in second_segment_words])
+                second_text = self._joined_words_text(second_segment_words)
             second_start = second_segment_words[0].start_time
             # 对于第二段（最后一段），使用override_end_time（如果提供了的话）
             second_end = override_end_time if override_end_time is not None else second_segment_words[-1].end_time
@@ -783,12 +785,12 @@ class SrtProcessor:
         if not second_words:
             return {"first": corrected_text, "second": ""}
 
-        first_segment_text = "".join([w.text for w in first_words])
-        second_segment_text = "".join([w.text for w in second_words])
+        first_segment_text = self._joined_words_text(first_words)
+        second_segment_text = self._joined_words_text(second_words)
 
         # 重新构建原始的词汇顺序，用于对齐
         all_words = first_words + second_words
-        original_text = "".join([w.text for w in all_words])
+        original_text = self._joined_words_text(all_words)
 
         # 方法1：直接使用词汇文本拼接（优先级最高）
         # 这是最准确的方法，因为它直接使用词汇分割结果
@@ -919,13 +921,12 @@ class SrtProcessor:
         Returns:
             过滤后的低置信度词汇列表（已排除标点符号）
         """
-        all_punctuation = app_config.ALL_SPLIT_PUNCTUATION
         filtered_words = []
 
         for word in words:
             # 只保留真正低置信度且不包含标点符号的词汇
             if word.confidence < self.SONIOX_THRESHOLDS["CONF_LIMIT"]:
-                if not self.check_word_has_punctuation(word.text, all_punctuation):
+                if not ALL_SPLIT_PUNCTUATION_CLASSIFIER.has_punctuation(word.text):
                     filtered_words.append(word)
 
         return filtered_words
@@ -949,6 +950,7 @@ class SrtProcessor:
 
     def _can_merge_entries(self, entry1: SubtitleEntry, entry2: SubtitleEntry) -> tuple[bool, str]:
         """检查两个条目是否可以合并"""
+        self.profile.count("_can_merge_entries")
         # 1. 检查音频事件 (Audio Events)
         # 任何包含音频事件的条目都不应合并
         is_evt1 = self._is_bracketed_content(entry1.text) or (self._is_audio_event_words(entry1.words_used) if entry1.words_used else False)
@@ -1124,7 +1126,7 @@ class SrtProcessor:
                 self.log(f"   ⚠️ Mode B: 修正后仍超限，需分割: \"{entry.text[:30]}...\" (修正后时长: {corrected_duration:.2f}s)")
 
                 # 使用修正后的时间进行分割
-                original_text_for_splitting = "".join([w.text for w in entry.words_used])
+                original_text_for_splitting = self._joined_words_text(entry.words_used)
                 split_entries = self.split_long_sentence(
                     original_text_for_splitting,
                     entry.words_used,
@@ -1372,7 +1374,7 @@ class SrtProcessor:
         # 查找分割点（标点符号）
         split_points = []
         for i, word in enumerate(entry.words_used):
-            if self.check_word_has_punctuation(word.text, app_config.ALL_SPLIT_PUNCTUATION):
+            if ALL_SPLIT_PUNCTUATION_CLASSIFIER.has_punctuation(word.text):
                 split_points.append(i)
 
         if not split_points:
@@ -1432,7 +1434,7 @@ class SrtProcessor:
                     index=entry.index,
                     start_time=entry.start_time,
                     end_time=last_word_first.end_time + first_end_adjustment,  # 使用原始结束时间+尾巴
-                    text="".join([w.text for w in first_words]),
+                    text=self._joined_words_text(first_words),
                     words_used=first_words
                 )
 
@@ -1440,7 +1442,7 @@ class SrtProcessor:
                     index=entry.index + 1,
                     start_time=first_word_second.start_time - second_start_adjustment,  # 使用原始开始时间-前摇
                     end_time=entry.end_time,
-                    text="".join([w.text for w in second_words]),
+                    text=self._joined_words_text(second_words),
                     words_used=second_words
                 )
             else:
@@ -1451,7 +1453,7 @@ class SrtProcessor:
                     index=entry.index,
                     start_time=entry.start_time,
                     end_time=last_word_first.end_time,  # 使用原始结束时间
-                    text="".join([w.text for w in first_words]),
+                    text=self._joined_words_text(first_words),
                     words_used=first_words
                 )
 
@@ -1459,7 +1461,7 @@ class SrtProcessor:
                     index=entry.index + 1,
                     start_time=first_word_second.start_time,  # 使用原始开始时间
                     end_time=entry.end_time,
-                    text="".join([w.text for w in second_words]),
+                    text=self._joined_words_text(second_words),
                     words_used=second_words
                 )
         else:
@@ -1468,7 +1470,7 @@ class SrtProcessor:
                 index=entry.index,
                 start_time=entry.start_time,
                 end_time=entry.start_time + first_duration,
-                text="".join([w.text for w in first_words]),
+                text=self._joined_words_text(first_words),
                 words_used=first_words
             )
 
@@ -1476,7 +1478,7 @@ class SrtProcessor:
                 index=entry.index + 1,
                 start_time=entry.start_time + first_duration,
                 end_time=entry.end_time,
-                text="".join([w.text for w in second_words]),
+                text=self._joined_words_text(second_words),
                 words_used=second_words
             )
 
@@ -1530,176 +1532,57 @@ class SrtProcessor:
 
         return marked_words
 
-    def _apply_soniox_ultimate_optimization(self, srt_lines: List[str]) -> List[str]:
+    def _apply_soniox_ultimate_optimization(self, entries: List[SubtitleEntry]) -> List[SubtitleEntry]:
         """
         Soniox专用终极优化：动态前移字幕开始时间
         根据上一个字幕结束时间到当前字幕开始时间的距离除以25来计算前移量
 
         Args:
-            srt_lines: 已生成的SRT行列表
+            entries: 已完成格式化的SubtitleEntry列表（直接修改其开始时间）
 
         Returns:
-            优化后的SRT行列表
+            优化后的SubtitleEntry列表
         """
-        if not srt_lines:
-            return srt_lines
-
-        
-        # 第一步：提取所有字幕信息
-        subtitles = []
-
-        for entry_str in srt_lines:
-            entry_lines = entry_str.strip().split('\n')
-            if len(entry_lines) >= 3:
-                # 第一行应该是字幕编号
-                if entry_lines[0].strip().isdigit():
-                    current_num = int(entry_lines[0].strip())
-
-                    # 第二行应该是时间戳
-                    if '-->' in entry_lines[1]:
-                        time_line = entry_lines[1].strip()
-                        start_str, end_str = time_line.split(' --> ')
-
-                        start_time = self._parse_srt_time(start_str)
-                        end_time = self._parse_srt_time(end_str)
-
-                        # 剩下的行是字幕内容
-                        content_lines = []
-                        for content_line in entry_lines[2:]:
-                            if content_line.strip():  # 只添加非空行
-                                content_lines.append(content_line.strip())
-
-                        subtitles.append({
-                            'number': current_num,
-                            'start': start_time,
-                            'end': end_time,
-                            'content': content_lines,
-                            'entry_str': entry_str  # 保存原始条目字符串
-                        })
-
+        # 与SRT文本往返时的行为保持一致：没有文本内容的条目不会输出
+        subtitles = [entry for entry in entries if entry.text]
         if not subtitles:
-            return srt_lines
-
-        # 第二步：进行优化并重新构建SRT
-        optimized_entries = []
+            return entries
 
-        # 先计算所有调整量
-        adjustments = {}
+        # 第一步：先基于原始时间计算所有调整量
+        entries_by_index = {entry.index: entry for entry in subtitles}
+        adjustments = []
         for subtitle in subtitles:
-            current_num = subtitle['number']
-            current_start = subtitle['start']
-            current_end = subtitle['end']
-
+            current_num = subtitle.index
             adjustment = 0.0
             if current_num == 1:
                 # 第一个字幕：从0秒到开始时间的距离除以25，最大不超过0.6秒
-                adjustment = min(current_start / 25.0, 0.6)
+                adjustment = min(subtitle.start_time / 25.0, 0.6)
                 if adjustment > 0.001:  # 只记录有意义的调整
                     self.log(f"   ⚡ 终极优化：字幕{current_num} 前移 {adjustment:.3f}s")
             else:
                 # 找到上一个字幕
-                prev_subtitle = None
-                for s in subtitles:
-                    if s['number'] == current_num - 1:
-                        prev_subtitle = s
-                        break
-
+                prev_subtitle = entries_by_index.get(current_num - 1)
                 if prev_subtitle:
-                    gap = current_start - prev_subtitle['end']
+                    gap = subtitle.start_time - prev_subtitle.end_time
                     adjustment = min(gap / 20.0, 0.5)  # 最大不超过0.5秒
                     if adjustment > 0.001:  # 只记录有意义的调整
                         self.log(f"   ⚡ 终极优化：字幕{current_num} 前移 {adjustment:.3f}s")
+            adjustments.append(adjustment)
 
-            adjustments[current_num] = adjustment
-
-        # 重新构建SRT条目
+        # 第二步：应用优化（结束时间不变，因此上一个条目的结束时间可直接使用）
         for i, subtitle in enumerate(subtitles):
-            current_num = subtitle['number']
-            current_start = subtitle['start']
-            current_end = subtitle['end']
-            adjustment = adjustments[current_num]
-
-            # 应用优化
-            if adjustment > 0.001:
-                new_start = max(0.001, current_start - adjustment)
-
-                # 【修复核心】：直接使用列表中的上一个元素，而不是通过序号查找
-                prev_end = 0.0
-                if i > 0:
-                    # 获取列表中的前一个条目
-                    prev_subtitle = subtitles[i - 1]
-                    # 计算前一个条目经过调整后的结束时间
-                    prev_adjustment = adjustments.get(prev_subtitle['number'], 0.0)
-                    if prev_adjustment > 0.001:
-                        # 如果前一个条目也被调整了，需要计算其新的开始时间
-                        prev_new_start = max(0.001, prev_subtitle['start'] - prev_adjustment)
-                        # 确保前一个条目的时间逻辑正确
-                        if prev_new_start <= prev_end:
-                            prev_new_start = prev_end + 0.001
-                        # 前一个条目的结束时间保持不变，所以使用原始结束时间
-                        prev_end = prev_subtitle['end']
-                    else:
-                        # 前一个条目没有被调整，直接使用原始结束时间
-                        prev_end = prev_subtitle['end']
-
-                # 安全检查：防止与上一个字幕重叠
-                if new_start <= prev_end:
-                    new_start = prev_end + 0.001
-
-                # 重新格式化时间戳
-                new_start_str = self._format_timecode(new_start)
-                new_end_str = self._format_timecode(current_end)
-                time_line = f"{new_start_str} --> {new_end_str}"
-            else:
-                # 不调整，使用原始时间戳
-                original_lines = subtitle['entry_str'].strip().split('\n')
-                time_line = original_lines[1]  # 原始时间戳行
-
-            # 构建新条目
-            entry_lines = [
-                str(current_num),
-                time_line
-            ]
-            entry_lines.extend(subtitle['content'])
-            entry_lines.append("")  # 空行
-
-            optimized_entries.append('\n'.join(entry_lines))
+            adjustment = adjustments[i]
+            if adjustment <= 0.001:
+                continue
+            new_start = max(0.001, subtitle.start_time - adjustment)
+            prev_end = subtitles[i - 1].end_time if i > 0 else 0.0
 
-        # 返回与原始格式相同的字符串列表（每个条目包含完整内容+空行）
-        result_list = []
-        for entry in optimized_entries:
-            result_list.append(entry + '\n')  # 确保每个条目以换行结束
+            # 安全检查：防止与上一个字幕重叠
+            if new_start <= prev_end:
+                new_start = prev_end + 0.001
+            subtitle.start_time = new_start
 
-        return result_list
-
-    def _parse_srt_time(self, time_str: str) -> float:
-        """将SRT时间格式转换为秒数"""
-        # 格式: 00:03:47,330
-        try:
-            parts = time_str.split(':')
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds_parts = parts[2].split(',')
-            seconds = int(seconds_parts[0])
-            milliseconds = int(seconds_parts[1])
-
-            total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
-            return total_seconds
-        except:
-            return 0.0
-
-    def _format_timecode(self, seconds: float) -> str:
-        """将秒数转换为SRT时间格式"""
-        try:
-            hours = int(seconds // 3600)
-            remaining = seconds % 3600
-            minutes = int(remaining // 60)
-            secs = int(remaining % 60)
-            milliseconds = int((remaining % 1) * 1000)
-
-            return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
-        except:
-            return "00:00:00,000"
+        return subtitles
 
     def _apply_word_level_spacing_validation(self, entries: List[SubtitleEntry]) -> List[SubtitleEntry]:
         """
@@ -1736,6 +1619,13 @@ class SrtProcessor:
             current_entry = entries[i]
             next_entry = entries[i + 1]
 
+            # 缺少词级数据的条目（如分割产生的条目）按时间范围从词时间索引中补回
+            for entry in (current_entry, next_entry):
+                if len(entry.words_used) < 2:
+                    recovered_words = self._find_word_data_for_time_range(entry.start_time, entry.end_time)
+                    if len(recovered_words) >= 2:
+                        entry.words_used = recovered_words
+
             # 检查是否有足够的词汇进行分析
             if len(current_entry.words_used) < 2 or len(next_entry.words_used) < 2:
                 self.log(f"   🔍 字幕{current_entry.index}->{next_entry.index}: 词汇数量不足，跳过词级分析")
@@ -1862,149 +1752,23 @@ class SrtProcessor:
 
         return False
 
-    def _parse_srt_entries_from_strings(self, srt_strings: List[str]) -> List[Dict]:
-        """
-        从SRT字符串列表解析字幕条目
-
-        Args:
-            srt_strings: SRT格式的字符串列表
-
-        Returns:
-            解析后的字幕条目字典列表
-        """
-        parsed_subtitles = []
-
-        for i, srt_entry in enumerate(srt_strings):
-            # 分割完整条目的行
-            entry_lines = srt_entry.strip().split('\n')
-            if len(entry_lines) < 2:  # 至少需要序号和时间戳行
-                continue
-
-            # 解析序号
-            try:
-                subtitle_number = int(entry_lines[0].strip())
-            except:
-                continue
-
-            # 解析时间戳
-            time_line = entry_lines[1]
-            if '-->' not in time_line:
-                continue
-
-            try:
-                time_parts = time_line.split(' --> ')
-                start_time = self._parse_srt_time(time_parts[0])
-                end_time = self._parse_srt_time(time_parts[1])
-
-                # 获取内容文本
-                content_lines = entry_lines[2:] if len(entry_lines) > 2 else []
-
-                parsed_subtitles.append({
-                    'number': subtitle_number,
-                    'start': start_time,
-                    'end': end_time,
-                    'content': content_lines,
-                    'entry_str': srt_entry  # 保存原始字符串用于重构
-                })
-
-            except Exception as e:
-                self.log(f"   ⚠️ 字幕{subtitle_number}时间戳解析失败: {str(e)}")
-                continue
-
-        return parsed_subtitles
-
-    def _build_srt_strings_from_parsed_entries(self, parsed_entries: List[Dict]) -> List[str]:
-        """
-        从解析的字幕条目重新构建SRT字符串列表
-
-        Args:
-            parsed_entries: 解析的字幕条目字典列表
-
-        Returns:
-            SRT格式的字符串列表
-        """
-        result_srt_lines = []
-        for subtitle in parsed_entries:
-            if all(k in subtitle for k in ['number', 'start', 'end', 'content']):
-                # 重新格式化时间戳
-                start_time_str = self._format_timecode(subtitle['start'])
-                end_time_str = self._format_timecode(subtitle['end'])
-                time_line = f"{start_time_str} --> {end_time_str}"
-
-                # 构建条目
-                entry_lines = [
-                    str(subtitle['number']),
-                    time_line
-                ]
-                entry_lines.extend(subtitle['content'])
-                entry_lines.append("")  # 空行
-
-                result_srt_lines.append('\n'.join(entry_lines) + '\n')
-
-        return result_srt_lines
-
-    def _reconstruct_subtitle_entry_from_srt_string(self, srt_string: str) -> Optional[SubtitleEntry]:
-        """
-        从SRT格式字符串重构SubtitleEntry对象并关联词级数据
-
-        Args:
-            srt_string: SRT格式的字符串（包含序号、时间戳、文本）
-
-        Returns:
-            重构的SubtitleEntry对象，包含词级数据；失败返回None
-        """
-        try:
-            lines = srt_string.strip().split('\n')
-            if len(lines) < 3:  # 至少需要序号、时间戳、文本
-                return None
-
-            # 解析序号
-            subtitle_number = int(lines[0].strip())
-
-            # 解析时间戳
-            time_line = lines[1]
-            if '-->' not in time_line:
-                return None
-
-            time_parts = time_line.split(' --> ')
-            start_time = self._parse_srt_time(time_parts[0])
-            end_time = self._parse_srt_time(time_parts[1])
-
-            # 提取文本内容
-            text_content = ''.join(lines[2:]) if len(lines) > 2 else ""
-
-            # 查找对应的词级数据
-            # 需要在处理过程中保存的词级数据映射表
-            word_data_for_entry = self._find_word_data_for_time_range(start_time, end_time)
-
-            return SubtitleEntry(
-                index=subtitle_number,
-                start_time=start_time,
-                end_time=end_time,
-                text=text_content,
-                words_used=word_data_for_entry
-            )
-
-        except Exception as e:
-            self.log(f"   ⚠️ 重构字幕条目失败: {str(e)}")
-            return None
-
     def _find_word_data_for_time_range(self, start_time: float, end_time: float) -> List[TimestampedWord]:
         """
         根据时间范围查找对应的词级数据
 
-        注意：这是一个简化实现，实际中需要在整个处理过程中保存词级映射
+        使用 process_to_srt 开始时构建的词时间索引 (按开始时间排序 + bisect)，
+        返回中点落在该时间范围内的词，复杂度 O(log n + k)。
 
         Args:
             start_time: 开始时间
             end_time: 结束时间
 
         Returns:
-            该时间范围内的词汇列表
+            该时间范围内的词汇列表（尚未构建索引时为空列表）
         """
-        # 这是一个简化实现，实际应该从全局词级数据中查找
-        # 暂时返回空列表，让间距验证回退到简单模式
-        return []
+        if self._word_time_index is None or start_time is None or end_time is None:
+            return []
+        return self._word_time_index.words_in_range(start_time, end_time)
 
     def _prepare_correction_prompt(self, segments: List[str], words: List[TimestampedWord]) -> List[str]:
         """
@@ -2064,121 +1828,68 @@ class SrtProcessor:
 
         return prompts
 
-    def _identify_segments_requiring_correction(self, segments: List[str], words: List[TimestampedWord], srt_entries: List[Dict] = None) -> List[int]:
+    def _get_word_confidence_index(self, words: List[TimestampedWord]) -> WordConfidenceIndex:
+        """返回词列表的置信度索引；同一词列表只构建一次，AI校对的各个步骤共用。"""
+        index = self._word_confidence_index
+        if index is None or index.words is not words:
+            index = WordConfidenceIndex(words, app_config.DEFAULT_SONIOX_LOW_CONFIDENCE_THRESHOLD,
+                                        ALL_SPLIT_PUNCTUATION_CLASSIFIER.has_punctuation)
+            self._word_confidence_index = index
+        return index
+
+    def _identify_segments_requiring_correction(self, segments: List[str], words: List[TimestampedWord], srt_entries: List[SubtitleEntry] = None) -> List[int]:
         """
         基于时间戳精确识别需要纠错的片段
 
         Args:
             segments: 文本片段列表（LLM分割后的片段）
             words: Soniox返回的词汇列表（包含置信度信息）
-            srt_entries: SRT条目列表（包含时间信息）
+            srt_entries: SubtitleEntry列表（包含时间信息）
 
         Returns:
             需要纠错的片段索引列表
         """
-        # 1. 收集低置信度词（带时间戳的对象）
-        low_conf_word_objects = []
-        all_punctuation = app_config.ALL_SPLIT_PUNCTUATION  # 使用合并的标点符号集合
-
-        for word in words:
-            # 跳过包含标点符号的词汇（包括标点符号本身和以标点结尾的词汇）
-            if self.check_word_has_punctuation(word.text, all_punctuation):
-                continue
-
-            # 跳过单个字符的词汇（除非是汉字、平假名或片假名）
-            text = word.text.strip()
-            if len(text) == 1:
-                # 检查是否为 CJK 汉字 (常用 + 扩展A)
-                is_cjk = ('\u4e00' <= text <= '\u9fff') or ('\u3400' <= text <= '\u4dbf')
-
-                # 检查是否为 平假名 (\u3040-\u309f) 或 片假名 (\u30a0-\u30ff)
-                is_kana = ('\u3040' <= text <= '\u30ff')
-
-                # 如果既不是汉字也不是假名（比如单个英文字母或数字），则跳过
-                if not (is_cjk or is_kana):
-                    continue
-
-            # 阈值检查
-            if word.confidence < app_config.DEFAULT_SONIOX_LOW_CONFIDENCE_THRESHOLD:
-                low_conf_word_objects.append(word)
-
-        if not low_conf_word_objects:
+        # 1. 低置信度且可作为纠错目标的词（预先计算的掩码）
+        confidence_index = self._get_word_confidence_index(words)
+        if not confidence_index.has_targets():
             return []
 
-        segments_to_correct = []
-
         # 2. 如果有时间信息，使用时间轴匹配（精准）
         if srt_entries and segments:
-            for i, entry in enumerate(srt_entries):
-                # 边界检查：确保索引不超出范围
-                if i >= len(segments):
-                    break
-
-                # 解析 SRT 时间字符串为秒数
-                time_str = entry.get('time', '')
-                if not time_str or '-->' not in time_str:
-                    continue
-
-                start_str, end_str = time_str.split(' --> ')
-                try:
-                    seg_start = self._parse_srt_time(start_str.strip())
-                    seg_end = self._parse_srt_time(end_str.strip())
-                except Exception:
-                    # 时间解析失败，跳过这个条目
-                    continue
-
-                # 边界检查：确保时间范围有效
-                if seg_start >= seg_end:
-                    continue
-
-                # 检查是否有任何低置信度词落在这个时间段内
-                has_error = False
-                for bad_word in low_conf_word_objects:
-                    # 边界检查：确保word对象有时间属性
-                    if not hasattr(bad_word, 'start_time') or not hasattr(bad_word, 'end_time'):
-                        continue
-
-                    # 边界检查：确保时间范围有效
-                    if bad_word.start_time >= bad_word.end_time:
-                        continue
-
-                    # 计算词的中点时间
-                    word_mid = (bad_word.start_time + bad_word.end_time) / 2
-
-                    # 判定条件：词的中点在片段范围内（放宽 0.1秒 容差）
-                    if (seg_start - 0.1) <= word_mid <= (seg_end + 0.1):
-                        has_error = True
-                        break  # 找到一个就足够标记该段
-
-                if has_error:
-                    segments_to_correct.append(i)
+            # 判定条件：有任何低置信度词的中点落在片段范围内（放宽 0.1秒 容差）；
+            # 超出片段数量的条目与时间缺失/无效的条目不参与
+            segments_to_correct = confidence_index.segments_with_targets(srt_entries[:len(segments)], tolerance=0.1)
 
         # 3. 如果没有时间信息（兜底），回退到文本匹配（但不推荐）
         else:
             self.log("⚠️ 警告：缺少时间信息，回退到模糊文本匹配，可能导致过度纠错")
 
-            # 将对象转换为文本列表进行回退匹配
-            low_confidence_texts = [word.text for word in low_conf_word_objects]
-
+            segments_to_correct = []
+            low_confidence_texts = list(dict.fromkeys(confidence_index.target_texts()))
             for i, segment in enumerate(segments):
                 # 检查这个片段中是否包含任何低置信度词汇
-                for low_conf_text in low_confidence_texts:
-                    if low_conf_text in segment:
-                        segments_to_correct.append(i)
-                        break
+                if any(low_conf_text in segment for low_conf_text in low_confidence_texts):
+                    segments_to_correct.append(i)
 
         self.log(f"📊 精确识别结果: {len(segments)} 个片段中，{len(segments_to_correct)} 个需要纠错")
         return segments_to_correct
 
     def _prepare_smart_correction_batches(self, segments: List[str], words: List[TimestampedWord],
-                                         target_segments: List[int]) -> List[List[int]]:
+                                         target_segments: List[int],
+                                         planner: Optional[CorrectionBatchPlanner] = None,
+                                         prompt_overhead_tokens: Optional[int] = None) -> List[List[int]]:
         """
         创建智能纠错批次，包含目标片段和上下文
 
+        按模型配置的上下文长度与输出上限打包：每个目标片段连同其前后相邻的非目标片段依次加入批次，
+        超出 token 预算或目标数上限时开始新的批次（见 CorrectionBatchPlanner）。
+
         Args:
             segments: 所有片段
             words: 词汇列表
             target_segments: 需要纠错的片段索引
+            planner: 批次规划器，默认按当前模型配置创建
+            prompt_overhead_tokens: 提示模板（不含上下文与片段列表）的tokens，默认按当前模板估算
 
         Returns:
             纠错批次的片段索引列表，每个批次包含目标片段+上下文
@@ -2186,58 +1897,28 @@ class SrtProcessor:
         if not target_segments:
             return []
 
-        BATCH_SIZE = 15  # 每个批次最多15个目标片段
-        batches = []
-
-        # 将目标片段按索引排序，确保按顺序处理
-        sorted_targets = sorted(target_segments)
-
-        # 分批处理目标片段，每批最多BATCH_SIZE个
-        for i in range(0, len(sorted_targets), BATCH_SIZE):
-            batch_target_indices = sorted_targets[i:i + BATCH_SIZE]
-            # 批次数量已在处理日志中显示
-
-            # 使用set避免重复，分离目标片段和上下文片段的处理
-            target_indices_set = set(batch_target_indices)
-            context_indices_set = set()
-
-            # 收集上下文索引（排除目标索引以避免重复）
-            for target_idx in batch_target_indices:
-                # 添加前一个片段作为上下文
-                if target_idx > 0:
-                    prev_idx = target_idx - 1
-                    # 只有当前一个片段不是目标片段时才添加为上下文
-                    if prev_idx not in sorted_targets:
-                        context_indices_set.add(prev_idx)
-
-                # 添加后一个片段作为上下文
-                if target_idx + 1 < len(segments):
-                    next_idx = target_idx + 1
-                    # 只有当后一个片段不是目标片段时才添加为上下文
-                    if next_idx not in sorted_targets:
-                        context_indices_set.add(next_idx)
-
-            # 合并目标索引和上下文索引，并排序
-            all_indices = target_indices_set | context_indices_set
-            batch_indices = sorted(all_indices)
-
-            # 添加上下文后检查批次大小，如果过大则截断上下文
-            if len(batch_indices) > BATCH_SIZE + 10:  # 允许一定的上下文空间
-                # 优先保留目标片段，去掉一些上下文
-                core_indices = [idx for idx in batch_indices if idx in batch_target_indices]
-                remaining_slots = BATCH_SIZE - len(core_indices)
-
-                if remaining_slots > 0:
-                    # 添加必要的上下文
-                    context_indices = [idx for idx in batch_indices if idx not in core_indices]
-                    batch_indices = sorted(core_indices + context_indices[:remaining_slots])
-                else:
-                    batch_indices = core_indices
+        if planner is None:
+            planner = self._create_correction_batch_planner()
+        if prompt_overhead_tokens is None:
+            prompt_overhead_tokens = self._correction_prompt_overhead_tokens(planner)
+        return planner.plan(segments, target_segments, prompt_overhead_tokens)
 
-            batches.append(batch_indices)
-            # 最终批次信息在处理时显示，这里不再重复
+    def _create_correction_batch_planner(self) -> CorrectionBatchPlanner:
+        """
+        按模型配置的上下文长度与输出上限创建校正批次规划器。
+        启用负载均衡池时任一批次都可能发往池中的任一配置，取各配置中最小的预算。
+        """
+        context_tokens = self.llm_context_tokens or app_config.DEFAULT_LLM_CONTEXT_TOKENS
+        max_output_tokens = self.llm_max_output_tokens or app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET
+        if self.llm_client_pool is not None:
+            for member in self.llm_client_pool.members:
+                context_tokens = min(context_tokens, member.context_tokens or app_config.DEFAULT_LLM_CONTEXT_TOKENS)
+                max_output_tokens = min(max_output_tokens, member.client.max_tokens or app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET)
+        return CorrectionBatchPlanner(context_tokens, max_output_tokens)
 
-        return batches
+    def _correction_prompt_overhead_tokens(self, planner: CorrectionBatchPlanner) -> int:
+        """校对提示模板本身（不含完整转录上下文与片段列表）的tokens。"""
+        return planner.count_tokens(self._build_smart_correction_prompt([], target_local_indices=[]))
 
     def _smart_context_extraction(self, full_text: str, batch_target_segments: List[str], max_length: int = 3000) -> str:
         """基于批次的智能上下文提取：动态提取批次相关上下文"""
@@ -2384,7 +2065,7 @@ class SrtProcessor:
 
     def _build_smart_correction_prompt(self, batch_segments: List[str], low_confidence_words: List[str] = None,
                                    all_segments: List[str] = None, target_indices: List[int] = None,
-                                   target_local_indices: List[int] = None) -> str:
+                                   target_local_indices: List[int] = None, context_max_length: int = 3000) -> str:
         """
         为智能纠错构建专用提示词（完整上下文+精确定位方案）
 
@@ -2394,6 +2075,7 @@ class SrtProcessor:
             all_segments: 完整的转录文本片段列表（用于提供上下文）
             target_indices: 当前批次对应的所有片段中的索引
             target_local_indices: 当前批次中需要纠错的目标片段的局部索引列表
+            context_max_length: 完整转录上下文的最大字符数
 
         Returns:
             智能纠错提示词
@@ -2410,10 +2092,10 @@ class SrtProcessor:
 
         # 构建完整上下文
         full_context = ""
-        if all_segments:
+        if all_segments and context_max_length > 0:
             full_context = "".join(all_segments)
             # 使用新的批次智能上下文提取
-            full_context = self._smart_context_extraction(full_context, batch_segments, 3000)
+            full_context = self._smart_context_extraction(full_context, batch_segments, context_max_length)
 
         # 构建智能提示词
         if full_context:
@@ -2494,19 +2176,19 @@ class SrtProcessor:
 
         return prompt
 
-    def _apply_post_srt_ai_correction(self, srt_content: str, words: List[TimestampedWord]) -> tuple[str, List[str]]:
+    def _apply_post_srt_ai_correction(self, entries: List[SubtitleEntry], words: List[TimestampedWord]) -> tuple[List[SubtitleEntry], List[str]]:
         """
-        在SRT生成完成后进行AI校对（后处理模式）
+        在SRT条目生成完成后进行AI校对（后处理模式）
 
         Args:
-            srt_content: 完整的SRT内容
+            entries: 最终的SubtitleEntry列表（校对结果直接写回条目文本）
             words: 原始词汇列表（用于收集低置信度词汇）
 
         Returns:
-            tuple: (校对后的SRT内容, 校对提示列表)
+            tuple: (校对后的SubtitleEntry列表, 校对提示列表)
         """
-        if not srt_content.strip():
-            return srt_content, []
+        if not entries:
+            return entries, []
 
         self.log("🤖 开始SRT后处理AI校对")
         correction_hints: List[str] = []
@@ -2516,24 +2198,24 @@ class SrtProcessor:
         total_range = self._current_progress_range
 
         try:
-            # 1. 解析SRT内容为条目列表
-            srt_entries = self._parse_srt_content(srt_content)
+            # 1. 只校对有文本内容的条目
+            srt_entries = [entry for entry in entries if entry.text]
             if not srt_entries:
-                self.log("⚠️ SRT内容解析为空，跳过AI校对")
-                return srt_content, []
+                self.log("⚠️ SRT条目为空，跳过AI校对")
+                return entries, []
 
-            self.log(f"   解析到 {len(srt_entries)} 个SRT条目")
+            self.log(f"   共 {len(srt_entries)} 个SRT条目")
 
             # 2. 收集低置信度词汇
             low_conf_words = self._collect_low_confidence_words(words)
             if not low_conf_words:
                 self.log("✅ 未发现低置信度词汇，跳过AI校对")
-                return srt_content, []
+                return entries, []
 
             # 统计信息在后续日志中显示，这里不再重复
 
             # 3. 提取需要校对的文本片段
-            text_segments = [entry['text'] for entry in srt_entries]
+            text_segments = [entry.text for entry in srt_entries]
 
             # 4. 标记低置信度词汇
             marked_segments = self._mark_low_confidence_words_in_segments(text_segments, low_conf_words)
@@ -2542,7 +2224,7 @@ class SrtProcessor:
             has_corrections = any('【' in seg for seg in marked_segments)
             if not has_corrections:
                 self.log("✅ 没有需要校对的内容，跳过AI校对")
-                return srt_content, []
+                return entries, []
 
             self.log(f"   检测到需要校对的片段数量: {sum(1 for seg in marked_segments if '【' in seg)}")
 
@@ -2550,74 +2232,21 @@ class SrtProcessor:
             corrected_segments, ai_correction_hints = self._perform_text_correction(marked_segments, words, srt_entries)
             correction_hints.extend(ai_correction_hints)
 
-            # 7. 重新生成SRT内容
-            corrected_srt_content = self._rebuild_srt_content(srt_entries, corrected_segments)
-
-            # 8. 清理AI可能错误添加的【】符号
-            corrected_srt_content = self._clean_bracket_symbols(corrected_srt_content)
+            # 7. 把校对后的文本写回条目，并清理AI可能错误添加的【】符号
+            for entry, corrected_text in zip(srt_entries, corrected_segments):
+                entry.text = self._clean_bracket_symbols(corrected_text)
 
             # 校对统计已在其他地方显示，避免重复
-            return corrected_srt_content, correction_hints
+            return entries, correction_hints
 
         except Exception as e:
             error_msg = f"❌ SRT后处理AI校对失败: {str(e)}"
             self.log(error_msg)
             correction_hints.append(error_msg)
-            return srt_content, correction_hints
-
-    def _parse_srt_content(self, srt_content: str) -> List[Dict]:
-        """
-        将SRT内容解析为条目列表
-
-        Args:
-            srt_content: SRT格式的文本内容
-
-        Returns:
-            List[Dict]: 包含索引、时间戳和文本的条目列表
-        """
-        entries = []
-        lines = srt_content.strip().split('\n')
-
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-
-            # 跳过空行
-            if not line:
-                i += 1
-                continue
-
-            # 解析序号
-            try:
-                index = int(line)
-                i += 1
-
-                # 解析时间戳
-                if i >= len(lines):
-                    break
-                time_line = lines[i].strip()
-                i += 1
-
-                # 解析文本（可能多行）
-                text_lines = []
-                while i < len(lines) and lines[i].strip():
-                    text_lines.append(lines[i].strip())
-                    i += 1
-
-                text = '\n'.join(text_lines)
-
-                if text:  # 确保有文本内容
-                    entries.append({
-                        'index': index,
-                        'time': time_line,
-                        'text': text
-                    })
-            except (ValueError, IndexError):
-                # 解析失败，跳过当前行
-                i += 1
-                continue
-
-        return entries
+            return entries, correction_hints
+        finally:
+            # 释放对词列表的引用
+            self._word_confidence_index = None
 
     def _collect_low_confidence_words(self, words: List[TimestampedWord]) -> List[TimestampedWord]:
         """
@@ -2629,12 +2258,7 @@ class SrtProcessor:
         Returns:
             List[TimestampedWord]: 低置信度词汇列表
         """
-        low_conf_words = []
-        for word in words:
-            if hasattr(word, 'confidence') and word.confidence is not None:
-                if word.confidence < app_config.DEFAULT_SONIOX_LOW_CONFIDENCE_THRESHOLD:
-                    low_conf_words.append(word)
-        return low_conf_words
+        return self._get_word_confidence_index(words).low_confidence_words()
 
     def _mark_low_confidence_words_in_segments(self, segments: List[str], low_conf_words: List[TimestampedWord]) -> List[str]:
         """
@@ -2647,32 +2271,57 @@ class SrtProcessor:
         Returns:
             List[str]: 标记了低置信度词汇的文本片段列表
         """
+        # 低置信度词汇只需排序、过滤一次，所有片段共用
+        markable_texts = self._markable_low_confidence_texts(low_conf_words)
+
         marked_segments = []
 
         for segment in segments:
             # 重新构建文本，只在低置信度词汇的具体位置添加标记
-            marked_text = self._rebuild_text_with_precise_marking(segment, low_conf_words)
+            marked_text = self._rebuild_text_with_precise_marking(segment, markable_texts)
             marked_segments.append(marked_text)
 
         return marked_segments
 
-    def _rebuild_text_with_precise_marking(self, text: str, low_conf_words: List[TimestampedWord]) -> str:
+    def _markable_low_confidence_texts(self, low_conf_words: List[TimestampedWord]) -> List[str]:
+        """
+        按开始时间排序低置信度词汇，返回可以标记的词文本（去除首尾空白，跳过空白、纯标点和标点过半的词）
+
+        Args:
+            low_conf_words: 低置信度词汇列表（带时间戳信息）
+
+        Returns:
+            List[str]: 按时间顺序排列的待标记词文本
+        """
+        markable_texts = []
+        for low_conf_word in sorted(low_conf_words, key=lambda w: w.start_time):
+            word_text = low_conf_word.text.strip()
+
+            # 跳过不符合标记条件的词汇
+            if not word_text:
+                continue
+            if not any(c.isalnum() for c in word_text):
+                continue
+            punctuation_count = sum(1 for c in word_text if not c.isalnum())
+            if punctuation_count > len(word_text) / 2:
+                continue
+            markable_texts.append(word_text)
+        return markable_texts
+
+    def _rebuild_text_with_precise_marking(self, text: str, markable_texts: List[str]) -> str:
         """
         基于时间戳精确重建带标记的文本
 
         Args:
             text: 原始文本片段
-            low_conf_words: 低置信度词汇列表（带时间戳信息）
+            markable_texts: 按时间顺序排列的待标记词文本（见 _markable_low_confidence_texts）
 
         Returns:
             str: 在正确位置添加了【】标记的文本
         """
-        if not low_conf_words:
+        if not markable_texts:
             return text
 
-        # 将低置信度词汇按开始时间排序，确保按顺序处理
-        sorted_low_conf_words = sorted(low_conf_words, key=lambda w: w.start_time)
-
         # 逐字符重建文本
         result = []
         current_pos = 0
@@ -2681,18 +2330,7 @@ class SrtProcessor:
         # 记录哪些位置已经被标记（避免重复标记）
         marked_ranges = []
 
-        for low_conf_word in sorted_low_conf_words:
-            word_text = low_conf_word.text.strip()
-
-            # 跳过不符合标记条件的词汇
-            if not word_text:
-                continue
-            if not any(c.isalnum() for c in word_text):
-                continue
-            punctuation_count = sum(1 for c in word_text if not c.isalnum())
-            if punctuation_count > len(word_text) / 2:
-                continue
-
+        for word_text in markable_texts:
             # 在文本中查找这个词
             search_start = current_pos
             while search_start < text_len:
@@ -2761,14 +2399,14 @@ class SrtProcessor:
 
         return text
 
-    def _perform_text_correction(self, marked_segments: List[str], words: List[TimestampedWord], srt_entries: List[Dict] = None) -> tuple[List[str], List[str]]:
+    def _perform_text_correction(self, marked_segments: List[str], words: List[TimestampedWord], srt_entries: List[SubtitleEntry] = None) -> tuple[List[str], List[str]]:
         """
         执行文本纠错（复用现有的LLM纠错逻辑）
 
         Args:
             marked_segments: 标记了低置信度词汇的文本片段列表
             words: 原始词汇列表
-            srt_entries: SRT条目列表（包含时间信息，用于精准定位）
+            srt_entries: SubtitleEntry列表（包含时间信息，用于精准定位）
 
         Returns:
             tuple: (纠错后的文本片段列表, 校对提示列表)
@@ -2838,32 +2476,7 @@ class SrtProcessor:
             "unmarked_original": unmarked_original
         }
 
-    def _rebuild_srt_content(self, original_entries: List[Dict], corrected_texts: List[str]) -> str:
-        """
-        使用校对后的文本重新构建SRT内容
-
-        Args:
-            original_entries: 原始SRT条目列表
-            corrected_texts: 校对后的文本列表
-
-        Returns:
-            str: 重新构建的SRT内容
-        """
-        rebuilt_lines = []
-
-        for i, entry in enumerate(original_entries):
-            # 使用对应的纠错文本（如果有的话）
-            corrected_text = corrected_texts[i] if i < len(corrected_texts) else entry['text']
-
-            # 构建SRT条目
-            rebuilt_lines.append(str(entry['index']))
-            rebuilt_lines.append(entry['time'])
-            rebuilt_lines.append(corrected_text)
-            rebuilt_lines.append('')  # 空行分隔
-
-        return '\n'.join(rebuilt_lines).strip()
-
-    def _batch_correct_with_llm(self, segments: List[str], words: List[TimestampedWord], srt_entries: List[Dict] = None) -> tuple[List[str], List[str]]:
+    def _batch_correct_with_llm(self, segments: List[str], words: List[TimestampedWord], srt_entries: List[SubtitleEntry] = None) -> tuple[List[str], List[str]]:
         """
         使用LLM智能纠正低置信度词汇
 
@@ -2878,10 +2491,8 @@ class SrtProcessor:
             return segments, []
 
         # 第0步：获取所有低置信度词汇（用于提示和识别）
-        low_confidence_words = []
-        for word in words:
-            if word.confidence < app_config.DEFAULT_SONIOX_LOW_CONFIDENCE_THRESHOLD:
-                low_confidence_words.append(word.text)
+        confidence_index = self._get_word_confidence_index(words)
+        low_confidence_words = confidence_index.low_confidence_texts()
 
         # 第1步：智能识别需要纠错的片段（传递srt_entries以支持时间戳匹配）
         target_segments = self._identify_segments_requiring_correction(segments, words, srt_entries)
@@ -2895,15 +2506,8 @@ class SrtProcessor:
         for i in target_segments:
             segments_with_corrections.add(i)
 
-        # 计算过滤后的词汇数量
-        filtered_low_conf_count = 0
-        for word_text in low_confidence_words:
-            # low_confidence_words 中已经存储了字符串（word.text）
-            word_text = word_text.strip()
-            if (word_text and
-                word_text.strip() and  # 非空
-                not all(c in ' 、。！？,.!?ー…' for c in word_text)):  # 不是纯标点符号
-                filtered_low_conf_count += 1
+        # 计算过滤后的词汇数量（非空且不是纯标点符号）
+        filtered_low_conf_count = confidence_index.countable_low_confidence_count()
 
         correction_hints = []
         if low_confidence_words:
@@ -2920,8 +2524,14 @@ class SrtProcessor:
 
         # 不再显示片段预览，简化用户日志
 
-        # 第2步：创建智能批次（包含上下文）- 确保只处理真正需要校对的片段
-        segment_batches = self._prepare_smart_correction_batches(segments, words, target_segments)
+        # 第2步：按模型的token预算创建智能批次（包含上下文）- 确保只处理真正需要校对的片段
+        planner = self._create_correction_batch_planner()
+        prompt_overhead_tokens = self._correction_prompt_overhead_tokens(planner)
+        context_max_length = planner.reference_context_chars("".join(segments), prompt_overhead_tokens)
+        segment_batches = self._prepare_smart_correction_batches(segments, words, target_segments,
+                                                                 planner, prompt_overhead_tokens)
+        self.log(f"📐 批次规划: 上下文长度 {planner.context_tokens} tokens / 输出上限 {planner.max_output_tokens} tokens，"
+                 f"每批片段预算 {planner.batch_input_tokens(prompt_overhead_tokens)} tokens，参考上下文 {context_max_length} 字符")
 
         # === 修改点 1: 移除过时的验证警告，改用精准统计 ===
 
@@ -2954,6 +2564,8 @@ class SrtProcessor:
         corrected_segments = list(segments)  # 创建副本用于修改
         total_corrections = 0
 
+        # 提示词只读取原始片段，批次之间互不依赖：先构建全部批次，再并发请求
+        batch_jobs = []  # (批次序号, 批次内片段的全局索引, 批次片段, 提示词)
         for batch_idx, batch_indices in enumerate(segment_batches):
             batch_segments = [segments[i] for i in batch_indices]
             try:
@@ -2962,7 +2574,7 @@ class SrtProcessor:
                 current_batch_targets = sum(1 for i in batch_indices if i in self._global_target_set)
 
                 # 优化日志：明确显示 (总载荷 vs 目标数)
-                self.log(f"🔥 处理批次 {batch_idx + 1}/{len(segment_batches)} (载荷: {len(batch_indices)}片段 | 含目标: {current_batch_targets}个)")
+                self.log(f"🔥 准备批次 {batch_idx + 1}/{len(segment_batches)} (载荷: {len(batch_indices)}片段 | 含目标: {current_batch_targets}个)")
 
                 # === 关键修改开始 ===
                 # 计算当前批次中，哪些是真正的任务目标（Local Index）
@@ -2987,9 +2599,24 @@ class SrtProcessor:
                     low_confidence_words,
                     all_segments=segments,  # 传入完整片段列表作为上下文
                     target_indices=batch_indices,  # 传入当前批次的实际索引
-                    target_local_indices=real_task_local_indices  # 传入真实任务索引
+                    target_local_indices=real_task_local_indices,  # 传入真实任务索引
+                    context_max_length=context_max_length
                 )
-                response = self._call_llm_api(smart_prompt, batch_segments)
+                batch_jobs.append((batch_idx, batch_indices, batch_segments, smart_prompt))
+            except Exception as e:
+                self.log(f"  ❌ 批次失败: {e}")
+                continue
+
+        # 并发请求各批次，每返回一个批次报告一次进度
+        batch_responses = self._run_correction_batches(batch_jobs, len(segment_batches))
+
+        # 所有批次返回后按批次顺序应用纠错结果，与逐批顺序执行的结果一致
+        for batch_idx, batch_indices, batch_segments, _ in batch_jobs:
+            if batch_idx not in batch_responses:
+                continue
+            response = batch_responses[batch_idx]
+            try:
+                self.log(f"📋 批次 {batch_idx + 1}/{len(segment_batches)} 的纠错结果:")
 
                 # 解析LLM响应
                 corrections = self._parse_llm_correction_response(response)
@@ -3048,19 +2675,8 @@ class SrtProcessor:
         mark_removals = len([h for h in correction_hints if "去除标记" in str(h)]) if hasattr(self, '_log_messages') else None
 
         # 生成重新组织的校对总结
-        # 获取统计信息（使用与标记逻辑相同的过滤条件）
-        filtered_low_conf_words = []
-        for word in words:
-            if word.confidence < app_config.DEFAULT_SONIOX_LOW_CONFIDENCE_THRESHOLD:
-                word_text = word.text.strip()
-
-                # 应用更宽松的过滤条件，主要过滤纯标点符号和空白
-                if (word_text and
-                    word_text.strip() and  # 非空
-                    not all(c in ' 、。！？,.!?ー…' for c in word_text)):  # 不是纯标点符号
-                    filtered_low_conf_words.append(word)
-
-        low_conf_words_count = len(filtered_low_conf_words)
+        # 获取统计信息（主要过滤纯标点符号和空白）
+        low_conf_words_count = filtered_low_conf_count
         segments_needing_correction = len(target_segments) if 'target_segments' in locals() else 0
 
         # 构建报告标题和总体统计
@@ -3107,98 +2723,154 @@ class SrtProcessor:
 
         return corrected_segments, correction_hints
 
+    def _run_correction_batches(self, batch_jobs: List[tuple], total_batches: int) -> Dict[int, str]:
+        """
+        并发请求各纠错批次，同时在途的请求数不超过模型配置的并发上限 (负载均衡池模式下为池中各配置并发上限之和)。
+
+        Args:
+            batch_jobs: (批次序号, 全局索引, 批次片段, 提示词) 列表
+            total_batches: 批次总数 (用于日志)
+
+        Returns:
+            {批次序号: LLM响应文本}；任务取消后不再发送新批次，未返回的批次不在结果中
+        """
+        batch_responses: Dict[int, str] = {}
+        if not batch_jobs:
+            return batch_responses
+        pool = self.llm_client_pool
+        max_in_flight = pool.total_capacity if pool is not None else self.llm_max_concurrent_requests
+        max_in_flight = max(1, min(int(max_in_flight or 1), len(batch_jobs)))
+        self.log(f"⚡ 发送 {len(batch_jobs)} 个纠错批次，同时在途请求上限: {max_in_flight}")
+
+        pending: Dict[Any, int] = {}  # future -> 批次序号
+        job_iter = iter(batch_jobs)
+        completed = 0
+        executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-correction")
+        try:
+            while True:
+                while len(pending) < max_in_flight and self._is_worker_running():
+                    job = next(job_iter, None)
+                    if job is None:
+                        break
+                    batch_idx, _, batch_segments, smart_prompt = job
+                    pending[executor.submit(self._call_llm_api, smart_prompt, batch_segments)] = batch_idx
+                if not pending:
+                    break
+                # 定时唤醒以便及时响应取消
+                done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_idx = pending.pop(future)
+                    completed += 1
+                    try:
+                        batch_responses[batch_idx] = future.result()
+                        self.log(f"  📨 批次 {batch_idx + 1}/{total_batches} 已返回 (已完成 {completed}/{len(batch_jobs)})")
+                    except Exception as e:
+                        self.log(f"  ❌ 批次 {batch_idx + 1} 失败: {e}")
+                    start, weight = self._ai_correction_progress_span
+                    if weight:
+                        self._emit_srt_progress(start + int(weight * completed / len(batch_jobs)), 100)
+                if not self._is_worker_running():
+                    self.log(f"⚠️ 任务已取消，放弃尚未返回的 {len(pending)} 个纠错批次")
+                    break
+        finally:
+            # 已在途的请求无法中断，交由后台线程自行结束
+            executor.shutdown(wait=False)
+        return batch_responses
+
     def _call_llm_api(self, prompt: str, batch_segments: List[str]) -> str:
         """
         调用LLM API进行文本纠错
 
+        设置了任务检查点时，以提示词为键记录成功的响应；中断后重新处理时相同的批次直接从检查点恢复。
+
         Args:
             prompt: 纠错提示词
 
         Returns:
             LLM API响应文本
         """
-        try:
-            import requests
-            import json
+        checkpoint_key = make_checkpoint_key(prompt) if self.llm_checkpoint is not None else None
+        if checkpoint_key is not None:
+            restored = self.llm_checkpoint.get("correction", checkpoint_key)
+            if restored is not None:
+                self.log("♻️ 从检查点恢复了该批次的纠错结果")
+                return restored
+
+        content = self._send_correction_request(prompt)
+        if content is None:
+            return '{"corrections": []}'
+        if checkpoint_key is not None:
+            self.llm_checkpoint.put("correction", checkpoint_key, content)
+        return content
+
+    def _send_correction_request(self, prompt: str) -> Optional[str]:
+        """
+        发送纠错请求，失败时返回 None。
+
+        启用负载均衡池时按池中各配置的延迟与错误率选择配置，请求失败时换用池中的其他配置重试，
+        直到所有配置都失败为止。
+        """
+        pool = self.llm_client_pool
+        if pool is None:
+            from core.llm_api import LLMClient, _parse_api_url_and_model, get_profile_transport
 
             # 获取LLM API配置
             api_config = self.get_current_llm_config_for_api_call()
+            target_url, effective_model = _parse_api_url_and_model(
+                api_config.get('custom_api_base_url_str') or None,
+                api_config.get('custom_model_name', app_config.DEFAULT_LLM_MODEL_NAME),
+                app_config.DEFAULT_LLM_API_BASE_URL, app_config.DEFAULT_LLM_MODEL_NAME,
+                None
+            )
 
-            api_key = api_config['api_key']
-            input_base_url = api_config.get('custom_api_base_url_str', app_config.DEFAULT_LLM_API_BASE_URL)
-            model_name = api_config.get('custom_model_name', app_config.DEFAULT_LLM_MODEL_NAME)
-            temperature = api_config.get('custom_temperature', app_config.DEFAULT_LLM_TEMPERATURE)
-
-            # 处理API URL，确保包含正确的路径
-            if not input_base_url:
-                # 使用默认URL并添加完整路径
-                base_url = app_config.DEFAULT_LLM_API_BASE_URL
-                if not base_url.endswith('/'):
-                    base_url += '/'
-                base_url += "v1/chat/completions"
-            else:
-                raw_url = input_base_url.strip()
-                # 检查是否是完整URL（以#结尾）
-                if raw_url.endswith('#'):
-                    base_url = raw_url[:-1]  # 移除#标记
-                else:
-                    # 根据API类型添加正确的路径
-                    if "api.anthropic.com" in raw_url:
-                        base_url = raw_url
-                        if not base_url.endswith('/'):
-                            base_url += '/'
-                        base_url += "v1/messages"
-                    elif "generativelanguage.googleapis.com" in raw_url:
-                        base_url = raw_url
-                        # Gemini API直接使用base_url，在请求时添加?key参数
-                    else:
-                        # OpenAI兼容格式
-                        base_url = raw_url
-                        if not base_url.endswith('/'):
-                            base_url += '/'
-                        base_url += "v1/chat/completions"
+            # 与分块分割使用同一个传输对象：各校正批次复用同一连接池，
+            # 并经过该配置的每分钟请求数限速与 429 暂停，并发批次不会超出服务商的配额
+            transport = self.llm_transport
+            if transport is None:
+                transport = get_profile_transport(api_config.get('custom_api_base_url_str') or None,
+                                                  api_config.get('custom_model_name', app_config.DEFAULT_LLM_MODEL_NAME),
+                                                  None, self.llm_profile_id, self.llm_max_concurrent_requests,
+                                                  self.llm_requests_per_minute)
+            client = LLMClient(
+                api_config['api_key'], target_url, effective_model,
+                temperature=api_config.get('custom_temperature', app_config.DEFAULT_LLM_TEMPERATURE),
+                max_tokens=self.llm_max_output_tokens, transport=transport
+            )
+            return self._request_llm_correction(client, prompt)
+
+        failed_member = None
+        for _ in range(len(pool.members)):
+            member = pool.acquire(avoid=failed_member)
+            started_at = time.perf_counter()
+            content = self._request_llm_correction(member.client, prompt)
+            pool.release(member, time.perf_counter() - started_at, content is not None)
+            if content is not None:
+                return content
+            failed_member = member
+            self.log(f"🔁 配置 '{member.name}' 校正请求失败，换用负载均衡池中的其他配置重试")
+        return None
+
+    def _request_llm_correction(self, client: Any, full_prompt: str) -> Optional[str]:
+        """
+        用指定客户端发送一次纠错请求。
+
+        Returns:
+            响应文本 (LLM返回空内容时为空的纠正结果)；请求失败时返回 None
+        """
+        try:
+            import requests
+            import json
 
             # 直接使用传入的完整prompt，避免重复构建
             # prompt参数已经包含了完整的纠错指令
-            full_prompt = prompt
-
-            self.log(f"📞 调用LLM API: {model_name}")
-
-            # 构建API请求
-            if "generativelanguage.googleapis.com" in base_url:
-                # Gemini API格式
-                payload = {
-                    "contents": [{"parts": [{"text": full_prompt}]}],
-                    "generationConfig": {
-                        "temperature": temperature,
-                        "max_tokens": 4000
-                    }
-                }
-                headers = {"Content-Type": "application/json"}
-                # Gemini API使用不同的认证方式
-                response = requests.post(f"{base_url}?key={api_key}", headers=headers, json=payload, timeout=180)
-            elif "/v1/messages" in base_url or "api.anthropic.com" in base_url:
-                # Claude API格式
-                payload = {
-                    "model": model_name,
-                    "max_tokens": 4000,
-                    "messages": [{"role": "user", "content": full_prompt}]
-                }
-                if temperature is not None:
-                    payload["temperature"] = temperature
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}",
-                    "anthropic-version": "2023-06-01"
-                }
-                response = requests.post(base_url, headers=headers, json=payload, timeout=180)
-            else:
+            self.log(f"📞 调用LLM API: {client.model}")
+
+            system_content = ""
+            user_content = full_prompt
+            if client.api_format == app_config.API_FORMAT_OPENAI:
                 # OpenAI兼容格式 - 将完整prompt拆分为system和user部分
                 # 从full_prompt中提取system_prompt部分
                 lines = full_prompt.split('\n')
-                system_content = ""
-                user_content = ""
 
                 # 找到系统提示词部分
                 if lines and ("ASR错词校对" in lines[0] or "你是一位专业的ASR" in lines[0]):
@@ -3210,32 +2882,9 @@ class SrtProcessor:
                     system_content = app_config.DEEPSEEK_SYSTEM_PROMPT_CORRECTION
                     user_content = full_prompt
 
-                payload = {
-                    "model": model_name,
-                    "messages": [
-                        {"role": "system", "content": system_content},
-                        {"role": "user", "content": user_content}
-                    ],
-                    "max_tokens": 4000
-                }
-                if temperature is not None:
-                    payload["temperature"] = temperature
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}"
-                }
-                response = requests.post(base_url, headers=headers, json=payload, timeout=180)
-
-            response.raise_for_status()
-            data = response.json()
-
-            # 解析响应
-            content = None
-            if "choices" in data and data["choices"]:
-                content = data["choices"][0].get("message", {}).get("content")
-            elif "candidates" in data and data["candidates"]:
-                content = data["candidates"][0].get("content", {}).get("parts", [{}])[0].get("text")
+            # 输出上限与规划批次时使用的预算一致
+            content = client.complete(system_content, user_content,
+                                      max_tokens=client.max_tokens or app_config.DEFAULT_LLM_OUTPUT_TOKEN_BUDGET).content
 
             if content:
                 self.log(f"📨 LLM响应成功 ({len(content)}字符)")
@@ -3246,16 +2895,16 @@ class SrtProcessor:
 
         except requests.exceptions.Timeout:
             self.log("⏰ LLM API超时")
-            return '{"corrections": []}'
+            return None
         except requests.exceptions.RequestException as e:
             self.log(f"🌐 LLM请求失败: {e}")
-            return '{"corrections": []}'
+            return None
         except json.JSONDecodeError as e:
             self.log(f"📄 LLM响应解析失败")
-            return '{"corrections": []}'
+            return None
         except Exception as e:
             self.log(f"❌ LLM调用失败: {e}")
-            return '{"corrections": []}'
+            return None
 
     def _parse_llm_correction_response(self, response: str) -> List[Dict[str, Any]]:
         """
@@ -3348,10 +2997,41 @@ class SrtProcessor:
             return []
 
     def process_to_srt(self, parsed_transcription: ParsedTranscription,
-                       llm_segments_text: List[str],
+                       llm_segments_text: Iterable[str],
                        source_format: str = "elevenlabs",
                        enable_ai_correction: bool = False
                       ) -> tuple[Optional[str], List[str]]:
+        """
+        根据 LLM 分割片段与 ASR 词时间戳生成 SRT 内容。
+
+        llm_segments_text 通常是片段列表；也可以是按顺序逐个产生片段的可迭代对象 (如流式分割的 SegmentStream)，
+        逐片段对齐模式下会边接收边对齐，其他对齐模式需要完整片段列表，会先等待全部片段。
+
+        处理期间的各阶段耗时、热点函数调用次数与条目数量记录在 self.profile 中，
+        可通过 get_last_profile() 获取，或用 write_profile_sidecar() 写入 JSON 旁路文件。
+        """
+        self.profile = ProcessingProfile(
+            source_format=source_format,
+            alignment_mode=self.alignment_mode,
+            word_count=len(parsed_transcription.words) if parsed_transcription and parsed_transcription.words else 0,
+            segment_count=len(llm_segments_text) if isinstance(llm_segments_text, list) else None,
+            ai_correction=enable_ai_correction
+        )
+        result = None
+        try:
+            result = self._run_process_to_srt(parsed_transcription, llm_segments_text, source_format, enable_ai_correction)
+            return result
+        finally:
+            self.profile.finish(completed=result is not None and result[0] is not None)
+            if result is not None:
+                self.log(f"SRT处理耗时 {self.profile.total_wall_time:.2f}s: " + ", ".join(
+                    f"{name} {data['wall_time_s']:.2f}s" for name, data in self.profile.phases.items()))
+
+    def _run_process_to_srt(self, parsed_transcription: ParsedTranscription,
+                            llm_segments_text: Iterable[str],
+                            source_format: str,
+                            enable_ai_correction: bool
+                           ) -> tuple[Optional[str], List[str]]:
         self.log("--- 开始对齐 LLM 片段 (SrtProcessor) ---")
 
         # 在函数开始就初始化correction_hints，避免变量作用域错误
@@ -3395,24 +3075,78 @@ class SrtProcessor:
         intermediate_entries: List[SubtitleEntry] = []
         word_search_start_index = 0
         unaligned_segments: List[str] = []
-        all_parsed_words = parsed_transcription.words
-        if not llm_segments_text: self.log("错误：LLM 未返回任何分割片段。"); return None
+        # 词列表统一转为列式存储 (WordStore) 上的视图，对齐得到的词区间只保存 (起, 止) 下标而不复制词对象
+        all_parsed_words = as_word_span(parsed_transcription.words) if parsed_transcription.words else parsed_transcription.words
+        # 流式片段：逐片段对齐时边接收边对齐，进度按已消耗的词比例估算；其他模式先收齐
+        streamed_segments: Optional[Iterable[str]] = None
+        if not isinstance(llm_segments_text, list):
+            if self.alignment_mode == app_config.ALIGNMENT_MODE_SEQUENTIAL and all_parsed_words:
+                streamed_segments = llm_segments_text
+                llm_segments_text = []
+            else:
+                llm_segments_text = list(llm_segments_text)
+        if not llm_segments_text and streamed_segments is None: self.log("错误：LLM 未返回任何分割片段。"); return None
         if not all_parsed_words: self.log("错误：解析后的词列表为空，无法进行对齐。"); return None
 
 
         total_llm_segments = len(llm_segments_text)
+        def _align_progress() -> int:
+            if streamed_segments is not None:
+                return int((word_search_start_index / len(all_parsed_words)) * phase_weight_align)
+            return int((completed_steps_phase1 / total_llm_segments) * phase_weight_align)
         completed_steps_phase1 = 0
+        self.profile.metadata["processing_mode"] = processing_mode
+        self.profile.begin_phase("prepare")
+        self._word_text_index = WordTextIndex(all_parsed_words)
+        self._alignment_engine = AlignmentEngine(all_parsed_words, self._word_text_index)
+        self._word_time_index = WordTimeIndex(all_parsed_words)
+        precomputed_alignment_results = None
+        if self.alignment_mode == app_config.ALIGNMENT_MODE_GLOBAL:
+            self.log("使用全局单调对齐模式：整体对齐一次后按片段边界切分...")
+            precomputed_alignment_results = self._alignment_engine.align_global(
+                [seg.strip().replace(" ", "") for seg in llm_segments_text],
+                band_width=app_config.GLOBAL_ALIGNMENT_BAND_WIDTH,
+                is_running=self._is_worker_running
+            )
+            if precomputed_alignment_results is None:
+                self.log("⚠️ 任务被用户中断")
+                return None
+        elif self.alignment_mode == app_config.ALIGNMENT_MODE_PARALLEL:
+            max_workers = self.alignment_max_workers or os.cpu_count() or 1
+            self.log(f"使用多进程并行对齐模式 (最多 {max_workers} 个进程，结果与逐片段对齐一致)...")
+            precomputed_alignment_results = self._alignment_engine.align_sequence_parallel(
+                llm_segments_text,
+                accept_ratio=app_config.ALIGNMENT_SIMILARITY_THRESHOLD * 0.7,
+                max_workers=max_workers,
+                is_running=self._is_worker_running
+            )
+            if precomputed_alignment_results is None:
+                self.log("⚠️ 任务被用户中断")
+                return None
+        self.profile.begin_phase("align")
         self.log(f"SRT阶段1: 对齐LLM片段 (Mode {processing_mode})...")
-        for i, text_seg_from_llm in enumerate(llm_segments_text):
+        for i, text_seg_from_llm in enumerate(streamed_segments if streamed_segments is not None else llm_segments_text):
+            if streamed_segments is not None:
+                llm_segments_text.append(text_seg_from_llm)
             if not self._is_worker_running():
                 self.log("⚠️ 任务被用户中断")
                 return None
-            matched_words, next_search_idx, match_ratio = self.get_segment_words_fuzzy(text_seg_from_llm, all_parsed_words, word_search_start_index)
+            if precomputed_alignment_results is not None:
+                segment_clean_for_match = text_seg_from_llm.strip().replace(" ", "")
+                if not segment_clean_for_match:
+                    matched_words, next_search_idx, match_ratio = [], word_search_start_index, 0.0
+                else:
+                    match_start, match_end, precomputed_ratio = precomputed_alignment_results[i]
+                    matched_words, next_search_idx, match_ratio = self._accept_alignment_result(
+                        text_seg_from_llm, segment_clean_for_match,
+                        all_parsed_words[match_start:match_end], match_end, precomputed_ratio, word_search_start_index)
+            else:
+                matched_words, next_search_idx, match_ratio = self.get_segment_words_fuzzy(text_seg_from_llm, all_parsed_words, word_search_start_index)
             if not matched_words or match_ratio == 0:
                 unaligned_segments.append(text_seg_from_llm)
                 completed_steps_phase1 += 1
                 # 【修复】使用动态分配的权重
-                self._emit_srt_progress(int( (completed_steps_phase1 / total_llm_segments) * phase_weight_align ), 100)
+                self._emit_srt_progress(_align_progress(), 100)
                 continue
 
             
@@ -3449,7 +3183,7 @@ class SrtProcessor:
                 self.log(f"   检测到音频事件，保持原始时长: \"{entry_text_from_llm}\"")
 
                 # 音频事件：使用修正后的时间（可能包含向前延长），但不向后延长
-                audio_event_text_content = "".join([w.text for w in actual_words_for_entry])
+                audio_event_text_content = self._joined_words_text(actual_words_for_entry)
                 intermediate_entries.append(SubtitleEntry(0, entry_start_time, final_audio_event_end_time, audio_event_text_content, actual_words_for_entry, match_ratio))
             else:
                 # 根据处理模式决定是否在此阶段应用时间修正
@@ -3464,14 +3198,14 @@ class SrtProcessor:
 
                     if corrected_entry_duration > self.max_duration or text_len > self.max_chars_per_line:
                         self.log(f"   ⚠️ Mode C: 片段超限，需分割: \"{entry_text_from_llm[:30]}...\" (修正后时长: {corrected_entry_duration:.2f}s, 文本长度: {text_len})")
-                        original_text_for_splitting = "".join([w.text for w in actual_words_for_entry])
+                        original_text_for_splitting = self._joined_words_text(actual_words_for_entry)
                         split_sub_entries = self.split_long_sentence(original_text_for_splitting, actual_words_for_entry, entry_start_time, corrected_end_time, 0, corrected_end_time)
 
                         final_entries = []
                         for sub_entry in split_sub_entries:
                             sub_entry.alignment_ratio = match_ratio
                             if sub_entry.duration > self.max_duration and len(sub_entry.words_used) > 1:
-                                safe_text_for_recursion = "".join([w.text for w in sub_entry.words_used])
+                                safe_text_for_recursion = self._joined_words_text(sub_entry.words_used)
                                 recursive_splits = self.split_long_sentence(safe_text_for_recursion, sub_entry.words_used, sub_entry.start_time, sub_entry.end_time, 1, corrected_end_time)
                                 for recursive_entry in recursive_splits:
                                     recursive_entry.alignment_ratio = match_ratio
@@ -3509,14 +3243,14 @@ class SrtProcessor:
 
                     if corrected_entry_duration > self.max_duration or text_len > self.max_chars_per_line:
                         self.log(f"   ⚠️ Mode A: 片段超限，需分割: \"{entry_text_from_llm[:30]}...\" (修正后时长: {corrected_entry_duration:.2f}s, 文本长度: {text_len})")
-                        original_text_for_splitting = "".join([w.text for w in actual_words_for_entry])
+                        original_text_for_splitting = self._joined_words_text(actual_words_for_entry)
                         split_sub_entries = self.split_long_sentence(original_text_for_splitting, actual_words_for_entry, entry_start_time, corrected_end_time, 0, corrected_end_time)
 
                         final_entries = []
                         for sub_entry in split_sub_entries:
                             sub_entry.alignment_ratio = match_ratio
                             if sub_entry.duration > self.max_duration and len(sub_entry.words_used) > 1:
-                                safe_text_for_recursion = "".join([w.text for w in sub_entry.words_used])
+                                safe_text_for_recursion = self._joined_words_text(sub_entry.words_used)
                                 recursive_splits = self.split_long_sentence(safe_text_for_recursion, sub_entry.words_used, sub_entry.start_time, sub_entry.end_time, 1, corrected_end_time)
                                 for recursive_entry in recursive_splits:
                                     recursive_entry.alignment_ratio = match_ratio
@@ -3549,16 +3283,24 @@ class SrtProcessor:
                         intermediate_entries.append(SubtitleEntry(0, entry_start_time, corrected_end_time, entry_text_from_llm, actual_words_for_entry, match_ratio))
             completed_steps_phase1 += 1
             # 【修复】使用动态分配的权重
-            self._emit_srt_progress(int( (completed_steps_phase1 / total_llm_segments) * phase_weight_align ), 100)
+            self._emit_srt_progress(_align_progress(), 100)
+        if streamed_segments is not None:
+            if getattr(streamed_segments, "failed", False):
+                self.log("错误：LLM 流式分割失败或被取消。"); return None
+            if not llm_segments_text: self.log("错误：LLM 未返回任何分割片段。"); return None
+            total_llm_segments = len(llm_segments_text)
+            self.profile.metadata["segment_count"] = total_llm_segments
         self.log("--- LLM片段对齐结束 ---")
         if unaligned_segments:
             self.log(f"\\n--- 以下 {len(unaligned_segments)} 个LLM片段未能成功对齐，已跳过 ---")
             for seg_idx, seg_text in enumerate(unaligned_segments): self.log(f"- 片段 {seg_idx+1}: \"{seg_text}\"")
             self.log("----------------------------------------\\n")
+        self.profile.set_items("align", segments=total_llm_segments, unaligned_segments=len(unaligned_segments), entries=len(intermediate_entries))
         if not intermediate_entries: self.log("错误：对齐后没有生成任何有效的字幕条目。"); return None
         intermediate_entries.sort(key=lambda e: e.start_time)
         
         # --- Phase 2: 智能合并 (模式特定) ---
+        self.profile.begin_phase("merge")
         self.log(f"SRT阶段2: 合并调整字幕条目 (Mode {processing_mode})...")
 
         # 根据模式设置合并参数
@@ -3614,7 +3356,9 @@ class SrtProcessor:
             self._emit_srt_progress(phase_weight_align + current_phase2_progress_component, 100)
         # --- End Phase 2 ---
 
+        self.profile.set_items("merge", input_entries=total_intermediate_entries, output_entries=len(merged_entries))
         self.log(f"--- 合并调整后得到 {len(merged_entries)} 个字幕条目，开始最终格式化 ---")
+        self.profile.begin_phase("mode_optimization")
         self.log(f"SRT阶段3: 最终格式化字幕 (Mode {processing_mode})...")
 
         # 初始化校对提示列表（必须在模式处理之前）
@@ -3651,8 +3395,10 @@ class SrtProcessor:
             # 阶段1(20%) + 阶段2(20%) = 40%
             mode_a_optimization_completion_progress = phase_weight_align + phase_weight_merge
             self._emit_srt_progress(mode_a_optimization_completion_progress, 100)
-        final_srt_formatted_list: List[str] = []
-        final_entry_objects: List[SubtitleEntry] = []  # <--- [新增] 初始化列表
+        self.profile.set_items("mode_optimization", entries=len(merged_entries))
+        self.profile.begin_phase("format")
+        # 后续所有处理阶段都直接操作 SubtitleEntry 对象 (保留 words_used)，只在最后统一序列化为 SRT 一次
+        final_entry_objects: List[SubtitleEntry] = []
         last_processed_entry_object: Optional[SubtitleEntry] = None
         subtitle_index = 1
         total_merged_final_entries = len(merged_entries)
@@ -3695,8 +3441,6 @@ class SrtProcessor:
                             if new_current_start_time + min_current_duration <= current_entry.end_time:
                                 self.log(f"字幕时间优化: 调整以保持最小间距")
                                 current_entry.start_time = new_current_start_time
-                            if final_srt_formatted_list:
-                                final_srt_formatted_list[-1] = last_processed_entry_object.to_srt_format(self)
                 else:
                     # Mode A & C: 只进行基本的重叠修正
                     raw_gap = current_entry.start_time - last_processed_entry_object.end_time
@@ -3705,7 +3449,7 @@ class SrtProcessor:
                         current_entry.start_time = last_processed_entry_object.end_time + 0.01
             current_duration = current_entry.duration
             entry_is_audio_event = False
-            if current_entry.words_used: entry_is_audio_event = any(not w.text.strip() or getattr(w, 'type', 'word') == 'audio_event' or re.match(r"^\(.*\)$|^（.*）$", w.text.strip()) for w in current_entry.words_used)
+            if current_entry.words_used: entry_is_audio_event = self._has_audio_event_word(current_entry.words_used)
 
             # 初始化变量，避免UnboundLocalError
             min_duration_to_apply_val = None
@@ -3743,16 +3487,11 @@ class SrtProcessor:
                     split_entries = self._split_comfort_optimized_entry(current_entry)
 
                     if len(split_entries) > 1:
-                        # 分割成功，立即格式化所有分割后的片段并添加到final_srt_formatted_list
+                        # 分割成功，所有分割后的片段依次编号并加入最终条目列表
                         self.log(f"特殊分割成功：原片段分为 {len(split_entries)} 个子片段")
 
                         for split_idx, split_entry in enumerate(split_entries):
                             split_entry.index = subtitle_index + split_idx
-
-                            # 1. 生成 SRT 字符串
-                            final_srt_formatted_list.append(split_entry.to_srt_format(self))
-
-                            # 2. [新增] 收集正确的对象
                             final_entry_objects.append(split_entry)
 
                             self.log(f"   格式化分割片段 {split_idx+1}/{len(split_entries)}: ...")
@@ -3783,48 +3522,38 @@ class SrtProcessor:
                  current_entry.end_time = current_entry.start_time + 0.001
             
             current_entry.index = subtitle_index
-
-            # 1. 生成 SRT 字符串
-            final_srt_formatted_list.append(current_entry.to_srt_format(self))
-
-            # 2. [新增] 收集正确的对象
             final_entry_objects.append(current_entry)
 
             last_processed_entry_object = current_entry; subtitle_index += 1
             current_phase3_progress_component = int(((entry_idx + 1) / total_merged_final_entries if total_merged_final_entries > 0 else 1) * phase_weight_format)
             # 【修复】格式化阶段进度计算：阶段1权重 + 阶段2权重 + 当前阶段3进度
             self._emit_srt_progress(phase_weight_align + phase_weight_merge + current_phase3_progress_component, 100)
+        self.profile.set_items("format", input_entries=total_merged_final_entries, output_entries=len(final_entry_objects))
         self.log("--- SRT 内容生成和格式化完成 ---")
 
         # Soniox专用词级间距验证：在终极优化之前应用词级调整逻辑
-        if processing_mode == "C" and len(final_entry_objects) >= 2:  # <--- 使用新列表判断
+        if processing_mode == "C" and len(final_entry_objects) >= 2:
+            self.profile.begin_phase("spacing_validation")
+            self.profile.set_items("spacing_validation", entries=len(final_entry_objects))
             self.log("--- Soniox词级间距验证：在终极优化前检查最小间距要求 ---")
 
-            # 应用词级间距验证 (传入正确的新列表)
             # 注意：_apply_word_level_spacing_validation 会直接修改传入对象的时间属性
             self._apply_word_level_spacing_validation(final_entry_objects)
 
-            # 基于调整后的对象重新生成 SRT 列表
-            final_srt_formatted_list = []
-            for entry in final_entry_objects:  # <--- 使用正确的新列表重构
-                final_srt_formatted_list.append(entry.to_srt_format(self))
-
             self.log("--- Soniox词级间距验证完成 ---")
 
         # Soniox专用终极优化：动态前移开始时间
-        if processing_mode == "C" and len(final_srt_formatted_list) > 0:
+        if processing_mode == "C" and len(final_entry_objects) > 0:
+            self.profile.begin_phase("ultimate_optimization")
+            self.profile.set_items("ultimate_optimization", entries=len(final_entry_objects))
             self.log("--- Soniox终极优化：动态调整字幕开始时间 ---")
-            optimized_srt_list = self._apply_soniox_ultimate_optimization(final_srt_formatted_list)
-            final_srt_formatted_list = optimized_srt_list
+            final_entry_objects = self._apply_soniox_ultimate_optimization(final_entry_objects)
             self.log("--- Soniox终极优化完成 ---")
 
             # 注意：词级间距验证已在终极优化前完成，无需在此重复进行
 
-        # 生成最终SRT内容
-        final_srt_content = "".join(final_srt_formatted_list).strip()
-
         # 【新增】在SRT生成完成后进行AI校对（后处理模式）
-        if enable_ai_correction and processing_mode == "C" and final_srt_content:
+        if enable_ai_correction and processing_mode == "C" and final_entry_objects:
             if not self.llm_api_key:
                 self.log("⚠️ 未配置LLM API密钥，跳过AI校对")
                 correction_hints.append("⚠️ 未配置LLM API密钥，跳过AI校对")
@@ -3833,13 +3562,15 @@ class SrtProcessor:
                 self._emit_srt_progress(completion_progress, 100)
             else:
                 try:
+                    self.profile.begin_phase("ai_correction")
                     self.log("🤖 开始AI纠错阶段（占总进度40%）")
                     # 【修复】AI纠错阶段开始进度（前三个阶段完成）
                     ai_correction_start_progress = phase_weight_align + phase_weight_merge + phase_weight_format
                     self._emit_srt_progress(ai_correction_start_progress, 100)
+                    self._ai_correction_progress_span = (ai_correction_start_progress, phase_weight_ai_correction)
 
-                    final_srt_content, ai_correction_hints = self._apply_post_srt_ai_correction(
-                        final_srt_content, parsed_transcription.words
+                    final_entry_objects, ai_correction_hints = self._apply_post_srt_ai_correction(
+                        final_entry_objects, parsed_transcription.words
                     )
                     correction_hints.extend(ai_correction_hints)
 
@@ -3858,7 +3589,11 @@ class SrtProcessor:
             self.log(f"⚠️ AI纠错仅支持Soniox模式，当前为{processing_mode}模式")
             correction_hints.append(f"⚠️ AI纠错仅支持Soniox模式，当前为{processing_mode}模式")
 
-        # 最终确保清理所有残留的【】符号
+        # 统一序列化为SRT内容，并最终确保清理所有残留的【】符号
+        # (每个时间码只在这里按 format_timecode 四舍五入格式化一次；旧版 Mode C 把 SRT 文本解析后再次格式化时截断毫秒，
+        #  开始与结束时间码都可能因此比现在早 1 毫秒)
+        self.profile.begin_phase("finalize")
+        final_srt_content = "".join(entry.to_srt_format(self) for entry in final_entry_objects).strip()
         final_srt_content = self._clean_bracket_symbols(final_srt_content)
 
         # 【修复】确保进度总是达到100%
@@ -12,7 +12,7 @@
 from typing import List, Optional, Literal
 import traceback
 # Corrected import: removed 'src.' prefix, or use relative if preferred for sibling modules
-from core.data_models import TimestampedWord, ParsedTranscription
+from core.data_models import TimestampedWord, ParsedTranscription, as_word_span
 # from .data_models import TimestampedWord, ParsedTranscription # Alternative using relative import
 
 
@@ -49,6 +49,8 @@ class TranscriptionParser:
                 return None
 
             if result:
+                # 解析结果转为列式词存储，避免为每个词保留一个独立对象
+                result.words = as_word_span(result.words)
                 self.log(f"{source_format.capitalize()} JSON 解析完成，得到 {len(result.words)} 个词。总文本长度: {len(result.full_text or '')} 字符。")
             else:
                 self.log(f"{source_format.capitalize()} JSON 解析未能返回有效结果。")
@@ -0,0 +1,162 @@
+"""
+词置信度索引模块
+
+AI 校对的各个步骤 (收集低置信度词、统计、识别需要校对的片段) 原本各自逐词扫描整个词列表，
+对每个词重复做标点判断，再用嵌套循环把词对应到字幕条目。
+这里对词列表只做一次预计算：置信度数组、每个词是否可作为纠错目标 (不含标点、单字符只允许汉字/假名) 的掩码，
+以及按中点排序的目标词时间轴；之后选择目标词是一次掩码运算，每个条目对应的目标词区间用二分查找一次得到。
+安装了 numpy 时使用 numpy 数组与向量化运算，否则退回到等价的纯 Python 实现，两者结果完全相同。
+
+作者: fuxiaomoke
+版本: 0.2.2.0
+"""
+
+import bisect
+import math
+from typing import List, Optional, Callable, Sequence, Tuple, Union
+
+from .data_models import TimestampedWord, SubtitleEntry, WordSpan
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+# 统计低置信度词数量时视为"纯标点"的字符
+REPORT_PUNCTUATION_CHARS = ' 、。！？,.!?ー…'
+
+
+def _is_cjk_or_kana(char: str) -> bool:
+    """CJK 汉字 (常用 + 扩展A)、平假名或片假名。"""
+    return ('\u4e00' <= char <= '\u9fff') or ('\u3400' <= char <= '\u4dbf') or ('\u3040' <= char <= '\u30ff')
+
+
+def is_correction_candidate_text(text: str, has_punctuation: Callable[[str], bool]) -> bool:
+    """
+    词文本是否可作为纠错目标：
+    跳过包含标点符号的词 (包括标点本身和以标点结尾的词)，以及汉字、假名以外的单个字符 (如单个英文字母或数字)。
+    """
+    if has_punctuation(text):
+        return False
+    stripped = text.strip()
+    if len(stripped) == 1 and not _is_cjk_or_kana(stripped):
+        return False
+    return True
+
+
+def is_countable_text(text: str) -> bool:
+    """统计低置信度词数量时是否计入 (非空且不是纯标点)。"""
+    stripped = text.strip()
+    return bool(stripped) and not all(c in REPORT_PUNCTUATION_CHARS for c in stripped)
+
+
+def _float_or_nan(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+class WordConfidenceIndex:
+    """
+    一份词列表的置信度索引，构建后只读。
+
+    - low_mask: 置信度低于阈值 (置信度为 None 的词不计入)；
+    - target_mask: 低置信度且可作为纠错目标；
+    - 目标词中带有效时间 (开始 < 结束) 的词按中点排序，供 segments_with_targets 二分查找。
+    每个不同的词文本只判断一次是否为纠错目标。
+    """
+
+    def __init__(self, words: Union[WordSpan, List[TimestampedWord]], threshold: float,
+                 has_punctuation: Callable[[str], bool]):
+        self.words = words
+        self.threshold = threshold
+        if isinstance(words, WordSpan):
+            self.texts = words.texts()
+            confidences: Sequence[float] = words.confidences()
+            starts: Sequence[float] = words.start_times()
+            ends: Sequence[float] = words.end_times()
+        else:
+            self.texts = [w.text for w in words]
+            confidences = [_float_or_nan(getattr(w, 'confidence', None)) for w in words]
+            starts = [_float_or_nan(getattr(w, 'start_time', None)) for w in words]
+            ends = [_float_or_nan(getattr(w, 'end_time', None)) for w in words]
+
+        candidate_memo = {}
+        candidates = []
+        for text in self.texts:
+            is_candidate = candidate_memo.get(text)
+            if is_candidate is None:
+                is_candidate = candidate_memo[text] = is_correction_candidate_text(text, has_punctuation)
+            candidates.append(is_candidate)
+
+        if np is not None:
+            confidence_array = np.asarray(confidences, dtype=float)
+            start_array = np.asarray(starts, dtype=float)
+            end_array = np.asarray(ends, dtype=float)
+            self.low_mask = confidence_array < threshold
+            self.target_mask = self.low_mask & np.asarray(candidates, dtype=bool)
+            timed_targets = self.target_mask & (start_array < end_array)
+            self._target_midpoints = np.sort((start_array[timed_targets] + end_array[timed_targets]) / 2.0)
+        else:
+            self.low_mask = [c < threshold for c in confidences]
+            self.target_mask = [low and candidate for low, candidate in zip(self.low_mask, candidates)]
+            self._target_midpoints = sorted(
+                (s + e) / 2.0 for s, e, is_target in zip(starts, ends, self.target_mask) if is_target and s < e
+            )
+
+    def _indices(self, mask) -> List[int]:
+        if np is not None:
+            return np.flatnonzero(mask).tolist()
+        return [i for i, flag in enumerate(mask) if flag]
+
+    def low_confidence_words(self) -> list:
+        """置信度低于阈值的词 (保持原顺序)。"""
+        words = self.words
+        return [words[i] for i in self._indices(self.low_mask)]
+
+    def low_confidence_texts(self) -> List[str]:
+        texts = self.texts
+        return [texts[i] for i in self._indices(self.low_mask)]
+
+    def countable_low_confidence_count(self) -> int:
+        """低置信度词中非空且不是纯标点的数量 (用于日志与校对报告)。"""
+        return sum(1 for text in self.low_confidence_texts() if is_countable_text(text))
+
+    def target_texts(self) -> List[str]:
+        """可作为纠错目标的低置信度词文本 (保持原顺序)。"""
+        texts = self.texts
+        return [texts[i] for i in self._indices(self.target_mask)]
+
+    def has_targets(self) -> bool:
+        if np is not None:
+            return bool(self.target_mask.any())
+        return any(self.target_mask)
+
+    def segment_target_bounds(self, entries: List[SubtitleEntry], tolerance: float = 0.0) -> Tuple[list, list]:
+        """
+        每个条目对应的目标词区间：返回 (lo, hi)，条目 i 覆盖按中点排序的目标词 [lo[i], hi[i])，
+        即中点落在 [开始 - tolerance, 结束 + tolerance] 内的目标词。时间缺失或无效的条目 lo >= hi。
+        """
+        entry_starts = [_float_or_nan(entry.start_time) for entry in entries]
+        entry_ends = [_float_or_nan(entry.end_time) for entry in entries]
+        midpoints = self._target_midpoints
+        if np is not None:
+            start_array = np.asarray(entry_starts, dtype=float)
+            end_array = np.asarray(entry_ends, dtype=float)
+            lo = np.searchsorted(midpoints, start_array - tolerance, side='left')
+            hi = np.searchsorted(midpoints, end_array + tolerance, side='right')
+            return lo, np.where(start_array < end_array, hi, lo)
+        lo, hi = [], []
+        for start, end in zip(entry_starts, entry_ends):
+            if start < end:
+                lo.append(bisect.bisect_left(midpoints, start - tolerance))
+                hi.append(bisect.bisect_right(midpoints, end + tolerance))
+            else:
+                lo.append(0)
+                hi.append(0)
+        return lo, hi
+
+    def segments_with_targets(self, entries: List[SubtitleEntry], tolerance: float = 0.0) -> List[int]:
+        """有任何目标词的中点落在条目时间范围内 (放宽 tolerance) 的条目索引。"""
+        lo, hi = self.segment_target_bounds(entries, tolerance)
+        if np is not None:
+            return np.flatnonzero(hi > lo).tolist()
+        return [i for i, (first, last) in enumerate(zip(lo, hi)) if last > first]
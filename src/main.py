@@ -6,6 +6,7 @@
 
 import sys
 import os
+import multiprocessing
 
 # 确保能找到项目模块
 if os.path.dirname(__file__) not in sys.path:
@@ -39,6 +40,8 @@ from utils.file_utils import resource_path, setup_faulthandler
 from ui.main_window import HealJimakuApp
 
 if __name__ == "__main__":
+    # 打包后的程序使用多进程（如并行对齐）时需要此调用
+    multiprocessing.freeze_support()
     try:
         # 安装自定义消息处理器，过滤 QPainter 警告
         qInstallMessageHandler(qt_message_handler)
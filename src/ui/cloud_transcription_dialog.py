@@ -238,85 +238,14 @@ A: え...？嘘...
         """直接调用LLM API进行台本清洗，不进行分割"""
         import requests
         import traceback
+        from core.llm_api import LLMClient
 
         try:
-            # 构建请求URL
-            if "generativelanguage.googleapis.com" in api_base_url:
-                # Gemini API
-                target_url = f"{api_base_url.rstrip('/')}/v1beta/models/{model_name}:generateContent?key={api_key}"
-                payload = {
-                    "contents": [{
-                        "parts": [{"text": f"系统提示：{system_prompt}\n\n用户输入：{text_content}"}]
-                    }],
-                    "generationConfig": {
-                        "temperature": temperature,
-                        "maxOutputTokens": 8192
-                    }
-                }
-                response = requests.post(target_url, json=payload, timeout=180)
-            elif "api.anthropic.com" in api_base_url or "/v1/messages" in api_base_url:
-                # Claude API
-                target_url = f"{api_base_url.rstrip('/')}/v1/messages"
-                payload = {
-                    "model": model_name,
-                    "max_tokens": 8192,
-                    "messages": [
-                        {"role": "user", "content": f"系统提示：{system_prompt}\n\n用户输入：{text_content}"}
-                    ]
-                }
-                if temperature is not None:
-                    payload["temperature"] = temperature
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}",
-                    "anthropic-version": "2023-06-01"
-                }
-                response = requests.post(target_url, headers=headers, json=payload, timeout=180)
-            else:
-                # OpenAI 兼容格式
-                if "/v1" in api_base_url or "/v2" in api_base_url:
-                    target_url = api_base_url.rstrip('/') + "/chat/completions"
-                elif api_base_url.endswith('/'):
-                    target_url = api_base_url + "v1/chat/completions"
-                else:
-                    target_url = api_base_url.rstrip('/') + "/v1/chat/completions"
-
-                payload = {
-                    "model": model_name,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": text_content}
-                    ],
-                    "max_tokens": 8192
-                }
-                if temperature is not None:
-                    payload["temperature"] = temperature
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}"
-                }
-                response = requests.post(target_url, headers=headers, json=payload, timeout=180)
-
-            # 处理响应
-            response.raise_for_status()
-            data = response.json()
-
-            # 解析不同格式的响应
-            content = None
-            if "choices" in data and data["choices"] and isinstance(data["choices"], list) and len(data["choices"]) > 0:
-                choice = data["choices"][0]
-                if isinstance(choice, dict) and choice.get("message", {}).get("content") is not None:
-                    content = choice["message"]["content"]
-            elif data.get("candidates") and isinstance(data["candidates"], list) and len(data["candidates"]) > 0:
-                candidate = data["candidates"][0]
-                if isinstance(candidate, dict) and candidate.get("content", {}).get("parts", [{}]) and \
-                   isinstance(candidate["content"]["parts"], list) and len(candidate["content"]["parts"]) > 0 and \
-                   isinstance(candidate["content"]["parts"][0], dict) and candidate["content"]["parts"][0].get("text") is not None:
-                    content = candidate["content"]["parts"][0]["text"]
-            elif data.get("content") and isinstance(data["content"], list) and len(data["content"]) > 0:
-                part = data["content"][0]
-                if isinstance(part, dict) and part.get("text") is not None:
-                    content = part["text"]
+            # 地址补全、请求格式与响应解析统一由 LLMClient 处理，多个分块的清洗请求复用同一主机的持久连接
+            client = LLMClient.from_settings(api_key, api_base_url, model_name,
+                                             temperature=temperature, max_tokens=8192)
+            completion = client.complete(system_prompt, text_content)
+            content = completion.content; data = completion.data
 
             if content is not None:
                 return content.strip()
@@ -326,7 +255,7 @@ A: え...？嘘...
                 return None
 
         except requests.exceptions.Timeout:
-            print("错误: LLM API 请求超时 (180秒)")
+            print(f"错误: LLM API 请求超时 ({client.transport.read_timeout}秒)")
             return None
         except requests.exceptions.HTTPError as e:
             status_code = e.response.status_code if e.response is not None else 'N/A'
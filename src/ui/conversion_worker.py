@@ -8,7 +8,9 @@ from PyQt6.QtCore import QObject, pyqtSignal
 
 from core.transcription_parser import TranscriptionParser
 from core.srt_processor import SrtProcessor
-from core.llm_api import call_llm_api_for_segmentation
+from core.llm_api import call_llm_api_for_segmentation, stream_llm_api_for_segmentation, get_profile_transport
+from core.llm_pool import LLMClientPool
+from core.llm_checkpoint import LLMCheckpoint, make_checkpoint_key
 from core.data_models import ParsedTranscription
 from core.elevenlabs_api import ElevenLabsSTTClient
 from core.soniox_api import SonioxClient, SonioxTranscriptionConfig
@@ -25,6 +27,7 @@ class WorkerSignals(QObject):
     finished = pyqtSignal(str, bool)
     progress = pyqtSignal(int)
     log_message = pyqtSignal(str)
+    llm_progress_signal = pyqtSignal(int)  # LLM分块分割进度 (0-100)
     free_transcription_json_generated = pyqtSignal(str)
 
 
@@ -140,6 +143,27 @@ class ConversionWorker(QObject):
             self.signals.log_message.emit(f"读取合并 JSON 失败: {e}")
             return None
 
+    def _resolve_output_base_name(self, generated_json_path: str) -> str:
+        """根据输入模式确定输出文件 (SRT、检查点) 的基础文件名"""
+        if self.input_mode == "local_json":
+            output_base_name = os.path.splitext(os.path.basename(generated_json_path))[0]
+        elif self.input_mode == "free_transcription" and self.free_transcription_params and self.free_transcription_params.get("audio_file_path"):
+            output_base_name = os.path.splitext(os.path.basename(self.free_transcription_params["audio_file_path"]))[0]
+            if output_base_name.endswith("_elevenlabs_transcript"):
+                output_base_name = output_base_name[:-len("_elevenlabs_transcript")]
+        elif self.input_mode == "cloud_transcription" and self.cloud_transcription_params:
+            # 云端转录模式：根据音频文件名生成输出文件名
+            if self.cloud_transcription_params.get("audio_file_path"):
+                output_base_name = os.path.splitext(os.path.basename(self.cloud_transcription_params["audio_file_path"]))[0]
+            elif self.cloud_transcription_params.get("audio_files") and len(self.cloud_transcription_params["audio_files"]) > 0:
+                # 批量处理情况，使用第一个文件名
+                output_base_name = os.path.splitext(os.path.basename(self.cloud_transcription_params["audio_files"][0]))[0]
+            else:
+                output_base_name = "processed_subtitle"
+        else:
+            output_base_name = "processed_subtitle"
+        return output_base_name
+
     def stop(self):
         """停止当前工作线程，尝试优雅地终止所有任务"""
         if not self.is_running:
@@ -170,6 +194,7 @@ class ConversionWorker(QObject):
 
     def run(self):
         """执行主转换流程，处理音频转录、JSON解析、LLM分割和SRT生成"""
+        llm_checkpoint = None
         try:
             generated_json_path = self.input_json_path
             actual_source_format = self.source_format
@@ -554,10 +579,58 @@ class ConversionWorker(QObject):
             import config as app_config
             current_profile = app_config.get_current_llm_profile(self.llm_config)
             llm_api_format = current_profile.get("api_format", app_config.API_FORMAT_AUTO)
+            llm_max_concurrent_requests = current_profile.get(
+                app_config.PROFILE_MAX_CONCURRENT_REQUESTS_KEY, app_config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS
+            )
 
-            # 调用LLM API进行文本分割
-            self.signals.log_message.emit(f"调用LLM API进行文本分割 (URL配置: '{llm_base_url_str}', 模型: '{llm_model_name}', 温度: {llm_temperature}, API格式: {llm_api_format})...")
-            llm_segments = call_llm_api_for_segmentation(
+            # 流式分割只在逐片段对齐模式下能与对齐并行，其他对齐模式仍需等待完整结果
+            llm_stream_responses = bool(current_profile.get(
+                app_config.PROFILE_STREAM_RESPONSES_KEY, app_config.DEFAULT_LLM_STREAM_RESPONSES
+            )) and getattr(self.srt_processor, "alignment_mode", None) == app_config.ALIGNMENT_MODE_SEQUENTIAL
+
+            # 负载均衡池：启用且有其他池成员配置时，分块分割与AI校正批次分散到池中的各配置
+            llm_client_pool = None
+            if self.llm_config.get(app_config.USER_LLM_POOL_ENABLED_KEY, app_config.DEFAULT_LLM_POOL_ENABLED):
+                pool_profiles = app_config.get_llm_pool_profiles(self.llm_config)
+                # 主配置使用与单配置模式相同的地址、模型、温度与 API Key
+                pool_profiles[0] = dict(pool_profiles[0], **{
+                    app_config.PROFILE_API_KEY_KEY: llm_api_key,
+                    app_config.PROFILE_API_BASE_URL_KEY: llm_base_url_str,
+                    app_config.PROFILE_MODEL_NAME_KEY: llm_model_name,
+                    app_config.PROFILE_TEMPERATURE_KEY: llm_temperature
+                })
+                if len(pool_profiles) > 1:
+                    llm_client_pool = LLMClientPool.from_profiles(pool_profiles, logger_func=self.signals.log_message.emit)
+                    self.signals.log_message.emit(f"已启用负载均衡池，共 {len(pool_profiles)} 个模型配置。")
+                else:
+                    self.signals.log_message.emit("已启用负载均衡池，但没有其他标记为池成员且填写了API Key的配置，仅使用当前配置。")
+            # 检查点：已完成的分割块与校正批次写入输出目录，中断后重新处理同一输入时从缺失的部分继续
+            if self.llm_config.get(app_config.USER_LLM_CHECKPOINT_ENABLED_KEY, app_config.DEFAULT_LLM_CHECKPOINT_ENABLED):
+                checkpoint_path = os.path.join(self.output_dir, f"{self._resolve_output_base_name(generated_json_path)}{app_config.LLM_CHECKPOINT_SUFFIX}")
+                llm_checkpoint = LLMCheckpoint(checkpoint_path, make_checkpoint_key(text_to_segment))
+                if llm_checkpoint.restored_count:
+                    self.signals.log_message.emit(f"找到上次未完成的检查点 ({llm_checkpoint.restored_count} 条记录)，将从中断处继续: {checkpoint_path}")
+            llm_profile_id = current_profile.get(app_config.PROFILE_ID_KEY)
+            llm_requests_per_minute = current_profile.get(
+                app_config.PROFILE_REQUESTS_PER_MINUTE_KEY, app_config.DEFAULT_LLM_REQUESTS_PER_MINUTE
+            )
+            # 单配置模式：分块分割与AI校正批次使用同一个传输对象，两类并发请求共用该配置的限速器与连接池
+            # (负载均衡池模式下两者都通过池成员的客户端发送，各成员已按配置共用传输对象)
+            llm_transport = None
+            if llm_client_pool is None:
+                llm_transport = get_profile_transport(llm_base_url_str, llm_model_name, llm_api_format, llm_profile_id,
+                                                      llm_max_concurrent_requests, llm_requests_per_minute)
+            if self.srt_processor:
+                self.srt_processor.llm_client_pool = llm_client_pool
+                self.srt_processor.llm_checkpoint = llm_checkpoint
+                self.srt_processor.llm_max_concurrent_requests = int(llm_max_concurrent_requests or 1)
+                self.srt_processor.llm_context_tokens = current_profile.get(app_config.PROFILE_CONTEXT_TOKENS_KEY)
+                self.srt_processor.llm_max_output_tokens = current_profile.get(app_config.PROFILE_MAX_OUTPUT_TOKENS_KEY)
+                self.srt_processor.llm_profile_id = llm_profile_id
+                self.srt_processor.llm_requests_per_minute = llm_requests_per_minute
+                self.srt_processor.llm_transport = llm_transport
+
+            segmentation_kwargs = dict(
                 api_key=llm_api_key,
                 text_to_segment=text_to_segment,
                 custom_api_base_url_str=llm_base_url_str,
@@ -565,16 +638,42 @@ class ConversionWorker(QObject):
                 custom_temperature=llm_temperature,
                 signals_forwarder=self.signals,
                 target_language=llm_target_language_for_api,
-                api_format=llm_api_format  # 传递API格式参数
+                api_format=llm_api_format,  # 传递API格式参数
+                max_concurrent_requests=llm_max_concurrent_requests,
+                profile_id=llm_profile_id,
+                summary_mode=current_profile.get(app_config.PROFILE_SUMMARY_MODE_KEY, app_config.DEFAULT_LLM_SUMMARY_MODE),
+                context_tokens=current_profile.get(app_config.PROFILE_CONTEXT_TOKENS_KEY),
+                max_output_tokens=current_profile.get(app_config.PROFILE_MAX_OUTPUT_TOKENS_KEY),
+                requests_per_minute=llm_requests_per_minute,
+                client_pool=llm_client_pool,
+                checkpoint=llm_checkpoint,
+                transport=llm_transport
             )
-            if not self.is_running : self.signals.finished.emit("任务在LLM API调用期间被取消。", False); return
-            if llm_segments is None: self.signals.finished.emit("LLM API 调用失败或返回空。", False); return
 
-            if self.input_mode == "free_transcription":
-                current_overall_progress = PROGRESS_LLM_COMPLETE_FREE
+            # 调用LLM API进行文本分割
+            self.signals.log_message.emit(f"调用LLM API进行文本分割 (URL配置: '{llm_base_url_str}', 模型: '{llm_model_name}', 温度: {llm_temperature}, API格式: {llm_api_format}, 并发: {llm_max_concurrent_requests}, 流式: {'是' if llm_stream_responses else '否'})...")
+            if llm_stream_responses:
+                # 流式模式：片段边生成边交给SRT处理器对齐，进度由SRT处理器按已对齐的词比例统一报告
+                llm_segments = stream_llm_api_for_segmentation(**segmentation_kwargs)
             else:
-                current_overall_progress = PROGRESS_LLM_COMPLETE_LOCAL
-            self.signals.progress.emit(current_overall_progress)
+                # 把LLM分块进度映射到总进度中 "解析完成" 与 "LLM完成" 之间的区间
+                llm_progress_offset = current_overall_progress
+                llm_progress_end = PROGRESS_LLM_COMPLETE_FREE if self.input_mode == "free_transcription" else PROGRESS_LLM_COMPLETE_LOCAL
+                def _on_llm_progress(percent: int):
+                    self.signals.progress.emit(llm_progress_offset + int((llm_progress_end - llm_progress_offset) * percent / 100))
+                self.signals.llm_progress_signal.connect(_on_llm_progress)
+                try:
+                    llm_segments = call_llm_api_for_segmentation(**segmentation_kwargs)
+                finally:
+                    self.signals.llm_progress_signal.disconnect(_on_llm_progress)
+                if not self.is_running : self.signals.finished.emit("任务在LLM API调用期间被取消。", False); return
+                if llm_segments is None: self.signals.finished.emit("LLM API 调用失败或返回空。", False); return
+
+                if self.input_mode == "free_transcription":
+                    current_overall_progress = PROGRESS_LLM_COMPLETE_FREE
+                else:
+                    current_overall_progress = PROGRESS_LLM_COMPLETE_LOCAL
+                self.signals.progress.emit(current_overall_progress)
 
             # 生成SRT字幕内容
             self.signals.log_message.emit("开始使用LLM返回的片段生成 SRT 内容...")
@@ -599,34 +698,26 @@ class ConversionWorker(QObject):
             )
 
             if not self.is_running: self.signals.finished.emit("任务在SRT生成期间被取消。", False); return
+            if final_srt is None and llm_stream_responses and llm_segments.failed:
+                self.signals.finished.emit("LLM API 调用失败或返回空。", False); return
             if final_srt is None: self.signals.finished.emit("SRT 内容生成失败。", False); return
 
             # 保存最终SRT文件
-            if self.input_mode == "local_json":
-                output_base_name = os.path.splitext(os.path.basename(generated_json_path))[0]
-            elif self.input_mode == "free_transcription" and self.free_transcription_params and self.free_transcription_params.get("audio_file_path"):
-                output_base_name = os.path.splitext(os.path.basename(self.free_transcription_params["audio_file_path"]))[0]
-                if output_base_name.endswith("_elevenlabs_transcript"):
-                    output_base_name = output_base_name[:-len("_elevenlabs_transcript")]
-            elif self.input_mode == "cloud_transcription" and self.cloud_transcription_params:
-                # 云端转录模式：根据音频文件名生成输出文件名
-                if self.cloud_transcription_params.get("audio_file_path"):
-                    output_base_name = os.path.splitext(os.path.basename(self.cloud_transcription_params["audio_file_path"]))[0]
-                elif self.cloud_transcription_params.get("audio_files") and len(self.cloud_transcription_params["audio_files"]) > 0:
-                    # 批量处理情况，使用第一个文件名
-                    output_base_name = os.path.splitext(os.path.basename(self.cloud_transcription_params["audio_files"][0]))[0]
-                else:
-                    output_base_name = "processed_subtitle"
-            else:
-                output_base_name = "processed_subtitle"
-
+            output_base_name = self._resolve_output_base_name(generated_json_path)
             output_srt_filepath = os.path.join(self.output_dir, f"{output_base_name}.srt")
             try:
                 with open(output_srt_filepath, "w", encoding="utf-8") as f: f.write(final_srt)
                 self.signals.log_message.emit(f"SRT 文件已成功保存到: {output_srt_filepath}")
+                if llm_checkpoint is not None: llm_checkpoint.discard()
             except IOError as e:
                 self.signals.finished.emit(f"保存最终SRT文件失败: {e}", False); return
 
+            # 保存性能剖析旁路文件（可选）
+            if getattr(self.srt_processor, 'save_profile_sidecar', False):
+                profile_path = self.srt_processor.write_profile_sidecar(output_srt_filepath)
+                if profile_path:
+                    self.signals.log_message.emit(f"性能剖析已保存到: {profile_path}")
+
             # 保存校对提示文件（如果有）
             if correction_hints:
                 # 修改文件名格式：校对提示报告 + 原文件名 + .txt
@@ -683,4 +774,10 @@ class ConversionWorker(QObject):
             final_message = f"处理失败: {e}" if self.is_running else f"任务因用户取消而停止，过程中出现异常: {e}"
             self.signals.finished.emit(final_message, False)
         finally:
+            # 取消、失败或提前返回时检查点文件保留在磁盘上供下次续传，这里只关闭追加句柄；
+            # SRT处理器在主窗口中长期复用，清除其引用以免下一个任务写入本次的检查点
+            if llm_checkpoint is not None:
+                llm_checkpoint.close()
+            if self.srt_processor is not None:
+                self.srt_processor.llm_checkpoint = None
             self.is_running = False
\ No newline at end of file
@@ -1280,7 +1280,22 @@ class LlmAdvancedSettingsDialog(QDialog):
                     "is_default": profile.get("is_default", False),
                     "custom_headers": profile.get("custom_headers", {}),
                     "available_models": profile.get("available_models", []),  # 保存模型列表
-                    "api_format": api_format  # 保存API格式
+                    "api_format": api_format,  # 保存API格式
+                    config.PROFILE_MAX_CONCURRENT_REQUESTS_KEY: profile.get(
+                        config.PROFILE_MAX_CONCURRENT_REQUESTS_KEY, config.DEFAULT_LLM_MAX_CONCURRENT_REQUESTS
+                    ),  # 保留分块并发上限
+                    config.PROFILE_STREAM_RESPONSES_KEY: profile.get(
+                        config.PROFILE_STREAM_RESPONSES_KEY, config.DEFAULT_LLM_STREAM_RESPONSES
+                    ),  # 保留流式分割开关
+                    config.PROFILE_SUMMARY_MODE_KEY: profile.get(
+                        config.PROFILE_SUMMARY_MODE_KEY, config.DEFAULT_LLM_SUMMARY_MODE
+                    ),  # 保留摘要生成方式
+                    config.PROFILE_CONTEXT_TOKENS_KEY: profile.get(config.PROFILE_CONTEXT_TOKENS_KEY),  # 保留上下文长度 (None 表示使用默认值)
+                    config.PROFILE_MAX_OUTPUT_TOKENS_KEY: profile.get(config.PROFILE_MAX_OUTPUT_TOKENS_KEY),  # 保留最大输出tokens
+                    config.PROFILE_REQUESTS_PER_MINUTE_KEY: profile.get(
+                        config.PROFILE_REQUESTS_PER_MINUTE_KEY, config.DEFAULT_LLM_REQUESTS_PER_MINUTE
+                    ),  # 保留每分钟请求数上限
+                    config.PROFILE_POOL_MEMBER_KEY: profile.get(config.PROFILE_POOL_MEMBER_KEY, False)  # 保留负载均衡池成员标记
                 }
 
                 # 注意：不要在这里更新全局的CURRENT_PROFILE_ID_KEY
@@ -65,6 +65,7 @@ from .custom_widgets import TransparentWidget, CustomLabel, CustomLabel_title, S
 from .conversion_worker import ConversionWorker
 from .controllers.conversion_controller import ConversionController
 from core.srt_processor import SrtProcessor
+from core.llm_transport import close_all_llm_transports
 from .settings_dialog import SettingsDialog
 from .cloud_transcription_dialog import CloudTranscriptionDialog
 from .free_transcription_dialog import FreeTranscriptionDialog
@@ -3298,6 +3299,7 @@ class HealJimakuApp(QMainWindow):
                 self.api_key_entry.setText("")
 
         self.save_config()
+        close_all_llm_transports()
 
         # 如果用户不记住API Key，恢复输入框内容（用户可能还想看到）
         if not remember_api_key and hasattr(self, 'api_key_entry'):